@@ -0,0 +1,92 @@
+"""Benchmark: cleanup_title() on every title in mimTitles.txt
+
+Compares the current, word-cached cleanup_title() against the previous implementation, which re-ran the roman
+numeral regex and conversion for every word, and rebuilt its list of stop words for every word. Also checks that both
+produce identical output.
+
+Prerequisites
+  - Files: mimTitles.txt needs to be pre-downloaded in data/, e.g. by running the build once.
+
+Usage
+  python -m analyses.benchmarks.cleanup_title
+"""
+import re
+import timeit
+from typing import Dict, List
+
+from omim2obo.parsers.omim_entry_parser import CAPITALIZATION_REPLACEMENTS, _cleanup_title_word_cached, \
+    cleanup_title, remove_included_and_formerly_suffixes
+from omim2obo.parsers.omim_txt_parser import get_mim_file_rows, parse_mim_titles
+from omim2obo.utils.romanplus import fromRoman, romanNumeralPattern, toRoman
+
+N_REPEATS = 5
+
+
+def cleanup_title_previous(
+    title: str,
+    replacement_case_method: str = 'lower',
+    conjunctions: List[str] = ['and', 'but', 'yet', 'for', 'nor', 'so'],
+    little_preps: List[str] = ['at', 'by', 'in', 'of', 'on', 'to', 'up', 'as', 'it', 'or'],
+    articles: List[str] = ['a', 'an', 'the'],
+    word_replacements: Dict[str, str] = CAPITALIZATION_REPLACEMENTS,
+) -> str:
+    """cleanup_title(), as implemented prior to word-level caching"""
+    fixedwords = []
+    i = 0
+    for wrd in title.split():
+        i += 1
+        if i > 1 and re.match(romanNumeralPattern, wrd):
+            num = fromRoman(wrd)
+            if 0 < num < 100:
+                suffix = wrd.replace(toRoman(num), '', 1)
+                fixed = ''.join((str(num), suffix))
+                wrd = fixed
+        wrd = getattr(wrd, replacement_case_method)()
+        if wrd in (conjunctions + little_preps + articles) and i != 1:
+            wrd = wrd.lower()
+        if word_replacements:
+            wrd = word_replacements.get(wrd, wrd)
+        fixedwords.append(wrd)
+    return ' '.join(fixedwords)
+
+
+def get_all_titles() -> List[str]:
+    """Get all preferred, alternative, and included titles, as they are passed to cleanup_title() in the build"""
+    records, _ = parse_mim_titles(get_mim_file_rows('mimTitles'))
+    titles: List[str] = []
+    for record in records.values():
+        titles.append(record.pref_title)
+        titles.extend(remove_included_and_formerly_suffixes(x) for x in record.alt_titles + record.included_titles)
+    return titles
+
+
+def run():
+    """Run benchmark"""
+    titles = get_all_titles()
+    n_words = sum(len(x.split()) for x in titles)
+    print(f'{len(titles)} titles, {n_words} words, {len(set(w for x in titles for w in x.split()))} distinct words')
+
+    assert [cleanup_title_previous(x) for x in titles] == [cleanup_title(x) for x in titles]
+
+    def cold():
+        _cleanup_title_word_cached.cache_clear()
+        for x in titles:
+            cleanup_title(x)
+
+    def warm():
+        for x in titles:
+            cleanup_title(x)
+
+    def previous():
+        for x in titles:
+            cleanup_title_previous(x)
+
+    results: Dict[str, float] = {}
+    for name, func in [('previous', previous), ('cached (cold)', cold), ('cached (warm)', warm)]:
+        results[name] = min(timeit.repeat(func, number=1, repeat=N_REPEATS))
+    for name, secs in results.items():
+        print(f'{name:>14}: {secs:.3f}s ({results["previous"] / secs:.1f}x)')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,96 @@
+"""Benchmark: parse_morbid_map() on the full morbidmap.txt
+
+Compares the current parse_morbid_map(), which matches each phenotype field against one combined regex and stores
+associations as slotted records w/ an int mapping key, against the previous implementation, which ran two regexes on
+every row, stored associations as dicts, and looked up the mapping key's meaning for every row. Also checks that both
+produce the same associations.
+
+Prerequisites
+  - Files: morbidmap.txt needs to be pre-downloaded in data/, e.g. by running the build once.
+
+Usage
+  python -m analyses.benchmarks.parse_morbid_map
+"""
+import re
+import sys
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List
+
+from omim2obo.config import DATA_DIR
+from omim2obo.parsers.omim_txt_parser import parse_morbid_map
+from omim2obo.parsers.omim_txt_reader import MORBIDMAP_PHENOTYPE_MAPPING_KEY_MEANINGS, MorbidMapRow, \
+    read_mim_file_rows
+
+N_REPEATS = 5
+# Previously keyed by str
+MAPPING_KEY_MEANINGS_PREVIOUS: Dict[str, str] = {str(k): v for k, v in MORBIDMAP_PHENOTYPE_MAPPING_KEY_MEANINGS.items()}
+
+
+def parse_morbid_map_previous(rows: List[MorbidMapRow]) -> Dict[str, Dict]:
+    """Previous implementation of parse_morbid_map()"""
+    phenotype_label_regex = re.compile(r'(.*)(\d{6})\s*(?:\((\d+)\))?')
+    phenotype_label_no_mim_regex = re.compile(r'(.*)\s+\((\d+)\)')
+    gene_phenotypes: Dict[str, Dict] = {}
+    for row in rows:
+        gene_symbols: List[str] = row.gene_symbols.split(', ')
+        mim_number: str = row.mim_number.strip()
+        cyto_location: str = row.cyto_location.strip()
+
+        phenotype_label, phenotype_mim_number, association_key = '', '', ''
+        label_data_with_mim_num = phenotype_label_regex.match(row.phenotype)
+        label_data_no_mim_num = phenotype_label_no_mim_regex.match(row.phenotype)
+        if label_data_with_mim_num:
+            phenotype_label, phenotype_mim_number, association_key = label_data_with_mim_num.groups()
+        elif label_data_no_mim_num:
+            phenotype_label, association_key = label_data_no_mim_num.groups()
+        else:
+            print(f'Warning: Failed to parse phenotype label in morbidmap.txt row: {row}', file=sys.stderr)
+
+        if mim_number not in gene_phenotypes:
+            gene_phenotypes[mim_number] = {
+                'gene_mim_number': mim_number,
+                'cyto_location': cyto_location,
+                'gene_symbols': gene_symbols,
+                'phenotype_associations': []
+            }
+        gene_phenotypes[mim_number]['phenotype_associations'].append({
+            'phenotype_mim_number': phenotype_mim_number,
+            'phenotype_label': phenotype_label,
+            'phenotype_mapping_info_key': association_key,
+            'phenotype_mapping_info_label': MAPPING_KEY_MEANINGS_PREVIOUS[association_key],
+        })
+    return gene_phenotypes
+
+
+def peak_memory(func: Callable) -> int:
+    """Peak memory allocated while running a function, in bytes, including what its result holds"""
+    tracemalloc.start()
+    result = func()
+    peak: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def run():
+    """Run benchmark"""
+    rows: List[MorbidMapRow] = list(read_mim_file_rows(DATA_DIR / 'morbidmap.txt', MorbidMapRow))
+    print(f'{len(rows)} rows')
+
+    previous, current = parse_morbid_map_previous(rows), parse_morbid_map(rows)
+    assert {gene: [(x['phenotype_mim_number'], x['phenotype_label'], x['phenotype_mapping_info_key'],
+        x['phenotype_mapping_info_label']) for x in d['phenotype_associations']] for gene, d in previous.items()} == \
+        {gene: [(x.phenotype_mim, x.phenotype_label, str(x.mapping_key), x.mapping_label)
+        for x in d['phenotype_associations']] for gene, d in current.items()}
+
+    results: Dict[str, float] = {}
+    for name, func in [('previous', parse_morbid_map_previous), ('current', parse_morbid_map)]:
+        results[name] = min(timeit.repeat(lambda: func(rows), number=1, repeat=N_REPEATS))
+        mem = peak_memory(lambda: func(rows))
+        print(f'{name:>8}: {results[name]:.3f}s ({results["previous"] / results[name]:.1f}x), '
+            f'peak memory {mem / 1e6:.1f} MB')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,168 @@
+"""Build cache: Lets a build reuse outputs of the previous build, in whole if no inputs have changed, or in part"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from omim2obo.config import ROOT_DIR
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+VERSION_LINE_PATTERN = re.compile(r'versionIRI|versionInfo')
+
+
+def hash_file(path: Union[str, Path], chunk_size: int = 1024 * 1024) -> Optional[str]:
+    """SHA-256 of a file's contents, or None if it doesn't exist"""
+    if not os.path.exists(path):
+        return None
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def get_tool_version(package_dir: Union[str, Path] = PACKAGE_DIR) -> str:
+    """Hash of the package's source code, so that any code change invalidates the build cache"""
+    sha = hashlib.sha256()
+    for path in sorted(Path(package_dir).rglob('*.py')):
+        sha.update(str(path.relative_to(package_dir)).encode() + b'\0')
+        sha.update(path.read_bytes() + b'\0')
+    return sha.hexdigest()
+
+
+def _relpath(path: Union[str, Path], root_dir: Union[str, Path]) -> str:
+    """Path as it is keyed in the manifest"""
+    return os.path.relpath(path, root_dir)
+
+
+def make_build_manifest(
+    inputs: List[Union[str, Path]], options: Dict, root_dir: Union[str, Path] = ROOT_DIR
+) -> Dict:
+    """Make a manifest of everything that determines the build's outputs: content hashes of inputs, the tool version,
+    and options that affect the output.
+
+    :param options: Must be JSON serializable.
+    """
+    return {
+        'tool_version': get_tool_version(),
+        'options': options,
+        'inputs': {_relpath(path, root_dir): hash_file(path) for path in inputs},
+    }
+
+
+def read_build_manifest(manifest_path: Union[str, Path]) -> Dict:
+    """Read the manifest saved by the previous build, or {} if there is none"""
+    try:
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_build_manifest(
+    manifest: Dict, outputs: List[Union[str, Path]], version_date: str, manifest_path: Union[str, Path],
+    root_dir: Union[str, Path] = ROOT_DIR,
+):
+    """Save the manifest of a finished build, along w/ hashes of its outputs and the date it was versioned with"""
+    manifest = {
+        **manifest,
+        'version_date': version_date,
+        'outputs': {_relpath(path, root_dir): hash_file(path) for path in outputs},
+    }
+    tmp_path = str(manifest_path) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def patch_version_date(path: Union[str, Path], old_date: str, new_date: str):
+    """Replace the date in the ontology's versionIRI and versionInfo.
+
+    Only lines w/ a versionIRI or versionInfo are touched, so this works for both Turtle and N-Triples output.
+    """
+    tmp_path = str(path) + '.tmp'
+    with open(path, 'r') as fin, open(tmp_path, 'w') as fout:
+        for line in fin:
+            if VERSION_LINE_PATTERN.search(line):
+                line = line.replace(f'/releases/{old_date}/', f'/releases/{new_date}/')\
+                    .replace(f'"{old_date}"', f'"{new_date}"')
+            fout.write(line)
+    os.replace(tmp_path, path)
+
+
+def reuse_previous_build(
+    manifest: Dict, outputs: List[Union[str, Path]], version_date: str, ontology_path: Union[str, Path],
+    manifest_path: Union[str, Path], root_dir: Union[str, Path] = ROOT_DIR,
+) -> bool:
+    """Reuse the previous build's outputs if its manifest matches, patching the ontology's version date.
+
+    :param ontology_path: The output that has a versionIRI and versionInfo.
+    :returns: False, w/out changing anything, if the previous build can't be reused: its inputs, tool version, or
+     options differed, or any of its outputs are missing or have since been modified.
+    """
+    previous: Dict = read_build_manifest(manifest_path)
+    if not previous or any(previous.get(k) != manifest[k] for k in ('tool_version', 'options', 'inputs')):
+        return False
+    previous_outputs: Dict[str, Optional[str]] = previous.get('outputs', {})
+    for path in outputs:
+        expected: Optional[str] = previous_outputs.get(_relpath(path, root_dir))
+        if expected is None or hash_file(path) != expected:
+            return False
+    if previous['version_date'] != version_date:
+        patch_version_date(ontology_path, previous['version_date'], version_date)
+    save_build_manifest(manifest, outputs, version_date, manifest_path, root_dir)
+    return True
+
+
+class BuildSegmentStore:
+    """Segments of a previous build's output: each MIM's own triples, as N-Triples, w/ a fingerprint of its inputs.
+
+    An incremental build recomputes only the segments whose fingerprint changed, and copies the rest from here. All
+    segments are discarded if the context they were built in, e.g. the code, has changed.
+
+    :param context: Identifies what, besides a MIM's own inputs, its triples depend on, e.g. the tool version.
+    """
+
+    def __init__(self, path: Union[str, Path], context: str):
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS segments (mim TEXT PRIMARY KEY, fingerprint TEXT, ntriples TEXT)')
+        previous_context = self.conn.execute("SELECT value FROM meta WHERE key = 'context'").fetchone()
+        if previous_context is None or previous_context[0] != context:
+            self.conn.execute('DELETE FROM segments')
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('context', ?)", (context,))
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_fingerprints(self) -> Dict[str, str]:
+        """Get fingerprint of each MIM's segment"""
+        return dict(self.conn.execute('SELECT mim, fingerprint FROM segments'))
+
+    def get_ntriples(self, mim: str) -> str:
+        """Get a MIM's segment"""
+        return self.conn.execute('SELECT ntriples FROM segments WHERE mim = ?', (mim,)).fetchone()[0]
+
+    def update(self, segments: Dict[str, Tuple[str, str]], mims: Set[str]):
+        """Save new segments, and delete those of MIMs no longer in the build
+
+        :param segments: (fingerprint, N-Triples), by MIM.
+        :param mims: All MIMs in the build.
+        """
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO segments VALUES (?, ?, ?)', [(k, *v) for k, v in segments.items()])
+            stale = [(mim,) for mim, in self.conn.execute('SELECT mim FROM segments') if mim not in mims]
+            self.conn.executemany('DELETE FROM segments WHERE mim = ?', stale)
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
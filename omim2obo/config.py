@@ -12,10 +12,15 @@ REVIEW_CASES_PATH = ROOT_DIR / 'review.tsv'
 DISEASE_GENE_EXCLUSIONS_PATH = DATA_DIR / 'exclusions-disease-gene.tsv'
 DISEASE_GENE_PROTECTED_PATH = DATA_DIR / 'protected-disease-gene.tsv'
 HGNC_DATA_PATH = DATA_DIR / 'hgnc' / 'hgnc_complete_set.txt'
+MONDO_OMIM_SSSOM_PATH = ROOT_DIR / 'mondo_exactmatch_omim.sssom.tsv'
 PUBMED_REFS_PATH = DATA_DIR / 'pubmed-refs.tsv'
 MAPPINGS_PATH = DATA_DIR / 'mappings.tsv'
 CACHE_LAST_UPDATED_PATH = DATA_DIR / 'cache-last-updated.txt'
 CACHE_INCOMPLETENESS_INDICATOR_PATH = DATA_DIR / 'initial-cache-incomplete.txt'
+CACHE_FETCH_JOURNAL_PATH = DATA_DIR / 'cache-fetch-journal.jsonl'
+CACHE_DB_PATH = DATA_DIR / 'entry-cache.db'
+BUILD_MANIFEST_PATH = DATA_DIR / 'build-manifest.json'
+BUILD_SEGMENTS_PATH = DATA_DIR / 'build-segments.db'
 
 with open(DATA_DIR / 'dipper/GLOBAL_TERMS.yaml') as file:
     GLOBAL_TERMS = yaml.safe_load(file)
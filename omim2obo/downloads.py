@@ -0,0 +1,201 @@
+"""Downloading of source files"""
+import filecmp
+import json
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import requests
+
+CHUNK_SIZE = 1024 * 1024
+OMIM_FILES = ('mimTitles.txt', 'genemap2.txt', 'mim2gene.txt', 'phenotypicSeries.txt', 'morbidmap.txt')
+HGNC_URL = 'https://storage.googleapis.com/public-download-files/hgnc/tsv/tsv/hgnc_complete_set.txt'
+MONDO_OMIM_SSSOM_URL = 'http://purl.obolibrary.org/obo/mondo/mappings/mondo_exactmatch_omim.sssom.tsv'
+LOG = logging.getLogger('omim2obo.downloads')
+
+
+@dataclass(frozen=True)
+class SourceFile:
+    """A file to download before the build starts
+
+    :param verify: Called w/ the path of the downloaded file before it is used. Should raise if it is not valid.
+    :param optional: If True, the build can do w/out the file, e.g. Mondo's OMIM SSSOM mappings.
+    """
+    url: str
+    path: Path
+    verify: Optional[Callable[[str], None]] = None
+    optional: bool = False
+
+
+def _meta_path(path: Union[str, Path]) -> str:
+    """Path of the metadata sidecar of a downloaded file"""
+    return str(path) + '.meta.json'
+
+
+def _read_meta(path: Union[str, Path]) -> Dict:
+    """Read the metadata sidecar of a downloaded file, or {} if there is none"""
+    try:
+        with open(_meta_path(path), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_meta(path: Union[str, Path], meta: Dict):
+    """Write the metadata sidecar of a downloaded file"""
+    tmp_path = _meta_path(path) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, _meta_path(path))
+
+
+def _validators(response: requests.Response) -> Dict[str, Optional[str]]:
+    """Headers by which the server can tell if a file has changed since the response"""
+    return {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+
+
+def download_file(
+    url: str, path: Union[str, Path], verify: Callable[[str], None] = None, session: requests.Session = None,
+    timeout=(10, 300), chunk_size: int = CHUNK_SIZE,
+) -> bool:
+    """Download a file, unless it is unchanged since the last download.
+
+    The ETag and Last-Modified of each download are saved in a sidecar, `<path>.meta.json`, and sent back as
+    If-None-Match / If-Modified-Since the next time. The body is streamed to `<path>.part`, which is renamed to `path`
+    only once complete and verified. If a download is interrupted, the next one resumes from the end of the .part file,
+    if the server still has the same version of the file.
+
+    :param verify: Called w/ the path of the complete .part file before it replaces `path`. Should raise if the file is
+     not valid.
+    :returns: True if the file was downloaded, False if it was unchanged.
+    """
+    session = session or requests
+    part_path = str(path) + '.part'
+    meta = _read_meta(path)
+    headers = {}
+    if os.path.exists(path) and meta.get('url') == url:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    partial: Dict = meta.get('partial', {})
+    resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if resume_from and partial.get('url') == url and (partial.get('etag') or partial.get('last_modified')):
+        headers['Range'] = f'bytes={resume_from}-'
+        headers['If-Range'] = partial.get('etag') or partial.get('last_modified')
+
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as resp:
+        if resp.status_code == 304:
+            return False
+        if resp.status_code not in (200, 206):
+            raise RuntimeError(f'Response from server for {url}: {resp.status_code} {resp.text}')
+        if resp.status_code == 200:
+            meta['partial'] = {'url': url, **_validators(resp)}
+            _write_meta(path, meta)
+        with open(part_path, 'ab' if resp.status_code == 206 else 'wb') as f:
+            for chunk in resp.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+        validators = meta['partial'] if resp.status_code == 206 else _validators(resp)
+
+    if verify:
+        try:
+            verify(part_path)
+        except Exception:
+            os.remove(part_path)
+            meta.pop('partial', None)
+            _write_meta(path, meta)
+            raise
+    os.replace(part_path, path)
+    _write_meta(path, {'url': url, 'etag': validators.get('etag'), 'last_modified': validators.get('last_modified')})
+    return True
+
+
+def verify_not_html(path: Union[str, Path]):
+    """Raise if a downloaded file is an HTML page, e.g. an error or login page, rather than the data file"""
+    with open(path, 'r', errors='replace') as f:
+        start = f.read(1000)
+    if start.lstrip().lower().startswith('<!doctype html'):
+        raise RuntimeError('Unexpected response: ' + start)
+
+
+def verify_hgnc(path: Union[str, Path], min_lines: int = 40000):
+    """Raise if a downloaded HGNC complete set is empty, truncated, or doesn't have the expected header"""
+    with open(path, 'r') as f:
+        header = f.readline()
+        n_lines = 1 + sum(1 for _ in f) if header else 0
+    if not n_lines:
+        raise RuntimeError(f'Downloaded file is empty: {path}')
+    if n_lines < min_lines:
+        raise RuntimeError(f'Downloaded file has only {n_lines} lines, expected at least {min_lines}: {path}')
+    if 'hgnc_id' not in header:
+        raise RuntimeError(f"Downloaded file doesn't have expected header: {path}")
+
+
+def verify_sssom(path: Union[str, Path]):
+    """Raise if a downloaded SSSOM TSV doesn't have a header w/ subject_id and object_id"""
+    verify_not_html(path)
+    with open(path, 'r') as f:
+        header = next((line for line in f if line.strip() and not line.startswith('#')), '').rstrip('\n').split('\t')
+    if 'subject_id' not in header or 'object_id' not in header:
+        raise RuntimeError(f"Downloaded file doesn't have expected SSSOM header: {path}")
+
+
+def copy_from_mirror(src: Union[str, Path], path: Union[str, Path], verify: Callable[[str], None] = None) -> bool:
+    """Copy a file from a local mirror, unless it is unchanged. Like download_file, but for offline use.
+
+    :returns: True if the file was copied, False if it was unchanged.
+    """
+    if os.path.exists(path) and filecmp.cmp(src, path, shallow=False):
+        return False
+    part_path = str(path) + '.part'
+    shutil.copyfile(src, part_path)
+    if verify:
+        try:
+            verify(part_path)
+        except Exception:
+            os.remove(part_path)
+            raise
+    os.replace(part_path, path)
+    return True
+
+
+def prefetch(
+    sources: List[SourceFile], mirror_dir: Union[str, Path] = None, max_workers: int = 8, allow_optional_missing=False,
+) -> Dict[Path, bool]:
+    """Download all source files concurrently, verifying each.
+
+    :param mirror_dir: If given, files are copied from here instead of downloaded. Each is looked up by the file name
+     of its `path`.
+    :param allow_optional_missing: If True, optional sources that can't be fetched are only warned about, and left out
+     of the result.
+    :returns: Whether each file changed, by path.
+    :raises RuntimeError: If any file could not be fetched or verified, other than optional ones w/
+     allow_optional_missing. Files that could be are kept.
+    """
+    def fetch(source: SourceFile) -> bool:
+        """Fetch a single file"""
+        os.makedirs(Path(source.path).parent, exist_ok=True)
+        if mirror_dir:
+            return copy_from_mirror(Path(mirror_dir) / Path(source.path).name, source.path, source.verify)
+        with requests.Session() as session:
+            return download_file(source.url, source.path, source.verify, session)
+
+    changed: Dict[Path, bool] = {}
+    errors: List[str] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {source: executor.submit(fetch, source) for source in sources}
+        for source, future in futures.items():
+            try:
+                changed[source.path] = future.result()
+            except Exception as err:
+                if source.optional and allow_optional_missing:
+                    LOG.warning(f'Failed to fetch optional source file {Path(source.path).name}: {err}')
+                else:
+                    errors.append(f'{Path(source.path).name}: {err}')
+    if errors:
+        raise RuntimeError('Failed to fetch source files:\n' + '\n'.join(errors))
+    return changed
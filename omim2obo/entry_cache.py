@@ -0,0 +1,225 @@
+"""Cache of MIM entries fetched from the OMIM API"""
+import csv
+import json
+import os
+import sqlite3
+import zlib
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, Union
+from pathlib import Path
+
+from omim2obo.build_cache import hash_file
+
+try:
+    import zstandard
+except ImportError:  # optional dependency: zlib is used instead
+    zstandard = None
+
+# CACHE_TABLES: Columns of each table in EntryCacheDb, in the same order as in the TSV that is exported from it
+CACHE_TABLES = {
+    'mappings': ['mim', 'is_phenotype', 'date_fetched', 'umls_ids', 'orphanet_ids'],
+    'pubmed_refs': ['mim', 'is_phenotype', 'date_fetched', 'pmid_refs'],
+}
+
+
+class FetchJournal:
+    """Append-only journal of entries fetched from the OMIM API, so that a fetch that stops part way can be resumed.
+
+    Each entry is appended as a line of JSON as soon as it is received, and flushed to disk at the end of each batch.
+    If the process is interrupted, e.g. by the rate limit or an error, the next run replays the journal instead of
+    fetching those entries again. Once fetched data has been saved to the cache, the journal is cleared.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = path
+
+    def read(self) -> List[Dict]:
+        """Read entries from the journal. Skips a trailing partial line, e.g. if the process died mid-write."""
+        if not os.path.exists(self.path):
+            return []
+        entries: List[Dict] = []
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        return entries
+
+    def record(self, entries: Iterable[Dict], batch_size: int = 20) -> Iterator[Dict]:
+        """Append entries to the journal as they are iterated"""
+        with open(self.path, 'a') as f:
+            for i, entry in enumerate(entries, 1):
+                f.write(json.dumps(entry) + '\n')
+                if i % batch_size == 0:
+                    f.flush()
+                    os.fsync(f.fileno())
+                yield entry
+
+    def clear(self):
+        """Delete the journal"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class EntryCacheDb:
+    """SQLite store of data cached from OMIM API entries, w/ a table per cache TSV, keyed by MIM.
+
+    Whole entries, as returned by the API, can also be stored (compressed JSON) in the raw_entries table. Cache tables,
+    or tables for any other fields, can then be rebuilt from them w/out fetching again.
+
+    Rows are upserted, so a refresh only writes the MIMs whose data changed. The TSVs (e.g. mappings.tsv), which are
+    the committed artefacts, are exported from it, but only if rows changed. If a TSV's contents have changed since it
+    was last imported or exported (e.g. a newer version was pulled), its table is re-imported from it, so the TSVs
+    remain the source of truth. A TSV whose modification time changed but whose contents didn't, e.g. on a fresh
+    checkout, is hashed but not re-imported.
+
+    Trade-offs: The database is not committed, so the first sync after it is created (e.g. on a fresh CI checkout)
+    imports whole TSVs. And since a TSV is sorted by MIM, when any of its rows changed, it is rewritten as a whole.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.conn = sqlite3.connect(path)
+        for table, cols in CACHE_TABLES.items():
+            col_defs = ', '.join(['mim TEXT PRIMARY KEY', 'is_phenotype INTEGER'] + [f'{c} TEXT' for c in cols[2:]])
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({col_defs})')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS tsv_hashes (table_name TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, '
+            'sha256 TEXT, rows_changed INTEGER)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS raw_entries (mim TEXT PRIMARY KEY, date_fetched TEXT, codec TEXT, data BLOB)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS raw_entries_date_fetched ON raw_entries (date_fetched)')
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close database connection"""
+        self.conn.close()
+
+    def _record_tsv_hash(self, table: str, path: Union[str, Path], sha256: str = None):
+        """Save content hash, size, & modification time of a TSV that the table was just synced with, to detect later
+        changes to either"""
+        stat = os.stat(path)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO tsv_hashes VALUES (?, ?, ?, ?, 0)',
+            (table, stat.st_size, stat.st_mtime_ns, sha256 or hash_file(path)))
+        self.conn.commit()
+
+    def sync_from_tsv(self, table: str, path: Union[str, Path]) -> bool:
+        """Re-import table from TSV, if the TSV exists and its contents changed since it was last imported or exported
+
+        The TSV is only hashed if its size or modification time changed.
+
+        :returns: True if the table was re-imported.
+        """
+        if not os.path.exists(path):
+            return False
+        stat = os.stat(path)
+        recorded = self.conn.execute(
+            'SELECT size, mtime, sha256 FROM tsv_hashes WHERE table_name = ?', (table,)).fetchone()
+        if recorded and recorded[:2] == (stat.st_size, stat.st_mtime_ns):
+            return False
+        sha256: str = hash_file(path)
+        if recorded and recorded[2] == sha256:
+            self.conn.execute(
+                'UPDATE tsv_hashes SET size = ?, mtime = ? WHERE table_name = ?',
+                (stat.st_size, stat.st_mtime_ns, table))
+            self.conn.commit()
+            return False
+        self.conn.execute(f'DELETE FROM {table}')
+        with open(path, 'r', newline='') as f:
+            self.upsert(table, csv.DictReader(f, delimiter='\t'))
+        self._record_tsv_hash(table, path, sha256)
+        return True
+
+    def clear(self):
+        """Delete all rows, except for raw entries"""
+        for table in CACHE_TABLES:
+            self.conn.execute(f'DELETE FROM {table}')
+        self.conn.execute('DELETE FROM tsv_hashes')
+        self.conn.commit()
+
+    def get_mims(self, table: str) -> Set[str]:
+        """Get MIMs in table"""
+        return set(x[0] for x in self.conn.execute(f'SELECT mim FROM {table}'))
+
+    def upsert(self, table: str, rows: Iterable[Dict]) -> int:
+        """Insert rows, replacing any existing rows for the same MIMs. Existing rows w/ the same data are left as is.
+
+        :param rows: Dicts w/ the table's columns. is_phenotype can be a bool, or 'True' / 'False' as read from a TSV.
+        :returns: Number of rows inserted or changed.
+        """
+        cols: List[str] = CACHE_TABLES[table]
+        total_changes_before: int = self.conn.total_changes
+        self.conn.executemany(
+            f'INSERT INTO {table} ({", ".join(cols)}) VALUES ({", ".join("?" for _ in cols)}) '
+            f'ON CONFLICT (mim) DO UPDATE SET {", ".join(f"{c} = excluded.{c}" for c in cols[1:])} '
+            f'WHERE {" OR ".join(f"{c} IS NOT excluded.{c}" for c in cols[1:])}',
+            ([row['mim'], row['is_phenotype'] in (True, 'True')] + [row[c] or '' for c in cols[2:]] for row in rows))
+        n_changed: int = self.conn.total_changes - total_changes_before
+        if n_changed:
+            self.conn.execute('UPDATE tsv_hashes SET rows_changed = 1 WHERE table_name = ?', (table,))
+        self.conn.commit()
+        return n_changed
+
+    def export_tsv(self, table: str, path: Union[str, Path]) -> bool:
+        """Write table to TSV, sorted by MIM, if rows changed since it was last imported or exported, or there's no TSV
+
+        :returns: True if the TSV was written.
+        """
+        recorded = self.conn.execute('SELECT rows_changed FROM tsv_hashes WHERE table_name = ?', (table,)).fetchone()
+        if recorded and not recorded[0] and os.path.exists(path):
+            return False
+        cols: List[str] = CACHE_TABLES[table]
+        tmp_path = str(path) + '.tmp'
+        with open(tmp_path, 'w', newline='') as f:
+            writer = csv.writer(f, delimiter='\t', lineterminator='\n')
+            writer.writerow(cols)
+            for row in self.conn.execute(f'SELECT {", ".join(cols)} FROM {table} ORDER BY mim'):
+                writer.writerow([row[0], 'True' if row[1] else 'False', *row[2:]])
+        os.replace(tmp_path, path)
+        self._record_tsv_hash(table, path)
+        return True
+
+    def upsert_raw_entries(self, entries: Iterable[Dict], date_fetched: str):
+        """Insert whole entries, replacing any existing entries for the same MIMs"""
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO raw_entries VALUES (?, ?, ?, ?)',
+            ((str(entry['mimNumber']), date_fetched, *compress_json(entry)) for entry in entries))
+        self.conn.commit()
+
+    def iter_raw_entries(self, since_date: str = None) -> Iterator[Tuple[Dict, str]]:
+        """Get stored whole entries, and their date_fetched, ordered by MIM
+
+        :param since_date: If given, only entries fetched on or after this date (YYYY-MM-DD)
+        """
+        query = 'SELECT date_fetched, codec, data FROM raw_entries' + \
+            (' WHERE date_fetched >= ?' if since_date else '') + ' ORDER BY mim'
+        for date_fetched, codec, data in self.conn.execute(query, (since_date,) if since_date else ()):
+            yield decompress_json(codec, data), date_fetched
+
+
+def compress_json(obj: Union[Dict, List]) -> Tuple[str, bytes]:
+    """Serialize & compress JSON. Uses zstandard if installed, else zlib.
+
+    :returns: Codec name, and compressed bytes
+    """
+    data = json.dumps(obj, separators=(',', ':')).encode()
+    if zstandard:
+        return 'zstd', zstandard.ZstdCompressor().compress(data)
+    return 'zlib', zlib.compress(data)
+
+
+def decompress_json(codec: str, data: bytes) -> Union[Dict, List]:
+    """Decompress & deserialize JSON compressed by compress_json()"""
+    if codec == 'zstd':
+        if not zstandard:
+            raise RuntimeError('Raw entry was compressed w/ zstandard, which is not installed. Install: zstandard')
+        data = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        data = zlib.decompress(data)
+    return json.loads(data)
@@ -20,6 +20,38 @@ def get_parser():
         action='store_true',
         help='Use cache instead of downloading sources')
 
+    parser.add_argument(
+        '-s', '--triple-sink',
+        choices=['graph', 'ntriples'],
+        default='graph',
+        help='Where triples are collected. "graph" (default) builds an rdflib Graph and serializes it as Turtle. '
+             '"ntriples" writes each triple straight to omim.ttl as N-Triples (also valid Turtle), which uses much '
+             'less memory, but output is not grouped by subject.')
+
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=1,
+        help='Number of processes to use for cleaning MIM titles & symbols. Default 1 (no extra processes). Output is '
+             'the same regardless of the number of workers.')
+
+    parser.add_argument(
+        '-m', '--mirror',
+        help='Directory to copy source files from instead of downloading them, e.g. for offline tests. Files are '
+             'looked up by name, e.g. mimTitles.txt, hgnc_complete_set.txt, mondo_exactmatch_omim.sssom.tsv.')
+
+    parser.add_argument(
+        '-f', '--force',
+        action='store_true',
+        help='Rebuild even if the inputs and code are unchanged since the previous build. By default, the previous '
+             'build\'s outputs are reused in that case, w/ only the version date in omim.ttl updated.')
+
+    parser.add_argument(
+        '-i', '--incremental',
+        action='store_true',
+        help='Only recompute triples of MIMs whose inputs changed since the previous incremental build. Output is '
+             'N-Triples, as with "--triple-sink ntriples".')
+
     # out_help = ('Path to save output file. If not present, same directory of'
     #             'any input files passed will be used.')
     # parser.add_argument('-o', '--outpath', help=out_help)
@@ -39,7 +71,9 @@ def cli():
     """
     parser = get_parser()
     kwargs = parser.parse_args()
-    omim2obo(use_cache=kwargs.use_cache)
+    omim2obo(
+        use_cache=kwargs.use_cache, triple_sink=kwargs.triple_sink, workers=kwargs.workers, mirror_dir=kwargs.mirror,
+        force=kwargs.force, incremental=kwargs.incremental)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command Line Interface: Download a single source file."""
+from argparse import ArgumentParser
+from typing import Dict
+
+from omim2obo.downloads import download_file, verify_hgnc, verify_not_html, verify_sssom
+
+
+VERIFIERS = {'not-html': verify_not_html, 'hgnc': verify_hgnc, 'sssom': verify_sssom}
+
+
+def cli():
+    """Command line interface."""
+    parser = ArgumentParser(
+        prog='omim2obo-download',
+        description='Download a source file, unless it is unchanged since the last download, and verify it.')
+    parser.add_argument('url', help='URL of the file.')
+    parser.add_argument('-o', '--outpath', required=True, help='Path to save the file.')
+    parser.add_argument('-v', '--verify', choices=list(VERIFIERS), help='Check that the file is of this kind.')
+    d: Dict = vars(parser.parse_args())
+    download_file(d['url'], d['outpath'], VERIFIERS.get(d['verify']))
+
+
+if __name__ == '__main__':
+    cli()
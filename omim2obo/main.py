@@ -45,37 +45,75 @@ Steps
 - Parses: hgnc/hgnc_complete_set.txt: mappings between  HGNC symbols and IDs. Get HGNC symbol::id mappings.
 
 todo's
- - Downloads should all happen at beginning of script
  - This is last updated 4/2022 and now does not fully describe everything that happens.
  - Codestyle: Namespace prop access should be consistenly NAMESPACE.prop or NAMESPACE['prop'] (choose one)
 
 Assumptions
 1. Mappings obtained from official OMIM files as described above are interpreted correctly (e.g. skos:exactMatch).
 """
-from typing import Optional, Set
+from typing import NamedTuple, Optional, Set
 
 import yaml
 from hashlib import md5
 
 import os
 import csv
+import itertools
+import json
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime
 from os import makedirs
 
 
 from rdflib import Graph, RDF, OWL, RDFS, Literal, BNode, URIRef, SKOS
 from rdflib.term import Identifier
 
-from omim2obo.config import REVIEW_CASES_PATH, ROOT_DIR, GLOBAL_TERMS
+from omim2obo.build_cache import BuildSegmentStore, get_tool_version, hash_file, make_build_manifest, \
+    reuse_previous_build, save_build_manifest
+from omim2obo.config import BUILD_MANIFEST_PATH, BUILD_SEGMENTS_PATH, DISEASE_GENE_EXCLUSIONS_PATH, \
+    MONDO_OMIM_SSSOM_PATH, REVIEW_CASES_PATH, ROOT_DIR, GLOBAL_TERMS
 from omim2obo.namespaces import *
-from omim2obo.parsers.omim_entry_parser import REVIEW_CASES, cleanup_title, get_alt_and_included_titles_and_symbols, \
-    get_pubs, get_mapped_ids, log_review_cases, recapitalize_acronyms_in_titles
+from omim2obo.parsers.omim_entry_parser import REVIEW_CASES, cleanup_title, get_abbrev_lookup, get_pubs, \
+    get_mapped_ids, log_review_cases, recapitalize_acronyms_in_titles, separate_and_clean_titles_and_symbols
 from omim2obo.parsers.omim_txt_parser import *  # todo: change to specific imports
+from omim2obo.triple_sinks import NTriplesBuffer, NTriplesSink, TripleSink
 from omim2obo.utils.utils import get_d2g_exclusions_by_curator, get_d2g_protected, get_protected_mondo_mappings
 
 # Vars
 OUTPATH = os.path.join(ROOT_DIR / 'omim.ttl')
+SUSCEPTIBILITY_OUTPATH = Path('mondo-omim-susceptibility-subset.robot.tsv')
+# - BUILD_INPUTS: Files that the build's outputs are derived from. If none have changed, nor the code, a build reuses
+#   the previous build's outputs.
+BUILD_INPUTS = [
+    *[DATA_DIR / x for x in OMIM_FILES], HGNC_DATA_PATH, MONDO_OMIM_SSSOM_PATH, DISEASE_GENE_PROTECTED_PATH,
+    DISEASE_GENE_EXCLUSIONS_PATH, PUBMED_REFS_PATH, MAPPINGS_PATH, DATA_DIR / 'known_capitalizations.tsv',
+    DATA_DIR / 'dipper/GLOBAL_TERMS.yaml', DATA_DIR / 'dipper/curie_map.yaml']
+# - Cleaned titles & symbols for a MIM. See: get_cleaned_titles_and_symbols()
+CleanedTitlesAndSymbols = Tuple[str, List[str], List[str], List[str], List[str], List[str], List[str], List[str],
+    List[str], List[str]]
+# - CACHED_ID_PREDICATES: Predicate & object namespace for each field of cached API data. IAO:0000142: 'mentions'
+CACHED_ID_PREDICATES = {
+    'pmid_refs': (IAO['0000142'], PMID),
+    'umls_ids': (SKOS.exactMatch, UMLS),
+    'orphanet_ids': (SKOS.exactMatch, ORPHANET),
+}
+
+
+class MimInputs(NamedTuple):
+    """Everything that a MIM's own triples are derived from. See: add_mim_triples()
+
+    :param cached_ids: (field, ID) pairs from cached API data. See: CACHED_ID_PREDICATES
+    """
+    record: Optional[MimTitleRecord]
+    replaced_by: List[str]
+    gene_entrez_id: Optional[str]
+    pheno_entrez_id: Optional[str]
+    hgnc_symbol: Optional[str]
+    hgnc_id: Optional[str]
+    cached_ids: List[Tuple[str, str]]
 
 # Logging
 LOG = logging.getLogger(__name__)
@@ -118,7 +156,7 @@ def get_curie_maps():
 
 
 def add_axiom_annotations(
-    graph: Graph, source: URIRef, prop: URIRef, target: Union[Literal, str, URIRef],
+    graph: Union[Graph, TripleSink], source: URIRef, prop: URIRef, target: Union[Literal, str, URIRef],
     anno_pred_vals: List[Tuple[URIRef, Union[Literal, str, URIRef]]]
 ):
     """Add an axiom annotation to the graph."""
@@ -135,7 +173,7 @@ def add_axiom_annotations(
 
 
 def add_triple_and_optional_annotations(
-    graph: Graph, source: URIRef, prop: URIRef, target: Union[Literal, str, URIRef],
+    graph: Union[Graph, TripleSink], source: URIRef, prop: URIRef, target: Union[Literal, str, URIRef],
     anno_pred_vals: List[Tuple[URIRef, Union[Literal, str, URIRef]]] = None
 ):
     """Add a triple and optional annotations to the graph."""
@@ -146,7 +184,9 @@ def add_triple_and_optional_annotations(
         add_axiom_annotations(graph, source, prop, target, anno_pred_vals)
 
 
-def add_subclassof_restriction(graph: Graph, predicate: URIRef, some_values_from: URIRef, on: URIRef) -> BNode:
+def add_subclassof_restriction(
+    graph: Union[Graph, TripleSink], predicate: URIRef, some_values_from: URIRef, on: URIRef
+) -> BNode:
     """Creates a subClassOf someValuesFrom restriction"""
     b = BNode()
     graph.add((b, RDF['type'], OWL['Restriction']))
@@ -157,8 +197,8 @@ def add_subclassof_restriction(graph: Graph, predicate: URIRef, some_values_from
 
 
 def add_subclassof_restriction_with_evidence_and_source(
-    graph: Graph, predicate: URIRef, some_values_from: URIRef, on: URIRef, evidence: Union[str, Literal],
-    source: Optional[URIRef] = None,
+    graph: Union[Graph, TripleSink], predicate: URIRef, some_values_from: URIRef, on: URIRef,
+    evidence: Union[str, Literal], source: Optional[URIRef] = None,
 ):
     """Creates a subClassOf someValuesFrom restriction, and adds an evidence axiom to it."""
     evidence = Literal(evidence) if type(evidence) is str else evidence
@@ -174,6 +214,227 @@ def add_subclassof_restriction_with_evidence_and_source(
     add_axiom_annotations(graph, on, RDFS['subClassOf'], b, annotation_pred_vals)
 
 
+def serialize_turtle(graph: Graph, outpath: Union[str, Path]):
+    """Serialize graph to a Turtle file, writing each subject block to the file handle as it goes.
+
+    Calling graph.serialize(format='turtle') w/out a destination builds the whole document in memory, once as bytes and
+    again as a str, before anything can be written. Passing the file handle instead streams the output, w/ the same
+    prefixes and deterministic subject ordering.
+    """
+    with open(outpath, 'wb') as f:
+        graph.serialize(destination=f, format='turtle', encoding='utf-8')
+
+
+def get_cleaned_titles_and_symbols(record: MimTitleRecord) -> CleanedTitlesAndSymbols:
+    """Clean a MIM's titles and symbols, and recapitalize acronyms in its titles
+
+    Pure function of the record, so that it can be run in worker processes.
+
+    :returns: pref_title, pref_symbols, alt_titles, alt_symbols, former_alt_titles, former_alt_symbols,
+     included_titles, included_symbols, former_included_titles, former_included_symbols
+    """
+    # Parse titles & symbols
+    pref_title, pref_symbols = cleanup_title(record.pref_title), list(record.pref_symbols)
+    alt_titles, alt_symbols, former_alt_titles, former_alt_symbols = \
+        separate_and_clean_titles_and_symbols(record.alt_titles, record.alt_symbols)
+    included_titles, included_symbols, former_included_titles, former_included_symbols = \
+        separate_and_clean_titles_and_symbols(record.included_titles, record.included_symbols)
+
+    # Recapitalize acronyms in titles
+    # - all_abbrevs: lowercased -> original. Built once and shared by all of this MIM's titles.
+    all_abbrevs: Dict[str, str] = get_abbrev_lookup(
+        pref_symbols + alt_symbols + former_alt_symbols + included_symbols + former_included_symbols)
+    # todo: consider DRYing to 1 call by passing all 5 title types to a wrapper function
+    pref_title = recapitalize_acronyms_in_titles(pref_title, all_abbrevs)
+    alt_titles = recapitalize_acronyms_in_titles(alt_titles, all_abbrevs)
+    former_alt_titles = recapitalize_acronyms_in_titles(former_alt_titles, all_abbrevs)
+    included_titles = recapitalize_acronyms_in_titles(included_titles, all_abbrevs)
+    former_included_titles = recapitalize_acronyms_in_titles(former_included_titles, all_abbrevs)
+
+    return pref_title, pref_symbols, alt_titles, alt_symbols, former_alt_titles, former_alt_symbols, \
+        included_titles, included_symbols, former_included_titles, former_included_symbols
+
+
+def get_cleaned_titles_and_symbols_by_mim(
+    records: Dict[str, MimTitleRecord], workers: int = 1, chunksize: int = 500
+) -> Dict[str, CleanedTitlesAndSymbols]:
+    """Run get_cleaned_titles_and_symbols() for each MIM, optionally fanned out over a process pool
+
+    Results are collected in the same order as `records`, so output is the same regardless of the number of workers.
+
+    :param workers: Number of worker processes. If 1, runs in this process.
+    :param chunksize: Number of MIMs sent to a worker at a time.
+    """
+    if workers <= 1:
+        return {mim: get_cleaned_titles_and_symbols(record) for mim, record in records.items()}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(get_cleaned_titles_and_symbols, records.values(), chunksize=chunksize)
+        return dict(zip(records.keys(), results))
+
+
+def add_mim_title_triples(
+    graph: Union[Graph, TripleSink], omim_uri: URIRef, record: MimTitleRecord, replaced_by: List[str],
+    cleaned: Optional[CleanedTitlesAndSymbols],
+):
+    """Add a MIM's class, type-dependent, label, synonym, and 'included' triples, from its mimTitles.txt row
+
+    :param replaced_by: MIMs that a deprecated MIM was replaced by.
+    :param cleaned: The MIM's cleaned titles & symbols. Not used, and can be None, if it is deprecated & replaced.
+    """
+    omim_type: OmimType = record.omim_type
+    graph.add((omim_uri, RDF.type, OWL.Class))
+
+    # - Deprecated classes
+    if omim_type == OmimType.OBSOLETE:
+        graph.add((omim_uri, OWL.deprecated, Literal(True)))
+        if replaced_by:
+            if len(replaced_by) == 1:
+                # IAO:0100001 means: "term replaced by"
+                graph.add((omim_uri, IAO['0100001'], OMIM[replaced_by[0]]))
+            elif len(replaced_by) > 1:
+                for replaced_mim_num in replaced_by:
+                    graph.add((omim_uri, oboInOwl.consider, OMIM[replaced_mim_num]))
+            return
+
+    # - Non-deprecated
+    pref_title, pref_symbols, alt_titles, alt_symbols, former_alt_titles, former_alt_symbols, included_titles, \
+        included_symbols, former_included_titles, former_included_symbols = cleaned
+    included_is_included = included_titles or included_symbols  # redundant. can't be included symbol w/out title
+
+    # Special cases depending on OMIM term type
+    is_gene = omim_type == OmimType.GENE or omim_type == OmimType.HAS_AFFECTED_FEATURE
+    if omim_type == OmimType.HERITABLE_PHENOTYPIC_MARKER:  # '%' char
+        graph.add((omim_uri, BIOLINK['category'], BIOLINK['Disease']))
+    elif is_gene:  # Represented by: * or + chars
+        graph.add((omim_uri, RDFS.subClassOf, SO['0000704']))  # gene
+        graph.add((omim_uri, MONDO.exclusionReason, MONDO.nonDisease))
+        graph.add((omim_uri, BIOLINK['category'], BIOLINK['Gene']))
+    elif omim_type == OmimType.PHENOTYPE:  # '#' char
+        graph.add((omim_uri, BIOLINK['category'], BIOLINK['Disease']))  # phenotype ~= disease
+    elif omim_type == OmimType.SUSPECTED:  # NULL
+        graph.add((omim_uri, MONDO.exclusionReason, MONDO.excludeTrait))
+
+    # Alternative rdfs:label for genes
+    if is_gene and pref_symbols:
+        gene_label_err = 'Warning: Only 1 symbol picked for label for gene term, but there were 2 to choose ' \
+             f'from. Unsure which is best. Picking the first.\n{omim_uri} - {pref_symbols}'
+        if len(pref_symbols) > 1:
+            LOG.warning(gene_label_err)  # todo: rare (n=1?), but decide the best way to handle these situations
+        graph.add((omim_uri, RDFS.label, Literal(pref_symbols[0])))
+    else:
+        graph.add((omim_uri, RDFS.label, Literal(pref_title)))
+
+    # Add synonyms
+    # - exact titles
+    graph.add((omim_uri, oboInOwl.hasExactSynonym, Literal(pref_title)))
+    for title in alt_titles:
+        graph.add((omim_uri, oboInOwl.hasExactSynonym, Literal(title)))
+    # - exact abbreviations
+    for abbrevs in [pref_symbols, alt_symbols]:
+        for abbreviation in abbrevs:
+            add_triple_and_optional_annotations(graph, omim_uri, oboInOwl.hasExactSynonym, abbreviation,
+                [(oboInOwl.hasSynonymType, OMO['0003000'])])
+    # - related, deprecated 'former' titles
+    for title in former_alt_titles:
+        add_triple_and_optional_annotations(graph, omim_uri, oboInOwl.hasRelatedSynonym, title,
+            [(OWL.deprecated, Literal(True))])
+    # - related, deprecated 'former' abbreviations
+    for abbreviation in former_alt_symbols:
+        add_triple_and_optional_annotations(graph, omim_uri, oboInOwl.hasRelatedSynonym, abbreviation,
+            [(OWL.deprecated, Literal(True)), (oboInOwl.hasSynonymType, OMO['0003000'])])
+
+    # Add 'included' entries
+    # - comment
+    if included_is_included:
+        included_comment = "This term has one or more labels that end with ', INCLUDED'."
+        graph.add((omim_uri, RDFS['comment'], Literal(included_comment)))
+    # - titles
+    for title in included_titles:
+        graph.add((omim_uri, URIRef(MONDONS.omim_included), Literal(title)))
+    # - symbols
+    for symbol in included_symbols:
+        add_triple_and_optional_annotations(graph, omim_uri, URIRef(MONDONS.omim_included), symbol, [
+            # Though these are abbreviations, MONDONS.omim_included is not a synonym type, so can't add axiom:
+            # (oboInOwl.hasSynonymType, OMO['0003000'])
+        ])
+    # - deprecated, 'former'
+    for title in former_included_titles:
+        add_triple_and_optional_annotations(graph, omim_uri, URIRef(MONDONS.omim_included), title,
+            [(OWL.deprecated, Literal(True))])
+    for symbol in former_included_symbols:
+        add_triple_and_optional_annotations(graph, omim_uri, URIRef(MONDONS.omim_included), symbol, [
+            (OWL.deprecated, Literal(True)),
+            # Though these are abbreviations, MONDONS.omim_included is not a synonym type, so can't add axiom:
+            # (oboInOwl.hasSynonymType, OMO['0003000'])
+        ])
+
+
+def get_mim_inputs(
+    omim_type_and_titles: Dict[str, MimTitleRecord], omim_replaced: Dict[str, List[str]], gene_map: Dict[str, str],
+    pheno_map: Dict[str, str], hgnc_map: Dict[str, str], hgnc_symbol_id_map: Dict[str, str],
+    pubmed_links_df: pd.DataFrame, mappings_df: pd.DataFrame,
+) -> Dict[str, MimInputs]:
+    """Collect the inputs of each MIM's own triples, from the parsed source files
+
+    MIMs are ordered as in mimTitles.txt, followed by any that are only in other sources.
+    """
+    cached_ids: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+    for df, fields in [(pubmed_links_df, ['pmid_refs']), (mappings_df, ['umls_ids', 'orphanet_ids'])]:
+        for field in fields:
+            for mim, ids_str in zip(df['mim'], df[field]):
+                for _id in (str(ids_str).split('|') if ids_str else []):
+                    cached_ids[str(mim)].append((field, _id))
+    mims: Dict[str, None] = dict.fromkeys(
+        itertools.chain(omim_type_and_titles, gene_map, pheno_map, hgnc_map, cached_ids))
+    return {mim: MimInputs(
+        record=omim_type_and_titles.get(mim),
+        replaced_by=omim_replaced.get(mim, []),
+        gene_entrez_id=gene_map.get(mim),
+        pheno_entrez_id=pheno_map.get(mim),
+        hgnc_symbol=hgnc_map.get(mim),
+        hgnc_id=hgnc_symbol_id_map.get(hgnc_map[mim]) if mim in hgnc_map else None,
+        cached_ids=cached_ids.get(mim, []),
+    ) for mim in mims}
+
+
+def get_mim_inputs_fingerprint(inputs: MimInputs) -> str:
+    """Hash of a MIM's inputs. If it is the same as in a previous build, so are the MIM's own triples."""
+    record = inputs.record
+    record_fields = None if record is None else \
+        [record.omim_type.name] + [getattr(record, x) for x in MimTitleRecord.__slots__[1:]]
+    return md5(json.dumps([record_fields, *inputs[1:]]).encode()).hexdigest()
+
+
+def needs_cleaning(inputs: MimInputs) -> bool:
+    """Whether a MIM's titles & symbols are used, i.e. it has a mimTitles.txt row and isn't deprecated & replaced"""
+    return inputs.record is not None and not (inputs.record.omim_type == OmimType.OBSOLETE and inputs.replaced_by)
+
+
+def add_mim_triples(
+    graph: Union[Graph, TripleSink], omim_id: str, inputs: MimInputs, cleaned: Optional[CleanedTitlesAndSymbols]
+):
+    """Add a MIM's own triples: those that depend only on its MimInputs, rather than on shared gene-disease logic"""
+    omim_uri = OMIM[omim_id]
+    # Titles & symbols
+    if inputs.record is not None:
+        add_mim_title_triples(graph, omim_uri, inputs.record, inputs.replaced_by, cleaned)
+    # Gene IDs
+    # - Why is 'skos:exactMatch' appropriate for disease::gene relationships? - joeflack4 2022/06/06
+    if inputs.gene_entrez_id:
+        graph.add((omim_uri, SKOS.exactMatch, NCBIGENE[inputs.gene_entrez_id]))
+    if inputs.pheno_entrez_id:
+        # RO['0002200'] = 'has phenotype'
+        add_subclassof_restriction(graph, RO['0002200'], omim_uri, NCBIGENE[inputs.pheno_entrez_id])
+    if inputs.hgnc_symbol:
+        graph.add((omim_uri, SKOS.exactMatch, HGNC_symbol[inputs.hgnc_symbol]))
+        if inputs.hgnc_id:
+            graph.add((omim_uri, SKOS.exactMatch, HGNC[inputs.hgnc_id]))
+    # PubMed refs, UMLS mappings, Orphanet mappings
+    for field, _id in inputs.cached_ids:
+        pred, obj_ns = CACHED_ID_PREDICATES[field]
+        graph.add((omim_uri, pred, obj_ns[_id]))
+
+
 # Classes
 class DeterministicBNode(BNode):
     """Overrides BNode to create a deterministic ID"""
@@ -186,7 +447,9 @@ class DeterministicBNode(BNode):
         return Identifier.__new__(cls, _id)
 
 
-def add_gene_disease_associations(graph: Graph, gene_mim: str, p_mim: str, evidence: str, orcid: str = None):
+def add_gene_disease_associations(
+    graph: Union[Graph, TripleSink], gene_mim: str, p_mim: str, evidence: str, orcid: str = None
+):
     """Add gene-disease associations in both directions."""
     # Add restrictions: Disease-defining ('causal germline mutation')
     # - Disease --(RO:0004003 'has material basis in germline mutation in')--> Gene
@@ -224,308 +487,243 @@ CONFIG = {
 
 
 # Main
-def omim2obo(use_cache: bool = False):
-    """Run program"""
-    graph = OmimGraph.get_graph()
-    download_files_tf: bool = not use_cache
-
-    mondo_omim_sssom_path = Path("mondo_exactmatch_omim.sssom.tsv")
-    omim_to_mondo = load_omim_to_mondo_from_sssom(mondo_omim_sssom_path)
-    susceptibility_rows = set()
-
-    # Populate prefixes
-    for prefix, uri in CURIE_MAP.items():
-        graph.namespace_manager.bind(prefix, URIRef(uri))
-
+def omim2obo(
+    use_cache: bool = False, triple_sink: str = 'graph', workers: int = 1, mirror_dir: Optional[str] = None,
+    force: bool = False, incremental: bool = False,
+):
+    """Run program
+
+    :param use_cache: If True, source files from previous runs are used instead of downloaded. Only those that are
+     missing are downloaded.
+    :param triple_sink: 'graph' builds an rdflib Graph, which is serialized as Turtle at the end. 'ntriples' writes
+     triples straight to the output file as N-Triples as they are added, w/out holding them in memory.
+    :param workers: Number of processes to use for cleaning MIM titles & symbols. Triples are still added to the graph
+     in this process, in the same order.
+    :param mirror_dir: Directory to copy source files from instead of downloading them, e.g. for offline tests.
+    :param force: If False, and the inputs, code, and options are all the same as in the previous build, its outputs
+     are reused, w/ only the version date in omim.ttl updated. If True, always rebuilds.
+    :param incremental: If True, only MIMs whose inputs changed since the previous incremental build have their own
+     triples recomputed. The rest are copied from that build's segments. Shared triples, e.g. gene-disease
+     associations, are always recomputed. Output is N-Triples, as w/ triple_sink='ntriples'.
+    """
+    if incremental:
+        triple_sink = 'ntriples'
+    prefetch_source_files(mirror_dir, missing_only=use_cache)
     # Parse mimTitles.txt
     # - Get id's, titles, and type
-    omim_type_and_titles, omim_replaced = parse_mim_titles(get_mim_file('mimTitles', download_files_tf))
-    omim_types: Dict[str, str] = {k: v[0].name for k, v in omim_type_and_titles.items()}
-    omim_ids = list(omim_type_and_titles.keys())
-
-    if CONFIG['verbose']:
-        print('Tot MIM numbers from mimTitles.txt: %i', len(omim_ids))
-        print('Tot MIM types: %i', len(omim_type_and_titles))
-
-    # Populate graph
-    # - Non-OMIM triples
-    ontology_iri = URIRef('http://purl.obolibrary.org/obo/mondo/omim.owl')
-    # Add versionIRI with current date
-    from datetime import datetime
+    omim_type_and_titles, omim_replaced = parse_mim_titles(get_mim_file_rows('mimTitles'))
+    update_cache__pubmed_refs_and_mappings(mim_titles=omim_type_and_titles)
+
+    # Reuse previous build if nothing changed
     current_date = datetime.now().strftime('%Y-%m-%d')
-    version_iri = URIRef(f'http://purl.obolibrary.org/obo/mondo/releases/{current_date}/omim.owl')
-    version_info = URIRef(f'{current_date}')
+    build_outputs = [OUTPATH, REVIEW_CASES_PATH, SUSCEPTIBILITY_OUTPATH]
+    build_manifest = make_build_manifest(BUILD_INPUTS, {'triple_sink': triple_sink})
+    if not force and reuse_previous_build(build_manifest, build_outputs, current_date, OUTPATH, BUILD_MANIFEST_PATH):
+        print('Inputs unchanged since the previous build. Reusing its outputs.')
+        return
+
+    # - The sink & segment store are closed even if the build fails. An unfinished omim.ttl is discarded.
+    with ExitStack() as stack:
+        graph: Union[Graph, TripleSink] = OmimGraph.get_graph() if triple_sink == 'graph' \
+            else stack.enter_context(NTriplesSink(OUTPATH))
+        omim_to_mondo = load_omim_to_mondo_from_sssom(MONDO_OMIM_SSSOM_PATH)
+        susceptibility_rows = set()
+
+        # Populate prefixes
+        if isinstance(graph, Graph):
+            for prefix, uri in CURIE_MAP.items():
+                graph.namespace_manager.bind(prefix, URIRef(uri))
+
+        omim_types: Dict[str, str] = {k: v.omim_type.name for k, v in omim_type_and_titles.items()}
+        omim_ids = list(omim_type_and_titles.keys())
+
+        if CONFIG['verbose']:
+            print('Tot MIM numbers from mimTitles.txt: %i', len(omim_ids))
+            print('Tot MIM types: %i', len(omim_type_and_titles))
+
+        # Populate graph
+        # - Non-OMIM triples
+        ontology_iri = URIRef('http://purl.obolibrary.org/obo/mondo/omim.owl')
+        # Add versionIRI with current date
+        version_iri = URIRef(f'http://purl.obolibrary.org/obo/mondo/releases/{current_date}/omim.owl')
+        version_info = URIRef(f'{current_date}')
     
-    graph.add((ontology_iri, RDF.type, OWL.Ontology))
-    graph.add((ontology_iri, OWL.versionIRI, version_iri))
-    graph.add((ontology_iri, OWL.versionInfo, Literal(version_info)))
-    graph.add((URIRef(oboInOwl.hasSynonymType), RDF.type, OWL.AnnotationProperty))
-    graph.add((URIRef(oboInOwl.source), RDF.type, OWL.AnnotationProperty))
-    graph.add((URIRef(MONDONS.omim_included), RDF.type, OWL.AnnotationProperty))
-    graph.add((URIRef(OMO['0003000']), RDF.type, OWL.AnnotationProperty))
-    graph.add((BIOLINK['has_evidence'], RDF.type, OWL.AnnotationProperty))
-    graph.add((TAX_URI, RDF.type, OWL.Class))
-    graph.add((TAX_URI, RDFS.label, Literal(TAX_LABEL)))
-
-    # - OMIM triples
-    for omim_id in omim_ids:
-        omim_uri = OMIM[omim_id]
-        graph.add((omim_uri, RDF.type, OWL.Class))
-
-        # - Deprecated classes
-        if str(omim_type_and_titles[omim_id][0]) == 'OmimType.OBSOLETE':
-            graph.add((omim_uri, OWL.deprecated, Literal(True)))
-            if omim_replaced.get(omim_id, None):
-                label_ids = omim_replaced[omim_id]
-                if len(label_ids) == 1:
-                    # IAO:0100001 means: "term replaced by"
-                    graph.add((omim_uri, IAO['0100001'], OMIM[label_ids[0]]))
-                elif len(label_ids) > 1:
-                    for replaced_mim_num in label_ids:
-                        graph.add((omim_uri, oboInOwl.consider, OMIM[replaced_mim_num]))
-                continue
-
-        # - Non-deprecated
-        # Parse titles & symbols
-        omim_type, pref_titles_str, alt_titles_str, inc_titles_str = omim_type_and_titles[omim_id]
-        pref_titles_and_symbols: List[str] = [x.strip() for x in pref_titles_str.split(';')]
-        pref_title, pref_symbols = cleanup_title(pref_titles_and_symbols[0]), pref_titles_and_symbols[1:]
-        alt_titles, alt_symbols, former_alt_titles, former_alt_symbols = \
-            get_alt_and_included_titles_and_symbols(alt_titles_str)
-        included_titles, included_symbols, former_included_titles, former_included_symbols = \
-            get_alt_and_included_titles_and_symbols(inc_titles_str)
-        included_is_included = included_titles or included_symbols  # redundant. can't be included symbol w/out title
-
-        # Recapitalize acronyms in titles
-        all_abbrevs: Set[str] = \
-            set(pref_symbols + alt_symbols + former_alt_symbols + included_symbols + former_included_symbols)
-        # todo: consider DRYing to 1 call by passing all 5 title types to a wrapper function
-        pref_title = recapitalize_acronyms_in_titles(pref_title, all_abbrevs)
-        alt_titles = recapitalize_acronyms_in_titles(alt_titles, all_abbrevs)
-        former_alt_titles = recapitalize_acronyms_in_titles(former_alt_titles, all_abbrevs)
-        included_titles = recapitalize_acronyms_in_titles(included_titles, all_abbrevs)
-        former_included_titles = recapitalize_acronyms_in_titles(former_included_titles, all_abbrevs)
-
-        # Special cases depending on OMIM term type
-        is_gene = omim_type == OmimType.GENE or omim_type == OmimType.HAS_AFFECTED_FEATURE
-        if omim_type == OmimType.HERITABLE_PHENOTYPIC_MARKER:  # '%' char
-            graph.add((omim_uri, BIOLINK['category'], BIOLINK['Disease']))
-        elif is_gene:  # Represented by: * or + chars
-            graph.add((omim_uri, RDFS.subClassOf, SO['0000704']))  # gene
-            graph.add((omim_uri, MONDO.exclusionReason, MONDO.nonDisease))
-            graph.add((omim_uri, BIOLINK['category'], BIOLINK['Gene']))
-        elif omim_type == OmimType.PHENOTYPE:  # '#' char
-            graph.add((omim_uri, BIOLINK['category'], BIOLINK['Disease']))  # phenotype ~= disease
-        elif omim_type == OmimType.SUSPECTED:  # NULL
-            graph.add((omim_uri, MONDO.exclusionReason, MONDO.excludeTrait))
-
-        # Alternative rdfs:label for genes
-        if is_gene and pref_symbols:
-            gene_label_err = 'Warning: Only 1 symbol picked for label for gene term, but there were 2 to choose ' \
-                 f'from. Unsure which is best. Picking the first.\nhttps://omim.org/entry/{omim_id} - {pref_symbols}'
-            if len(pref_symbols) > 1:
-                LOG.warning(gene_label_err)  # todo: rare (n=1?), but decide the best way to handle these situations
-            graph.add((omim_uri, RDFS.label, Literal(pref_symbols[0])))
-        else:
-            graph.add((omim_uri, RDFS.label, Literal(pref_title)))
-
-        # Add synonyms
-        # - exact titles
-        graph.add((omim_uri, oboInOwl.hasExactSynonym, Literal(pref_title)))
-        for title in alt_titles:
-            graph.add((omim_uri, oboInOwl.hasExactSynonym, Literal(title)))
-        # - exact abbreviations
-        for abbrevs in [pref_symbols, alt_symbols]:
-            for abbreviation in abbrevs:
-                add_triple_and_optional_annotations(graph, omim_uri, oboInOwl.hasExactSynonym, abbreviation,
-                    [(oboInOwl.hasSynonymType, OMO['0003000'])])
-        # - related, deprecated 'former' titles
-        for title in former_alt_titles:
-            add_triple_and_optional_annotations(graph, omim_uri, oboInOwl.hasRelatedSynonym, title,
-                [(OWL.deprecated, Literal(True))])
-        # - related, deprecated 'former' abbreviations
-        for abbreviation in former_alt_symbols:
-            add_triple_and_optional_annotations(graph, omim_uri, oboInOwl.hasRelatedSynonym, abbreviation,
-                [(OWL.deprecated, Literal(True)), (oboInOwl.hasSynonymType, OMO['0003000'])])
-
-        # Add 'included' entries
-        # - comment
-        if included_is_included:
-            included_comment = "This term has one or more labels that end with ', INCLUDED'."
-            graph.add((omim_uri, RDFS['comment'], Literal(included_comment)))
-        # - titles
-        for title in included_titles:
-            graph.add((omim_uri, URIRef(MONDONS.omim_included), Literal(title)))
-        # - symbols
-        for symbol in included_symbols:
-            add_triple_and_optional_annotations(graph, omim_uri, URIRef(MONDONS.omim_included), symbol, [
-                # Though these are abbreviations, MONDONS.omim_included is not a synonym type, so can't add axiom:
-                # (oboInOwl.hasSynonymType, OMO['0003000'])
-            ])
-        # - deprecated, 'former'
-        for title in former_included_titles:
-            add_triple_and_optional_annotations(graph, omim_uri, URIRef(MONDONS.omim_included), title,
-                [(OWL.deprecated, Literal(True))])
-        for symbol in former_included_symbols:
-            add_triple_and_optional_annotations(graph, omim_uri, URIRef(MONDONS.omim_included), symbol, [
-                (OWL.deprecated, Literal(True)),
-                # Though these are abbreviations, MONDONS.omim_included is not a synonym type, so can't add axiom:
-                # (oboInOwl.hasSynonymType, OMO['0003000'])
-            ])
-
-    # Gene ID
-    # - Note that sometimes a gene symbol will appear on the omim.org/entry page, under the Phenotype-Gene or
-    #   Gene-Phenotype tables, which will match its entry in morbidmap.txt. However, that does not guarantee that the
-    #   gene will appear in mim2gene.txt. If it is not in mim2gene.txt, it will not be added.
-    # - Why is 'skos:exactMatch' appropriate for disease::gene relationships? - joeflack4 2022/06/06
-    # - genemap2: Is currently not used in the pipeline anywhere. It is downloaded simply for local reference.
-    get_mim_file('genemap2', download_files_tf)  # dl latest file
-    mim2gene_lines: List[str] = get_mim_file('mim2gene', download_files_tf)  # dl latest file & return
-    gene_map, pheno_map, hgnc_map = parse_mim2gene(mim2gene_lines)
-    for mim_number, entrez_id in gene_map.items():
-        graph.add((OMIM[mim_number], SKOS.exactMatch, NCBIGENE[entrez_id]))
-    for mim_number, entrez_id in pheno_map.items():
-        # RO['0002200'] = 'has phenotype'
-        add_subclassof_restriction(graph, RO['0002200'], OMIM[mim_number], NCBIGENE[entrez_id])
-    hgnc_symbol_id_map: Dict[str, str] = get_hgnc_symbol_id_map()
-    for mim_number, hgnc_symbol in hgnc_map.items():
-        graph.add((OMIM[mim_number], SKOS.exactMatch, HGNC_symbol[hgnc_symbol]))
-        if hgnc_symbol in hgnc_symbol_id_map:
-            graph.add((OMIM[mim_number], SKOS.exactMatch, HGNC[hgnc_symbol_id_map[hgnc_symbol]]))
-
-    # Phenotypic Series
-    pheno_series = parse_phenotypic_series_titles(get_mim_file('phenotypicSeries', download_files_tf))
-    for ps_id in pheno_series:
-        graph.add((OMIMPS[ps_id], RDF.type, OWL.Class))
-        graph.add((OMIMPS[ps_id], RDFS.label, Literal(pheno_series[ps_id][0])))
-        # Are all phenotypes listed here indeed disease? - joeflack4 2021/11/11
-        graph.add((OMIMPS[ps_id], BIOLINK.category, BIOLINK.Disease))
-        for mim_number in pheno_series[ps_id][1]:
-            graph.add((OMIM[mim_number], RDFS.subClassOf, OMIMPS[ps_id]))
-
-    # Morbid map
-    gene_phenotypes: Dict[str, Dict] = parse_morbid_map(get_mim_file('morbidmap', download_files_tf))
-
-    # Gene-Chromosome relationships
-    # - Cyto location: Add RO:0002525 (is subsequence of)
-    # https://www.ebi.ac.uk/ols/ontologies/ro/properties?iri=http://purl.obolibrary.org/obo/RO_0002525
-    for gene_mim, gene_data in gene_phenotypes.items():
-        if gene_data['cyto_location']:
-            chr_id = '9606chr' + gene_data['cyto_location']  # 9606: NCBI Taxonomy ID for Homo Sapiens
-            add_subclassof_restriction(graph, RO['0002525'], CHR[chr_id], OMIM[gene_mim])
-
-    # Disease->Gene (& more Gene->Disease) relationships
-    # - Collect phenotype MIMs & associated gene MIMs and relationship info
-    phenotype_genes: Dict[str, List[Dict[str, str]]] = get_phenotype_genes(gene_phenotypes)
-
-    # - Add relations (subclass restrictions)
-    exclusions_p_mim_orcid_map: Dict[str, Optional[URIRef]] = get_d2g_exclusions_by_curator()
-    protected_gene_pheno__hgnc_orcid_map: Dict[Tuple[str, str], Tuple[str, Optional[URIRef]]] = \
-        get_d2g_protected()
+        graph.add((ontology_iri, RDF.type, OWL.Ontology))
+        graph.add((ontology_iri, OWL.versionIRI, version_iri))
+        graph.add((ontology_iri, OWL.versionInfo, Literal(version_info)))
+        graph.add((URIRef(oboInOwl.hasSynonymType), RDF.type, OWL.AnnotationProperty))
+        graph.add((URIRef(oboInOwl.source), RDF.type, OWL.AnnotationProperty))
+        graph.add((URIRef(MONDONS.omim_included), RDF.type, OWL.AnnotationProperty))
+        graph.add((URIRef(OMO['0003000']), RDF.type, OWL.AnnotationProperty))
+        graph.add((BIOLINK['has_evidence'], RDF.type, OWL.AnnotationProperty))
+        graph.add((TAX_URI, RDF.type, OWL.Class))
+        graph.add((TAX_URI, RDFS.label, Literal(TAX_LABEL)))
+
+        # - OMIM triples
+        # - MIMs' own triples: Each MIM's depend only on its rows in mimTitles.txt and mim2gene.txt, and its cached data
+        # - Note that sometimes a gene symbol will appear on the omim.org/entry page, under the Phenotype-Gene or
+        #   Gene-Phenotype tables, which will match its entry in morbidmap.txt. However, that does not guarantee that
+        #   the gene will appear in mim2gene.txt. If it is not in mim2gene.txt, it will not be added.
+        # - genemap2: Is currently not used in the pipeline anywhere. It is downloaded simply for local reference.
+        gene_map, pheno_map, hgnc_map = parse_mim2gene(get_mim_file_rows('mim2gene'))
+        hgnc_symbol_id_map: Dict[str, str] = get_hgnc_symbol_id_map()
+        pubmed_links_df, mappings_df = get_pubmed_refs_and_mappings(update_cache=False)
+        mim_inputs: Dict[str, MimInputs] = get_mim_inputs(
+            omim_type_and_titles, omim_replaced, gene_map, pheno_map, hgnc_map, hgnc_symbol_id_map, pubmed_links_df,
+            mappings_df)
+        # - Incremental: Only MIMs whose inputs changed since the previous build are recomputed
+        mims_to_build: Set[str] = set(mim_inputs)
+        if incremental:
+            # - context: Segments also depend on the code, and on known capitalizations used in cleaning titles
+            segment_store = stack.enter_context(BuildSegmentStore(
+                BUILD_SEGMENTS_PATH, f'{get_tool_version()}:{hash_file(DATA_DIR / "known_capitalizations.tsv")}'))
+            fingerprints: Dict[str, str] = {mim: get_mim_inputs_fingerprint(x) for mim, x in mim_inputs.items()}
+            previous_fingerprints: Dict[str, str] = segment_store.get_fingerprints()
+            mims_to_build = {mim for mim, x in fingerprints.items() if previous_fingerprints.get(mim) != x}
+            print(f'Incremental build: {len(mims_to_build)} of {len(mim_inputs)} MIMs changed since the previous '
+                  f'build.')
+        # - Titles & symbols: cleaned up front, for all MIMs that aren't deprecated & replaced
+        cleaned_titles_and_symbols: Dict[str, CleanedTitlesAndSymbols] = get_cleaned_titles_and_symbols_by_mim({
+            mim: x.record for mim, x in mim_inputs.items() if mim in mims_to_build and needs_cleaning(x)}, workers)
+        new_segments: Dict[str, Tuple[str, str]] = {}
+        for omim_id, inputs in mim_inputs.items():
+            if not incremental:
+                add_mim_triples(graph, omim_id, inputs, cleaned_titles_and_symbols.get(omim_id))
+            elif omim_id in mims_to_build:
+                segment = NTriplesBuffer()
+                add_mim_triples(segment, omim_id, inputs, cleaned_titles_and_symbols.get(omim_id))
+                new_segments[omim_id] = (fingerprints[omim_id], segment.getvalue())
+                graph.write_ntriples(new_segments[omim_id][1])
+            else:
+                graph.write_ntriples(segment_store.get_ntriples(omim_id))
+
+
+        # Phenotypic Series
+        pheno_series = parse_phenotypic_series_titles(get_mim_file_rows('phenotypicSeries'))
+        for ps_id in pheno_series:
+            graph.add((OMIMPS[ps_id], RDF.type, OWL.Class))
+            graph.add((OMIMPS[ps_id], RDFS.label, Literal(pheno_series[ps_id][0])))
+            # Are all phenotypes listed here indeed disease? - joeflack4 2021/11/11
+            graph.add((OMIMPS[ps_id], BIOLINK.category, BIOLINK.Disease))
+            for mim_number in pheno_series[ps_id][1]:
+                graph.add((OMIM[mim_number], RDFS.subClassOf, OMIMPS[ps_id]))
+
+        # Morbid map
+        gene_phenotypes: Dict[str, Dict] = parse_morbid_map(
+            get_mim_file_rows('morbidmap', mim_titles=omim_type_and_titles))
+
+        # Gene-Chromosome relationships
+        # - Cyto location: Add RO:0002525 (is subsequence of)
+        # https://www.ebi.ac.uk/ols/ontologies/ro/properties?iri=http://purl.obolibrary.org/obo/RO_0002525
+        for gene_mim, gene_data in gene_phenotypes.items():
+            if gene_data['cyto_location']:
+                chr_id = '9606chr' + gene_data['cyto_location']  # 9606: NCBI Taxonomy ID for Homo Sapiens
+                add_subclassof_restriction(graph, RO['0002525'], CHR[chr_id], OMIM[gene_mim])
+
+        # Disease->Gene (& more Gene->Disease) relationships
+        # - Collect phenotype MIMs & associated gene MIMs and relationship info
+        phenotype_genes: Dict[str, List[MorbidMapAssociation]] = get_phenotype_genes(gene_phenotypes)
+
+        # - Add relations (subclass restrictions)
+        exclusions_p_mim_orcid_map: Dict[str, Optional[URIRef]] = get_d2g_exclusions_by_curator()
+        protected_gene_pheno__hgnc_orcid_map: Dict[Tuple[str, str], Tuple[str, Optional[URIRef]]] = \
+            get_d2g_protected()
     
-    # Track which protected associations have been processed from morbidmap
-    processed_protected_assocs: Set[Tuple[str, str]] = set()
+        # Track which protected associations have been processed from morbidmap
+        processed_protected_assocs: Set[Tuple[str, str]] = set()
     
-    for p_mim, assocs in phenotype_genes.items():
-        for assoc in assocs:
-            gene_mim, p_lab, p_map_key, p_map_lab = assoc['gene_id'], assoc['phenotype_label'], \
-                assoc['mapping_key'], assoc['mapping_label']
+        for p_mim, assocs in phenotype_genes.items():
+            for assoc in assocs:
+                gene_mim, p_lab, p_map_key = assoc.gene_mim, assoc.phenotype_label, assoc.mapping_key
             
-            # Collect OMIM susceptibility entries (https://omim.org/help/faq#1_6)
-            if p_lab and p_lab.strip().startswith("{"):
-                # Map OMIM phenotype MIM -> MONDO IDs via SSSOM
-                for mondo_id in sorted(omim_to_mondo.get(p_mim, [])):
-                    susceptibility_rows.add((mondo_id, f"OMIM:{p_mim}"))
-
-            evidence = f'Evidence: ({p_map_key}) {p_map_lab}'
-            p_mim_excluded = p_mim in exclusions_p_mim_orcid_map
-            protected_digenic_key = (p_mim, gene_mim)
-
-            protected_digenic_assoc: bool = protected_digenic_key in protected_gene_pheno__hgnc_orcid_map
-            if protected_digenic_assoc:
-                hgnc_id_protected: str
-                orcid_protected: Optional[URIRef]
-                hgnc_id_protected, orcid_protected = protected_gene_pheno__hgnc_orcid_map[protected_digenic_key]
+                # Collect OMIM susceptibility entries (https://omim.org/help/faq#1_6)
+                if p_lab and p_lab.strip().startswith("{"):
+                    # Map OMIM phenotype MIM -> MONDO IDs via SSSOM
+                    for mondo_id in sorted(omim_to_mondo.get(p_mim, [])):
+                        susceptibility_rows.add((mondo_id, f"OMIM:{p_mim}"))
+
+                evidence = f'Evidence: ({p_map_key}) {assoc.mapping_label}'
+                p_mim_excluded = p_mim in exclusions_p_mim_orcid_map
+                protected_digenic_key = (p_mim, gene_mim)
+
+                protected_digenic_assoc: bool = protected_digenic_key in protected_gene_pheno__hgnc_orcid_map
+                if protected_digenic_assoc:
+                    hgnc_id_protected: str
+                    orcid_protected: Optional[URIRef]
+                    hgnc_id_protected, orcid_protected = protected_gene_pheno__hgnc_orcid_map[protected_digenic_key]
+                    add_gene_disease_associations(graph, gene_mim, p_mim, evidence, orcid_protected)
+                    graph.add((OMIM[gene_mim], SKOS.exactMatch, HGNC[hgnc_id_protected]))
+                    processed_protected_assocs.add(protected_digenic_key)
+                    continue
+
+                # Skip: No phenotype or unknown defect
+                # - not p_mim: Skip because not an association to another MIM (Provenance:
+                #  https://github.com/monarch-initiative/omim/issues/78)
+                # - p_map_key == 1: Skip because association w/ unknown defect (Provenance:
+                #  https://github.com/monarch-initiative/omim/issues/79#issuecomment-1319408780)
+                if not p_mim or p_map_key == 1:
+                    continue
+
+                # Add restrictions: Gene->Disease non-causal / non-disease-defining relationships
+                # - RO:0003302 docs: see MORBIDMAP_PHENOTYPE_MAPPING_KEY_PREDICATES
+                # - Mapping key 3 = 'causal' (disease-defining). Handled separately below.
+                if p_map_key != 3 or p_mim_excluded:
+                    g2d_pred = MORBIDMAP_PHENOTYPE_MAPPING_KEY_PREDICATES[p_map_key] \
+                        if len(assocs) == 1 and not p_mim_excluded \
+                        else RO['0003302']
+                    orcid: Optional[URIRef] = exclusions_p_mim_orcid_map[p_mim] if p_mim_excluded else None
+                    add_subclassof_restriction_with_evidence_and_source(
+                        graph, g2d_pred, OMIM[p_mim], OMIM[gene_mim], evidence, orcid)
+                    continue
+
+                # Skip non-causal (disease-defining) cases
+                if len(assocs) > 1 or not p2g_is_definitive(p_lab):  # or cases above: (p_map_key != 3) & p_mim_excluded
+                    continue
+
+                log_review_cases(assoc, gene_phenotypes, omim_types)
+                add_gene_disease_associations(graph, gene_mim, p_mim, evidence)
+    
+        # Add curator protected associations that were not in morbidmap
+        # This ensures all protected associations are maintained, even if they don't appear in the source data
+        for (p_mim, gene_mim), (hgnc_id_protected, orcid_protected) in protected_gene_pheno__hgnc_orcid_map.items():
+            if (p_mim, gene_mim) not in processed_protected_assocs:
+                # Use mapping key 3 (disease-defining) as default evidence for protected associations
+                evidence = 'Evidence: (3) disease-defining (protected association)'
                 add_gene_disease_associations(graph, gene_mim, p_mim, evidence, orcid_protected)
                 graph.add((OMIM[gene_mim], SKOS.exactMatch, HGNC[hgnc_id_protected]))
-                processed_protected_assocs.add(protected_digenic_key)
-                continue
-
-            # Skip: No phenotype or unknown defect
-            # - not p_mim: Skip because not an association to another MIM (Provenance:
-            #  https://github.com/monarch-initiative/omim/issues/78)
-            # - p_map_key == '1': Skip because association w/ unknown defect (Provenance:
-            #  https://github.com/monarch-initiative/omim/issues/79#issuecomment-1319408780)
-            if not p_mim or p_map_key == '1':
-                continue
-
-            # Add restrictions: Gene->Disease non-causal / non-disease-defining relationships
-            # - RO:0003302 docs: see MORBIDMAP_PHENOTYPE_MAPPING_KEY_PREDICATES
-            # - Mapping key 3 = 'causal' (disease-defining). Handled separately below.
-            if p_map_key != '3' or p_mim_excluded:
-                g2d_pred = MORBIDMAP_PHENOTYPE_MAPPING_KEY_PREDICATES[p_map_key] \
-                    if len(assocs) == 1 and not p_mim_excluded \
-                    else RO['0003302']
-                orcid: Optional[URIRef] = exclusions_p_mim_orcid_map[p_mim] if p_mim_excluded else None
-                add_subclassof_restriction_with_evidence_and_source(
-                    graph, g2d_pred, OMIM[p_mim], OMIM[gene_mim], evidence, orcid)
-                continue
-
-            # Skip non-causal (disease-defining) cases
-            if len(assocs) > 1 or not p2g_is_definitive(p_lab):  # or cases above: (p_map_key != '3') & p_mim_excluded
-                continue
-
-            log_review_cases(p_mim, p_lab, p_map_key, gene_mim, gene_phenotypes, omim_types)
-            add_gene_disease_associations(graph, gene_mim, p_mim, evidence)
-    
-    # Add curator protected associations that were not in morbidmap
-    # This ensures all protected associations are maintained, even if they don't appear in the source data
-    for (p_mim, gene_mim), (hgnc_id_protected, orcid_protected) in protected_gene_pheno__hgnc_orcid_map.items():
-        if (p_mim, gene_mim) not in processed_protected_assocs:
-            # Use mapping key 3 (disease-defining) as default evidence for protected associations
-            evidence = 'Evidence: (3) disease-defining (protected association)'
-            add_gene_disease_associations(graph, gene_mim, p_mim, evidence, orcid_protected)
-            graph.add((OMIM[gene_mim], SKOS.exactMatch, HGNC[hgnc_id_protected]))
     
-    # Add MONDO mappings from protected file
-    # This ensures all MONDO IDs listed in protected associations are available for SPARQL queries
-    protected_mondo_mappings = get_protected_mondo_mappings()
-    for p_mim, mondo_ids in protected_mondo_mappings.items():
-        for mondo_curie in mondo_ids:
-            # Extract MONDO ID from CURIE (e.g., "MONDO:0100537" -> "0100537")
-            mondo_id = mondo_curie.split(':')[1] if ':' in mondo_curie else mondo_curie
-            graph.add((OMIM[p_mim], SKOS.exactMatch, MONDO[mondo_id]))
-
-    # PubMed refs, UMLS mappings, Orphanet mappings
-    pubmed_links_df, mappings_df = get_pubmed_refs_and_mappings()
-    for df, field, pred, obj_ns in [
-        (pubmed_links_df, 'pmid_refs', IAO['0000142'], PMID),
-        (mappings_df, 'umls_ids', SKOS.exactMatch, UMLS),
-        (mappings_df, 'orphanet_ids', SKOS.exactMatch, ORPHANET),
-    ]:
-        for _, row in df.iterrows():
-            ids = str(row[field]).split('|') if row[field] else []
-            for _id in ids:
-                graph.add((OMIM[str(row['mim'])], pred, obj_ns[_id]))  # IAO:0000142: 'mentions'
-
-    # Save ROBOT template for susceptibility annotations
-    makedirs("robot_templates", exist_ok=True)
-    susceptibility_out = Path("mondo-omim-susceptibility-subset.robot.tsv")
-    with susceptibility_out.open("w", newline="") as f:
-        w = csv.writer(f, delimiter="\t")
-        w.writerow(["mondo_id", "subset", "omim_id"])
-        w.writerow(["ID", "AI oboInOwl:inSubset", ">A oboInOwl:source"])
-        for mondo_id, omim_curie in sorted(susceptibility_rows):
-            w.writerow([mondo_id, "http://purl.obolibrary.org/obo/mondo#omim_susceptibility", omim_curie])
-
-    # Save
-    # - Review file
-    # todo: ensure comment field exists even when no row uses it
-    review_df = pd.DataFrame(REVIEW_CASES).sort_values(by=['classCode', 'value'])
-    review_df.to_csv(REVIEW_CASES_PATH, index=False, sep='\t')
-    # - Ontology
-    with open(OUTPATH, 'w') as f:
-        f.write(graph.serialize(format='turtle'))
+        # Add MONDO mappings from protected file
+        # This ensures all MONDO IDs listed in protected associations are available for SPARQL queries
+        protected_mondo_mappings = get_protected_mondo_mappings()
+        for p_mim, mondo_ids in protected_mondo_mappings.items():
+            for mondo_curie in mondo_ids:
+                # Extract MONDO ID from CURIE (e.g., "MONDO:0100537" -> "0100537")
+                mondo_id = mondo_curie.split(':')[1] if ':' in mondo_curie else mondo_curie
+                graph.add((OMIM[p_mim], SKOS.exactMatch, MONDO[mondo_id]))
+
+        # Save ROBOT template for susceptibility annotations
+        makedirs("robot_templates", exist_ok=True)
+        with SUSCEPTIBILITY_OUTPATH.open("w", newline="") as f:
+            w = csv.writer(f, delimiter="\t")
+            w.writerow(["mondo_id", "subset", "omim_id"])
+            w.writerow(["ID", "AI oboInOwl:inSubset", ">A oboInOwl:source"])
+            for mondo_id, omim_curie in sorted(susceptibility_rows):
+                w.writerow([mondo_id, "http://purl.obolibrary.org/obo/mondo#omim_susceptibility", omim_curie])
+
+        # Save
+        # - Review file
+        # todo: ensure comment field exists even when no row uses it
+        review_df = pd.DataFrame(REVIEW_CASES).sort_values(by=['classCode', 'value'])
+        review_df.to_csv(REVIEW_CASES_PATH, index=False, sep='\t')
+        # - Ontology
+        if isinstance(graph, Graph):
+            serialize_turtle(graph, OUTPATH)
+        else:
+            graph.close()
+        # - Segments: Saved only once omim.ttl is written, so that they never get ahead of it
+        if incremental:
+            segment_store.update(new_segments, set(mim_inputs))
+    save_build_manifest(build_manifest, build_outputs, current_date, BUILD_MANIFEST_PATH)
 
 
 if __name__ == '__main__':
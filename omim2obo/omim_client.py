@@ -3,16 +3,23 @@
 OMIM docs: https://omim.org/help/api
 """
 import os
-from dataclasses import dataclass
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Deque, Dict, Generator, Iterable, Iterator, List, Optional, Set, Tuple, Union
 import requests
 import logging
 import re
-import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from omim2obo.config import CACHE_INCOMPLETENESS_INDICATOR_PATH, CACHE_LAST_UPDATED_PATH, MAPPINGS_PATH, \
     PUBMED_REFS_PATH
+from omim2obo.entry_cache import EntryCacheDb
+from omim2obo.rate_limiter import RateLimiter
 
 # BATCH_SIZE: Don't change!
 #  https://omim.org/help/api: "Entries and clinical synopses are limited to 20 per request if any 'includes' are
@@ -20,8 +27,21 @@ from omim2obo.config import CACHE_INCOMPLETENESS_INDICATOR_PATH, CACHE_LAST_UPDA
 #  However, even if this param is left out, it looks like the default behavior is "all" anyway, and it still limits to
 #  a maximum of 20/request.
 BATCH_SIZE = 20
-OMIM_ENTRY_API_URL = 'https://api.omim.org/api/entry'
+OMIM_API_URL = 'https://api.omim.org/api'
+OMIM_ENTRY_API_URL = OMIM_API_URL + '/entry'
 OMIM_ENTRY_SEARCH_API_URL = OMIM_ENTRY_API_URL + '/search'
+# RETRY_STATUSES: Transient server errors, plus 429. 429 is only retried if the response has a Retry-After header, as
+#  otherwise it means the daily limit has been reached, which is handled by the seed run / RATE_ERR logic.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# ENTRY_PROJECTION: Parts of entries used when caching pubmed refs & mappings (see get_pubs() & get_mapped_ids()).
+#  Dict values are projections of the sub-object (or of each item, for lists). True keeps the whole value.
+ENTRY_PROJECTION = {
+    'mimNumber': True,
+    'referenceList': {'reference': {'pubmedID': True}},
+    'externalLinks': {'umlsIDs': True, 'orphanetDiseases': True},
+}
+# DAILY_QUOTA: Max MIMs that can be fetched from the entry API per day. See: RATE_ERR_SEED_RUN
+DAILY_QUOTA = 5000
 
 LOG = logging.getLogger('OmimClient')
 # todo: alternatively, could print a short message and then prompt the user to read a tagged message in dev docs
@@ -45,6 +65,27 @@ RATE_ERR = (
         MAPPINGS_PATH, PUBMED_REFS_PATH, CACHE_LAST_UPDATED_PATH))
  
 
+def project(value: Union[Dict, List, str, int], projection: Union[Dict, bool]) -> Union[Dict, List, str, int]:
+    """Keep only the parts of a decoded JSON value that are in the projection. See: ENTRY_PROJECTION"""
+    if projection is True:
+        return value
+    if isinstance(value, list):
+        return [project(x, projection) for x in value]
+    if isinstance(value, dict):
+        return {k: project(value[k], sub_projection) for k, sub_projection in projection.items() if k in value}
+    return value
+
+
+def _collect_batches(batches: Generator[List[Dict], None, bool]) -> Tuple[List[Dict], bool]:
+    """Collect all entries from a generator of batches, along w/ its return value"""
+    results: List[Dict] = []
+    while True:
+        try:
+            results += next(batches)
+        except StopIteration as stop:
+            return results, stop.value
+
+
 def _log_incomplete_seed_run():
     """Write to disk an indication that the seed run was incomplete.
 
@@ -56,29 +97,102 @@ def _log_incomplete_seed_run():
         file.write('')
 
 
+class OmimRetry(Retry):
+    """Retry policy that only retries 429s if the server says when to retry, via a Retry-After header"""
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if status_code == 429 and not has_retry_after:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def get_session(max_retries: int = 3, backoff_factor: float = 1, pool_maxsize: int = 10) -> requests.Session:
+    """Get a requests session w/ connection pooling and retries
+
+    If retries are used up, the last response is returned rather than raising, so that the caller can handle it.
+
+    :param pool_maxsize: Max connections kept open per host. Should be at least the number of concurrent requests.
+    """
+    retry = OmimRetry(
+        total=max_retries, backoff_factor=backoff_factor, status_forcelist=RETRY_STATUSES, allowed_methods=['GET'],
+        respect_retry_after_header=True, raise_on_status=False)
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(max_retries=retry, pool_maxsize=pool_maxsize))
+    session.mount('http://', HTTPAdapter(max_retries=retry, pool_maxsize=pool_maxsize))
+    return session
+
+
 @dataclass
 class OmimClient:
     """OMIM API client
 
     todo: redundancies w/ _batch_and_fetch & _fetch_since_date()?. Ideally DRY up.
-    todo: might be possible to save bandwidth by filtering return fields
     todo: Ideally would have a way to get around rate limit for non seed-running, e.g. in the event that the script
      does not run weekly and instead several months or years pass. The workaround to this is to just re-initialize the
      cache by deleting the cache files and re-running the build.
     todo: For the raise RuntimeError situations in the fetch_since_date and fetch_ids methods, ideally would also be
      good to cache what we received to this point as well for these unanticipated exceptions, as with the 'rate-limit'
      case, then throw error in calling func.
-    todo: are the sleep(2)s necessary? or could we reduce?
+
+    Requests go through a single requests.Session, so that connections are kept alive and reused across batches.
+
+    :param base_url: OMIM API root. Can be pointed elsewhere, e.g. a local stub server for testing.
+    :param timeout: Seconds to wait when (connecting, reading) a response.
+    :param max_retries: Number of retries for connection errors and RETRY_STATUSES responses, w/ exponential backoff.
+     For 429s, waits as long as the server's Retry-After header says.
+    :param backoff_factor: Backoff between retries is backoff_factor * 2^(retry number - 1) seconds.
+    :param projection: If set, entries are reduced to just these fields as soon as they are decoded, e.g.
+     ENTRY_PROJECTION. Else, entries are kept whole.
+    :param raw_entry_store: If set, whole entries are saved to it as they are fetched, before any projection.
+    :param rate_limiter: Paces requests. By default, starts at 1 request/second, and allows DAILY_QUOTA MIMs/day.
     """
     api_key: str
+    base_url: str = OMIM_API_URL
+    timeout: Tuple[float, float] = (10, 60)
+    max_retries: int = 3
+    backoff_factor: float = 1
+    session: requests.Session = field(default=None, repr=False)
+    projection: Optional[Dict] = field(default=None, repr=False)
+    raw_entry_store: Optional[EntryCacheDb] = field(default=None, repr=False)
+    rate_limiter: RateLimiter = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.session is None:
+            self.session = get_session(self.max_retries, self.backoff_factor)
+        if self.rate_limiter is None:
+            self.rate_limiter = RateLimiter(daily_quota=DAILY_QUOTA)
+
+    @property
+    def entry_api_url(self) -> str:
+        """URL for entry API"""
+        return self.base_url.rstrip('/') + '/entry'
+
+    @property
+    def entry_search_api_url(self) -> str:
+        """URL for entry search API"""
+        return self.entry_api_url + '/search'
 
     def fetch(
         self, ids: List[Union[int, str]] = None, since_date: datetime = None, limit_include=True, seed_run=False,
         update_cache_metadata=False, verbose=True,
     ) -> List[Dict]:
         """Fetch MIM entry data from the OMIM API. Can query by explicit IDs, or since since_date."""
+        return list(self.iter_fetch(ids, since_date, limit_include, seed_run, update_cache_metadata, verbose))
+
+    def iter_fetch(
+        self, ids: List[Union[int, str]] = None, since_date: datetime = None, limit_include=True, seed_run=False,
+        update_cache_metadata=False, verbose=True, exclude_ids: Iterable[str] = None,
+    ) -> Iterator[Dict]:
+        """Fetch MIM entry data from the OMIM API, yielding entries as each batch arrives. See: fetch()
+
+        Entries are not kept by the client, so memory use stays flat if the caller doesn't keep them either. Cache
+        metadata is updated once the iterator is exhausted.
+
+        :param exclude_ids: MIMs not to fetch, e.g. ones already fetched by an interrupted run. W/ since_date, the
+         search is then only used to get MIM numbers, and the rest are fetched by ID. See: _iter_since_date()
+        """
         # Fetch
-        results: List[Dict] = []
+        n_results = 0
         fetch_success = False
         ids = [str(x) for x in ids] if ids and not isinstance(ids[0], str) else ids
         if ids and since_date:
@@ -87,16 +201,27 @@ class OmimClient:
             raise ValueError('Must specify either ids or since_date')
         elif since_date and seed_run:
             raise ValueError('Cannot specify since_date and seed_run')
-        elif ids:
+        exclude_ids: Set[str] = set(exclude_ids or [])
+        if ids:
+            ids = [x for x in ids if x not in exclude_ids]
             if verbose:
                 print(f'- Fetching {len(ids)} MIMs from OMIM entry API')
-            results, fetch_success = self._fetch_ids(ids, seed_run, limit_include)
-        elif since_date:
+            batches = self._iter_ids(ids, seed_run, limit_include)
+        else:
             if verbose:
                 print(f'- Fetching MIMs since {str(since_date)} from OMIM entry API')
-            results, fetch_success = self._fetch_since_date(since_date)
+            batches = self._iter_since_date(since_date, limit_include, exclude_ids=exclude_ids)
+        while True:
+            try:
+                entries: List[Dict] = next(batches)
+            except StopIteration as stop:
+                fetch_success = stop.value
+                break
+            n_results += len(entries)
+            for x in entries:
+                yield x['entry']
         if verbose:
-            msg = f'- Fetched data for {len(results)} MIMs. Saving results.' if len(results) > 0 else \
+            msg = f'- Fetched data for {n_results} MIMs. Saving results.' if n_results > 0 else \
                 '- API showing that there are no newly updated MIMs since last fetch.'
             print(msg)
 
@@ -110,89 +235,160 @@ class OmimClient:
             with open(CACHE_LAST_UPDATED_PATH, 'w') as file:
                 file.write(datetime.now().strftime("%Y-%m-%d"))  # YYYY-MM-DD
 
-        return [x['entry'] for x in results]
+    def _fetch_since_date(
+        self, since_date: datetime, limit_include=True, refetch=False
+    ) -> Tuple[List[Dict], bool]:
+        """Fetch all MIMs since the given since_date"""
+        return _collect_batches(self._iter_since_date(since_date, limit_include, refetch))
 
-    def _fetch_since_date(self, since_date: datetime) -> Tuple[List[Dict], bool]:
-        """Fetch all MIMs since the given since_date
+    def _iter_since_date(
+        self, since_date: datetime, limit_include=True, refetch=False, exclude_ids: Set[str] = None,
+    ) -> Generator[List[Dict], None, bool]:
+        """Fetch all MIMs since the given since_date, yielding each batch of entries
 
         Relevant OMIM docs: https://omim.org/help/search
+
+        :param refetch: If True, the search is only used to get MIM numbers, and their entries are then fetched by
+         _iter_ids(). Else, the search itself requests the same includes as _iter_ids() would, and its results are
+         used directly, which uses half as many requests & quota.
+        :param exclude_ids: MIMs not to fetch. If given, implies refetch, so that excluded MIMs don't use quota.
+        :returns: Whether the fetch completed w/out hitting the rate limit.
         """
+        refetch = refetch or bool(exclude_ids)
         since_date_str = datetime.strftime(since_date, "%Y/%m/%d")
         to_date_str = datetime.strftime(datetime.now(), "%Y/%m/%d")
         static_query_params = f'?search=*:*&filter=date_updated:{since_date_str}-{to_date_str}' + \
             f'&sort=score+desc,+prefix_sort+desc&limit={BATCH_SIZE}&format=json'
+        params = {'apiKey': self.api_key}
+        if not refetch:
+            params['include'] = self._get_entry_params([], limit_include)['include']
         n_fetched = 0
-        results: List[Dict] = []
+        n_results = 0
+        ids: List[str] = []
+        fetch_success = True
         while True:
             # Set up
             start_query_parm = '&start=' + str(n_fetched)
-            url = OMIM_ENTRY_SEARCH_API_URL + static_query_params + start_query_parm
-            response_dict, err = self._request(url, {'apiKey': self.api_key})
+            url = self.entry_search_api_url + static_query_params + start_query_parm
+            response_dict, err = self._request(url, params, quota_cost=0 if refetch else BATCH_SIZE)
             # Query
             entries: List[Dict] = response_dict.get('searchResponse', {}).get('entryList', [])
-            results += entries
+            n_results += len(entries)
+            if refetch:
+                ids += [str(x['entry']['mimNumber']) for x in entries]
+            elif entries:
+                yield self._project_entries(entries)
             n_fetched += BATCH_SIZE
             # Error handling
             if err == 'rate-limit':
-                LOG.warning(f'Records fetched: {len(results)}')
+                LOG.warning(f'Records fetched: {n_results}')
                 LOG.warning(RATE_ERR)
+                fetch_success = False
                 break
             elif err:
                 raise RuntimeError(err)
             elif not entries or len(entries) < BATCH_SIZE:  # fetched everything
                 break
-            time.sleep(2)
 
-        ids: List[str] = [x['entry']['mimNumber'] for x in results]
-        return self._fetch_ids(ids)
+        if not refetch:
+            return fetch_success
+        if exclude_ids:
+            ids = [x for x in ids if x not in exclude_ids]
+        return (yield from self._iter_ids(ids, limit_include=limit_include))
 
     def _fetch_ids(
         self, ids: List[Union[int, str]], seed_run=False, limit_include=True
     ) -> Tuple[List[Dict], bool]:
         """Fetch all MIMs"""
+        return _collect_batches(self._iter_ids(ids, seed_run, limit_include))
+
+    def _iter_ids(
+        self, ids: List[Union[int, str]], seed_run=False, limit_include=True
+    ) -> Generator[List[Dict], None, bool]:
+        """Fetch all MIMs, yielding each batch of entries
+
+        :returns: Whether the fetch completed w/out hitting the rate limit.
+        """
         n_fetched = 0
-        results: List[Dict] = []
-        fetch_success = True
         ids = [str(x) for x in ids] if ids and not isinstance(ids[0], str) else ids
         while n_fetched < len(ids):
             # Set up
             end = min(n_fetched + BATCH_SIZE, len(ids))
             ids_i = ids[n_fetched:end]
-            params = {'format': 'json', 'apiKey': self.api_key, 'mimNumber': ','.join(ids_i), 'include': 'all'}
-            if limit_include:
-                params['include'] = ['referenceList', 'externalLinks']
             # Query
-            response_dict, err = self._request(OMIM_ENTRY_API_URL, params, seed_run)
+            response_dict, err = self._request(
+                self.entry_api_url, self._get_entry_params(ids_i, limit_include), seed_run, quota_cost=len(ids_i))
             entries: List[Dict] = response_dict.get('entryList', [])
-            results += entries
+            if entries:
+                yield self._project_entries(entries)
             n_fetched += BATCH_SIZE
             # Error handling
-            if seed_run and (err or not entries):
-                _log_incomplete_seed_run()
-            if err == 'rate-limit':
-                LOG.warning(f'Records fetched: {n_fetched} of {len(ids)}')
-                if seed_run:
-                    LOG.warning(RATE_ERR_SEED_RUN)
-                else:
-                    LOG.warning(RATE_ERR)
-                fetch_success = False
-                break
-            elif err:
-                raise RuntimeError(err)
-            elif len(entries) != len(ids_i):
-                raise RuntimeError(f'Query on ids {ids_i} returned {len(entries)} results, but expected {len(ids_i)}.')
-            elif not entries:
-                raise RuntimeError(f'Query on ids {ids_i} returned no results.')
-            time.sleep(2)
+            if not self._check_batch(ids_i, entries, err, seed_run, n_fetched, len(ids)):
+                return False
+
+        return True
+
+    def _project_entries(self, entries: List[Dict]) -> List[Dict]:
+        """Apply projection to entries from an entryList
+
+        If there is a raw_entry_store, whole entries are saved to it first.
+        """
+        if self.raw_entry_store is not None:
+            self.raw_entry_store.upsert_raw_entries([x['entry'] for x in entries], datetime.now().strftime('%Y-%m-%d'))
+        if not self.projection:
+            return entries
+        return [{'entry': project(x['entry'], self.projection)} for x in entries]
 
-        return results, fetch_success
+    def _get_entry_params(self, ids: List[str], limit_include=True) -> Dict:
+        """Get entry API query params for a batch of MIMs"""
+        params = {'format': 'json', 'apiKey': self.api_key, 'mimNumber': ','.join(ids), 'include': 'all'}
+        if limit_include:
+            params['include'] = ['referenceList', 'externalLinks']
+        return params
 
     @staticmethod
-    def _request(url: str, params: Dict = {}, seed_run=False) -> Tuple[Dict, Optional[str]]:
+    def _check_batch(
+        ids_i: List[str], entries: List[Dict], err: Optional[str], seed_run: bool, n_fetched: int, n_ids: int
+    ) -> bool:
+        """Handle errors for a batch fetched by _fetch_ids()
+
+        :returns: False if fetching should stop because of rate limiting. Raises RuntimeError for any other errors.
+        """
+        if seed_run and (err or not entries):
+            _log_incomplete_seed_run()
+        if err == 'rate-limit':
+            LOG.warning(f'Records fetched: {n_fetched} of {n_ids}')
+            if seed_run:
+                LOG.warning(RATE_ERR_SEED_RUN)
+            else:
+                LOG.warning(RATE_ERR)
+            return False
+        elif err:
+            raise RuntimeError(err)
+        elif len(entries) != len(ids_i):
+            raise RuntimeError(f'Query on ids {ids_i} returned {len(entries)} results, but expected {len(ids_i)}.')
+        elif not entries:
+            raise RuntimeError(f'Query on ids {ids_i} returned no results.')
+        return True
+
+    def _request(self, url: str, params: Dict = {}, seed_run=False, quota_cost=0) -> Tuple[Dict, Optional[str]]:
         """Submit reques to OMIM API, and handle errors.
         todo: If error occurs, better pattern is probably raising error and including the data
+
+        :param quota_cost: Number of MIMs requested, which count against the daily quota.
         """
-        response = requests.get(url, params)
+        # Wait for rate limiter. If daily quota would be exceeded, treat same as the server's rate limit error
+        if not self.rate_limiter.acquire(quota_cost):
+            if seed_run:
+                _log_incomplete_seed_run()
+            return {}, 'rate-limit'
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        # Adapt rate: Slow down if any attempt, including ones that were retried, was throttled w/ a 429
+        retries: Optional[Retry] = getattr(response.raw, 'retries', None)
+        if response.status_code == 429 or (retries and any(x.status == 429 for x in retries.history)):
+            self.rate_limiter.on_throttle()
+        elif response.status_code < 400:
+            self.rate_limiter.on_success()
         if response.status_code >= 400:  # error
             if seed_run:
                 _log_incomplete_seed_run()
@@ -205,3 +401,70 @@ class OmimClient:
             return {}, response.text  # Halt execution because unexpected
 
         return response.json()['omim'], None
+
+
+@dataclass
+class ConcurrentOmimClient(OmimClient):
+    """OMIM API client that fetches several batches of MIMs at once, on threads
+
+    Same interface & results as OmimClient, and likewise synchronous: it uses threads, not asyncio / aiohttp, so it
+    doesn't need to be awaited or run in an event loop. Threads let it reuse OmimClient's requests session, retries,
+    and rate limiter as is. Batches of MIMs are requested up to `concurrency` at a time, on a thread pool that is shared
+    by the whole fetch. Requests share the session (w/ a connection pool sized to match) and rate limiter, so the
+    overall rate & daily quota are still respected.
+
+    Results are handled in batch order, as in OmimClient. Once a batch hits the rate limit, no more batches are
+    requested. Batches that were already in flight are still yielded if they succeeded, so that only the ones that
+    failed need to be fetched again.
+    """
+    concurrency: int = 4
+
+    def __post_init__(self):
+        if self.session is None:
+            self.session = get_session(self.max_retries, self.backoff_factor, pool_maxsize=self.concurrency)
+        super().__post_init__()
+
+    def _iter_ids(
+        self, ids: List[Union[int, str]], seed_run=False, limit_include=True
+    ) -> Generator[List[Dict], None, bool]:
+        """Fetch all MIMs, yielding each batch of entries. Batches are fetched `concurrency` at a time.
+
+        :returns: Whether the fetch completed w/out hitting the rate limit.
+        """
+        ids = [str(x) for x in ids] if ids and not isinstance(ids[0], str) else ids
+        batches: Deque[List[str]] = deque(ids[i:i + BATCH_SIZE] for i in range(0, len(ids), BATCH_SIZE))
+        rate_limited = threading.Event()
+
+        def fetch_batch(ids_i: List[str]) -> Tuple[Dict, Optional[str]]:
+            """Fetch a batch"""
+            response_dict, err = self._request(
+                self.entry_api_url, self._get_entry_params(ids_i, limit_include), seed_run, len(ids_i))
+            if err == 'rate-limit':
+                rate_limited.set()
+            return response_dict, err
+
+        n_fetched = 0
+        fetch_success = True
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            in_flight: Deque[Tuple[List[str], Future]] = deque()
+            while True:
+                while batches and len(in_flight) < self.concurrency and not rate_limited.is_set():
+                    ids_i = batches.popleft()
+                    in_flight.append((ids_i, executor.submit(fetch_batch, ids_i)))
+                if not in_flight:
+                    break
+                # Handle results in order
+                ids_i, future = in_flight.popleft()
+                response_dict, err = future.result()
+                entries: List[Dict] = response_dict.get('entryList', [])
+                n_fetched += BATCH_SIZE
+                if err == 'rate-limit':
+                    if fetch_success:  # log once
+                        self._check_batch(ids_i, entries, err, seed_run, n_fetched, len(ids))
+                    fetch_success = False
+                    continue
+                if entries:
+                    yield self._project_entries(entries)
+                self._check_batch(ids_i, entries, err, seed_run, n_fetched, len(ids))
+
+        return fetch_success
@@ -2,13 +2,15 @@
 import csv
 import logging
 from collections import defaultdict
-from typing import List, Dict, Set, Tuple, Union
+from functools import lru_cache
+from typing import Collection, Iterable, List, Dict, Sequence, Set, Tuple, Union
 
 import pandas as pd
 from rdflib import Graph, RDF, RDFS, DC, Literal, OWL, SKOS, URIRef
 
 from omim2obo.config import DATA_DIR, ReviewCase
 from omim2obo.omim_type import OmimType, get_omim_type
+from omim2obo.parsers.omim_txt_reader import MorbidMapAssociation
 from omim2obo.namespaces import *
 from omim2obo.utils.romanplus import *
 
@@ -53,6 +55,11 @@ def get_known_capitalizations() -> Dict[str, str]:
 
 
 CAPITALIZATION_REPLACEMENTS: Dict[str, str] = get_known_capitalizations()
+# Words which cleanup_title() always lowercases, unless they are the first word of the title
+CONJUNCTIONS = frozenset(['and', 'but', 'yet', 'for', 'nor', 'so'])
+LITTLE_PREPOSITIONS = frozenset(['at', 'by', 'in', 'of', 'on', 'to', 'up', 'as', 'it', 'or'])
+ARTICLES = frozenset(['a', 'an', 'the'])
+STOP_WORDS = CONJUNCTIONS | LITTLE_PREPOSITIONS | ARTICLES
 
 
 # todo: This isn't used in the ingest to create omim.ttl. Did this have some other use case?
@@ -160,15 +167,14 @@ def transform_entry(entry) -> Graph:
     return graph
 
 
+# Regular expressions used by detect_abbreviations()
+ACRONYMS_WITHOUT_PERIODS_REGEX = re.compile(r'[A-Z][A-Z0-9]+')
+ACRONYMS_WITH_PERIODS_REGEX = re.compile(r'[A-Z]\.([A-Z0-9]\.)+')
+TITLE_CASED_ABBREV_REGEX = re.compile(r'[A-Z][a-zA-Z]+\.')
+
+
 def detect_abbreviations(label: str, capitalization_threshold=0.75) -> List[str]:
     """Detect possible abbreviations / acronyms"""
-    # Compile regexp
-    # todo: handle several warnings: {1} redundant, {1,} simplified to +
-    acronyms_without_periods_compiler = re.compile('[A-Z]{1}[A-Z0-9]{1,}')
-    # todo: PyCharm flagged next 2 lines as invalid escape sequence, but this code seems to work? Should double check
-    acronyms_with_periods_compiler = re.compile('[A-Z]{1}\.([A-Z0-9]\.){1,}')
-    title_cased_abbrev_compiler = re.compile('[A-Z]{1}[a-zA-Z]{1,}\.')
-
     # Special threshold-based logic, because incoming data has highly inconsistent capitalization
     # is_largely_uppercase = synonym.upper() == synonym  # too many false positives
     fully_capitalized_count = 0
@@ -183,20 +189,55 @@ def detect_abbreviations(label: str, capitalization_threshold=0.75) -> List[str]
     if is_largely_uppercase:
         acronyms_without_periods = []  # can't infer because everything was uppercase
     else:
-        acronyms_without_periods: List[str] = acronyms_without_periods_compiler.findall(label)
-    title_cased_abbrevs: List[str] = title_cased_abbrev_compiler.findall(label)
-    acronyms_with_periods: List[str] = acronyms_with_periods_compiler.findall(label)
+        acronyms_without_periods: List[str] = ACRONYMS_WITHOUT_PERIODS_REGEX.findall(label)
+    title_cased_abbrevs: List[str] = TITLE_CASED_ABBREV_REGEX.findall(label)
+    acronyms_with_periods: List[str] = ACRONYMS_WITH_PERIODS_REGEX.findall(label)
 
     return acronyms_with_periods + acronyms_without_periods + title_cased_abbrevs
 
 
+def _cleanup_title_word(
+    wrd: str, is_first_word: bool, replacement_case_method: str, stop_words: Collection[str],
+    word_replacements: Dict[str, str],
+) -> str:
+    """Reformat a single word of a title. See: cleanup_title()"""
+    # convert the roman numerals to numbers,
+    # but assume that the first word is not
+    # a roman numeral (this permits things like "X inactivation"
+    if not is_first_word and romanNumeralPattern.match(wrd):
+        num = fromRoman(wrd)
+        # make the assumption that the number of syndromes are <100
+        # this allows me to retain "SYNDROME C"
+        # and not convert it to "SYNDROME 100"
+        if 0 < num < 100:
+            # get the non-roman suffix, if present.
+            # for example, IIIB or IVA
+            suffix = wrd.replace(toRoman(num), '', 1)
+            fixed = ''.join((str(num), suffix))
+            wrd = fixed
+    wrd = getattr(wrd, replacement_case_method)()
+    # replace interior conjunctions, prepositions, and articles with lowercase, always
+    if wrd in stop_words and not is_first_word:
+        wrd = wrd.lower()
+    if word_replacements:
+        wrd = word_replacements.get(wrd, wrd)
+    return wrd
+
+
+@lru_cache(maxsize=2**16)
+def _cleanup_title_word_cached(wrd: str, is_first_word: bool, replacement_case_method: str) -> str:
+    """Reformat a single word of a title, using the default stop words and replacements. See: cleanup_title()"""
+    return _cleanup_title_word(
+        wrd, is_first_word, replacement_case_method, STOP_WORDS, CAPITALIZATION_REPLACEMENTS)
+
+
 # todo: rename? It's doing more than cleaning; it's mutating
 def cleanup_title(
     title: str,
     replacement_case_method: str = 'lower',  # 'upper', 'title', 'lower', 'capitalize' (=sentence case)
-    conjunctions: List[str] = ['and', 'but', 'yet', 'for', 'nor', 'so'],
-    little_preps: List[str] = ['at', 'by', 'in', 'of', 'on', 'to', 'up', 'as', 'it', 'or'],
-    articles: List[str] = ['a', 'an', 'the'],
+    conjunctions: Collection[str] = CONJUNCTIONS,
+    little_preps: Collection[str] = LITTLE_PREPOSITIONS,
+    articles: Collection[str] = ARTICLES,
     word_replacements: Dict[str, str] = CAPITALIZATION_REPLACEMENTS,
 ) -> str:
     """Reformat the ALL CAPS OMIM labels to something more pleasant to read.
@@ -208,6 +249,9 @@ def cleanup_title(
     conjunctions, prepositions, and articles, which will always be lowercased. NOTE: The default for this is 'lower',
     meaning that this operation by default does nothing.
 
+    Titles across OMIM share a fairly small vocabulary, so the result for each word is cached when the default
+    stop words and `word_replacements` are used. In that case the cost per title is mostly cache lookups.
+
     Assumptions:
     1. All acronyms are capitalized
 
@@ -240,39 +284,40 @@ def cleanup_title(
        e.g.: Balint syndrome, Barre-Lieou syndrome, Wallerian degeneration, etc.
        How to do this? Simply get/create a list of known eponyms? Is this feasible?
     """
-    fixedwords = []
-    i = 0
-    for wrd in title.split():
-        i += 1
-        # convert the roman numerals to numbers,
-        # but assume that the first word is not
-        # a roman numeral (this permits things like "X inactivation"
-        if i > 1 and re.match(romanNumeralPattern, wrd):
-            num = fromRoman(wrd)
-            # make the assumption that the number of syndromes are <100
-            # this allows me to retain "SYNDROME C"
-            # and not convert it to "SYNDROME 100"
-            if 0 < num < 100:
-                # get the non-roman suffix, if present.
-                # for example, IIIB or IVA
-                suffix = wrd.replace(toRoman(num), '', 1)
-                fixed = ''.join((str(num), suffix))
-                wrd = fixed
-        wrd = getattr(wrd, replacement_case_method)()
-        # replace interior conjunctions, prepositions, and articles with lowercase, always
-        if wrd in (conjunctions + little_preps + articles) and i != 1:
-            wrd = wrd.lower()
-        if word_replacements:
-            wrd = word_replacements.get(wrd, wrd)
-        fixedwords.append(wrd)
+    words: List[str] = title.split()
+    if conjunctions is CONJUNCTIONS and little_preps is LITTLE_PREPOSITIONS and articles is ARTICLES \
+            and word_replacements is CAPITALIZATION_REPLACEMENTS:
+        fixedwords = [_cleanup_title_word_cached(wrd, i == 0, replacement_case_method) for i, wrd in enumerate(words)]
+    else:
+        stop_words = frozenset(conjunctions) | frozenset(little_preps) | frozenset(articles)
+        fixedwords = [
+            _cleanup_title_word(wrd, i == 0, replacement_case_method, stop_words, word_replacements)
+            for i, wrd in enumerate(words)]
     label_newcase = ' '.join(fixedwords)
 
     return label_newcase
 
 
-def recapitalize_acronyms_in_title(title: str, known_abbrevs: Set[str] = None, capitalization_threshold=0.75) -> str:
+def get_abbrev_lookup(abbrevs: Iterable[str]) -> Dict[str, str]:
+    """Get lookup of lowercased abbreviations to their original capitalization
+
+    If more than 1 abbreviation lowercases to the same string, the last in sort order is used, so that the result
+    doesn't depend on the order of `abbrevs`, e.g. of a set.
+    """
+    return {abbrev.lower(): abbrev for abbrev in sorted(abbrevs)}
+
+
+def recapitalize_acronyms_in_title(
+    title: str, known_abbrevs: Union[Set[str], Dict[str, str]] = None, capitalization_threshold=0.75
+) -> str:
     """Re-capitalize acronyms / words based on information contained w/in original label
 
+    :param known_abbrevs: Abbreviations known to be associated w/ the title, e.g. the symbols for its MIM. Can also be
+     passed as a lookup created by get_abbrev_lookup(). This is faster when the same abbreviations are used for several
+     titles, as the lookup only needs to be built once. Where a known and an inferred abbreviation (detected in the
+     title itself) lowercase to the same word, the known one is used. Ties among either are resolved as in
+     get_abbrev_lookup().
+
     todo: If title has been used on cleanup_title() using a replacement_case_method other than the non-default 'lower',
      then the .replace() operation will not work. To solve, this (a) capture the replacement_case_method used and
      pass that here, or (b) duplicate the .replace() line and call it on alternative casing variations (.title() and
@@ -286,28 +331,23 @@ def recapitalize_acronyms_in_title(title: str, known_abbrevs: Set[str] = None, c
       part. It is also possible to improve detect_abbreviations() by considering some of thes eother possible example
       cases above.
     """
-    inferred_abbrevs: Set[str] = set(detect_abbreviations(title, capitalization_threshold))
-    abbrevs: Set[str] = known_abbrevs.union(inferred_abbrevs)
-    if not abbrevs:
+    known_abbrev_lookup: Dict[str, str] = known_abbrevs if isinstance(known_abbrevs, dict) \
+        else get_abbrev_lookup(known_abbrevs or [])
+    inferred_abbrevs: List[str] = detect_abbreviations(title, capitalization_threshold)
+    abbrev_lookup: Dict[str, str] = {**get_abbrev_lookup(inferred_abbrevs), **known_abbrev_lookup} \
+        if inferred_abbrevs else known_abbrev_lookup
+    if not abbrev_lookup:
         return title
-    title2_words: List[str] = []
-    for word in title.split():
-        abbrev_match = False
-        for abbrev in abbrevs:
-            if abbrev.lower() == word:
-                title2_words.append(abbrev)
-                abbrev_match = True
-                break
-        if not abbrev_match:
-            title2_words.append(word)
-    title2 = ' '.join(title2_words)
+    title2 = ' '.join([abbrev_lookup.get(word, word) for word in title.split()])
     return title2
 
 
 def recapitalize_acronyms_in_titles(
-    titles: Union[str, List[str]], known_abbrevs: Set[str] = None, capitalization_threshold=0.75
+    titles: Union[str, List[str]], known_abbrevs: Union[Set[str], Dict[str, str]] = None, capitalization_threshold=0.75
 ) -> Union[str, List[str]]:
     """Re-capitalize acronyms in a list of titles"""
+    if known_abbrevs is not None and not isinstance(known_abbrevs, dict):
+        known_abbrevs = get_abbrev_lookup(known_abbrevs)
     if isinstance(titles, str):
         return recapitalize_acronyms_in_title(titles, known_abbrevs, capitalization_threshold)
     return [recapitalize_acronyms_in_title(title, known_abbrevs, capitalization_threshold) for title in titles]
@@ -321,7 +361,7 @@ def remove_included_and_formerly_suffixes(title: str) -> str:
 
 
 def separate_former_titles_and_symbols(
-    titles: List[str], symbols: List[str]
+    titles: Sequence[str], symbols: Sequence[str]
 ) -> Tuple[List[str], List[str], List[str], List[str]]:
     """Separate current title/symbols from deprecated (marked 'former') ones"""
     former_titles = [x for x in titles if ', FORMERLY' in x.upper()]
@@ -331,7 +371,7 @@ def separate_former_titles_and_symbols(
     return current_titles, current_symbols, former_titles, former_symbols
 
 
-def clean_alt_and_included_titles(titles: List[str], symbols: List[str]) -> Tuple[List[str], List[str]]:
+def clean_alt_and_included_titles(titles: Sequence[str], symbols: Sequence[str]) -> Tuple[List[str], List[str]]:
     """Remove ', INCLUDED' and ', FORMERLY' suffixes from titles/symbols & misc title reformatting"""
     # remove ', included' and ', formerly', if present
     titles2 = [remove_included_and_formerly_suffixes(x) for x in titles]
@@ -371,15 +411,22 @@ def parse_title_symbol_pairs(title_symbol_pairs_str: str) -> Tuple[List[str], Li
 
 def get_alt_and_included_titles_and_symbols(title_symbol_pair_str) -> Tuple[List[str], List[str], List[str], List[str]]:
     """Separates different types of titles/symbols, and cleans them."""
-    titles: List[str] = []
-    symbols: List[str] = []
-    former_titles: List[str] = []
-    former_symbols: List[str] = []
-    if title_symbol_pair_str:
-        titles, symbols = parse_title_symbol_pairs(title_symbol_pair_str)
-        titles, symbols, former_titles, former_symbols = separate_former_titles_and_symbols(titles, symbols)
-        titles, symbols = clean_alt_and_included_titles(titles, symbols)
-        former_titles, former_symbols = clean_alt_and_included_titles(former_titles, former_symbols)
+    if not title_symbol_pair_str:
+        return [], [], [], []
+    titles, symbols = parse_title_symbol_pairs(title_symbol_pair_str)
+    return separate_and_clean_titles_and_symbols(titles, symbols)
+
+
+def separate_and_clean_titles_and_symbols(
+    titles: Sequence[str], symbols: Sequence[str]
+) -> Tuple[List[str], List[str], List[str], List[str]]:
+    """Separates already split titles/symbols into current & former, and cleans them.
+
+    Used w/ the pre-split alternative & included titles/symbols of a MimTitleRecord.
+    """
+    titles, symbols, former_titles, former_symbols = separate_former_titles_and_symbols(titles, symbols)
+    titles, symbols = clean_alt_and_included_titles(titles, symbols)
+    former_titles, former_symbols = clean_alt_and_included_titles(former_titles, former_symbols)
     return titles, symbols, former_titles, former_symbols
 
 
@@ -429,14 +476,14 @@ def get_process_allelic_variants(entry) -> List:
     return []
 
 
-def get_self_ref_assocs(phenotype_mim: str, gene_phenotypes: Dict[str, Dict]) -> List[Dict]:
+def get_self_ref_assocs(phenotype_mim: str, gene_phenotypes: Dict[str, Dict]) -> List[MorbidMapAssociation]:
     """Find any cases where it appears that there is a self-referential gene-disease association"""
     if phenotype_mim not in gene_phenotypes:
         return []
-    _assocs = gene_phenotypes[phenotype_mim]['phenotype_associations']
+    _assocs: List[MorbidMapAssociation] = gene_phenotypes[phenotype_mim]['phenotype_associations']
     _self_ref_assocs = []
     for _assoc in _assocs:
-        if not _assoc['phenotype_mim_number']:
+        if not _assoc.phenotype_mim:
             _self_ref_assocs.append(_assoc)
     return _self_ref_assocs
 
@@ -450,12 +497,13 @@ def _add_to_review_tsv(class_code: int, value: str):
     })
 
 
-def log_review_cases(
-    p_mim: str, p_lab: str, p_map_key: str, gene_mim: str, gene_phenotypes: Dict[str, Dict],
-    omim_types: Dict[str, str]
-):
-    """Log cases that need to be reviewed"""
+def log_review_cases(assoc: MorbidMapAssociation, gene_phenotypes: Dict[str, Dict], omim_types: Dict[str, str]):
+    """Log cases that need to be reviewed
+
+    :param assoc: The phenotype-gene association to review.
+    """
     global REVIEW_SELF_REF_CASE_I
+    p_mim, p_lab, p_map_key, gene_mim = assoc.phenotype_mim, assoc.phenotype_label, assoc.mapping_key, assoc.gene_mim
     p_lab_lower: str = p_lab.lower()
     basic_review_info = f"(Phenotype: {p_mim} {p_lab}), (Map key: {p_map_key}), (Gene: {gene_mim})"
 
@@ -466,13 +514,13 @@ def log_review_cases(
     if 'somatic' in p_lab_lower:
         _add_to_review_tsv(3, basic_review_info)
     # - Self-referential cases
-    self_ref_assocs: List[Dict] = get_self_ref_assocs(p_mim, gene_phenotypes)
+    self_ref_assocs: List[MorbidMapAssociation] = get_self_ref_assocs(p_mim, gene_phenotypes)
     if self_ref_assocs:
         REVIEW_SELF_REF_CASE_I += 1
         _add_to_review_tsv(2, f"{REVIEW_SELF_REF_CASE_I}: {basic_review_info}")
     for self_ref_assoc in self_ref_assocs:
-        _add_to_review_tsv(2, f"{REVIEW_SELF_REF_CASE_I}: (Phenotype: {self_ref_assoc['phenotype_label']}), (Map key: "
-            f"{self_ref_assoc['phenotype_mapping_info_key']}), (Gene: {p_mim})", )
+        _add_to_review_tsv(2, f"{REVIEW_SELF_REF_CASE_I}: (Phenotype: {self_ref_assoc.phenotype_label}), (Map key: "
+            f"{self_ref_assoc.mapping_key}), (Gene: {p_mim})", )
     # - Unexpected non-phenotype MIM types
     p_mim_type: str = omim_types[p_mim]  # Allowable: PHENOTYPE, HERITABLE_PHENOTYPIC_MARKER (#, %)
     mim_type_err = f"(Phenotype MIM type {p_mim_type}), {basic_review_info}"
@@ -1,66 +1,61 @@
 """Text parsing utilities"""
+import hashlib
+import itertools
 import logging
 import os
+import pickle
 import sys
 from collections import defaultdict
 from datetime import datetime, timedelta
 from pathlib import PosixPath
-from typing import List, Dict, Set, Tuple, Union
+from typing import Iterable, Iterator, List, Dict, Optional, Set, Tuple, Union
 
-import requests
 import re
 import pandas as pd
 
-from omim2obo.config import CACHE_INCOMPLETENESS_INDICATOR_PATH, CACHE_LAST_UPDATED_PATH, CONFIG, DATA_DIR, \
-    DISEASE_GENE_PROTECTED_PATH, HGNC_DATA_PATH, \
-    MAPPINGS_PATH, \
-    PUBMED_REFS_PATH
+from omim2obo.config import CACHE_DB_PATH, CACHE_FETCH_JOURNAL_PATH, CACHE_INCOMPLETENESS_INDICATOR_PATH, \
+    CACHE_LAST_UPDATED_PATH, CONFIG, DATA_DIR, DISEASE_GENE_PROTECTED_PATH, HGNC_DATA_PATH, \
+    MAPPINGS_PATH, MONDO_OMIM_SSSOM_PATH, PUBMED_REFS_PATH
+from omim2obo.build_cache import hash_file
+from omim2obo.downloads import HGNC_URL, MONDO_OMIM_SSSOM_URL, OMIM_FILES, SourceFile, download_file, prefetch, \
+    verify_hgnc, verify_not_html, verify_sssom
+from omim2obo.entry_cache import EntryCacheDb, FetchJournal
 from omim2obo.namespaces import ORPHANET, RO, UMLS
-from omim2obo.omim_client import OmimClient
+from omim2obo.omim_client import ENTRY_PROJECTION, ConcurrentOmimClient, OmimClient
 from omim2obo.omim_type import OmimType
 from omim2obo.parsers.omim_entry_parser import get_mapped_ids, get_pubs
+from omim2obo.parsers.omim_txt_reader import MIM_FILE_ROW_TYPES, MORBIDMAP_PHENOTYPE_MAPPING_KEY_MEANINGS, \
+    MORBIDMAP_PHENOTYPE_REGEX, Mim2GeneRow, MimFileRow, MimTitlesRow, MorbidMapAssociation, MorbidMapRow, \
+    PhenotypicSeriesRow, make_mim_file_row, read_mim_file_columns, read_mim_file_lines, read_mim_file_rows, \
+    to_mim_file_rows
+from omim2obo.utils.utils import ProtectedAssociation, get_protected_associations
 
 
 LOG = logging.getLogger('omim2obo.parser.omim_titles_parser')
+HGNC_CACHE_SUFFIX = '.id-symbol.pickle'
 # MIM_NUMBER_DIGITS = 6  # if you see '6' in a regexp, this is what it refers to
-# MORBIDMAP_PHENOTYPE_MAPPING_KEY_MEANINGS: The Monarch Ingest and Kevin S have identified some ECO properties that
-# ...probably apply to each of these. See:
-# https://github.com/monarch-initiative/monarch-ingest/blob/main/monarch_ingest/ingests/omim/omim-translation.yaml
-# "1": "inference from background scientific knowledge used in manual assertion"
-# "2": "genomic context evidence"
-# "3": "sequencing assay evidence"
-# "4": "sequencing assay evidence"
-MORBIDMAP_PHENOTYPE_MAPPING_KEY_MEANINGS = {
-    '1': 'The disorder is placed on the map based on its association with a gene, but the underlying defect is '
-         'not known.',
-    '2': 'The disorder has been placed on the map by linkage or other statistical method; no mutation has '
-         'been found.',
-    '3': 'The molecular basis for the disorder is known; a mutation has been found in the gene.',
-    '4': 'A contiguous gene deletion or duplication syndrome, multiple genes are deleted or duplicated causing '
-         'the phenotype.',
-}
 # todo: double check / handle edge cases if/as needed for any concerns:
 #  - https://github.com/monarch-initiative/omim/issues/79#issuecomment-1319408780
 # MORBIDMAP_PHENOTYPE_MAPPING_KEY_PREDICATES
 # - Gene-to-Disease predicates
 # - Provenance https://github.com/monarch-initiative/omim/issues/79#issuecomment-1319408780
 MORBIDMAP_PHENOTYPE_MAPPING_KEY_PREDICATES = {
-    '1': None,  # association with unknown defect
+    1: None,  # association with unknown defect
     # RO:0003303 (causes condition)
     # A relationship between an entity (e.g. a genotype, genetic variation, chemical, or environmental exposure) and a
     # condition (a phenotype or disease), where the entity has some causal role for the condition.
     # https://www.ebi.ac.uk/ols/ontologies/ro/properties?iri=http://purl.obolibrary.org/obo/RO_0003303
-    '2': RO['0003303'],
+    2: RO['0003303'],
     # RO:0004013 (is causal germline mutation in)
     # Relates a gene to condition, such that a mutation in this gene is sufficient to produce the condition and that
     # can be passed on to offspring[modified from orphanet].
     # https://www.ebi.ac.uk/ols/ontologies/ro/properties?iri=http://purl.obolibrary.org/obo/RO_0004013
-    '3': RO['0004013'],
+    3: RO['0004013'],
     # RO:0003304 (contributes to condition)
     # A relationship between an entity (e.g. a genotype, genetic variation, chemical, or environmental exposure) and a
     # condition (a phenotype or disease), where the entity has some contributing role that influences the condition.
     # https://www.ebi.ac.uk/ols/ontologies/ro/properties?iri=http://purl.obolibrary.org/obo/RO_0003304
-    '4': RO['0003304'],
+    4: RO['0003304'],
 }
 
 # RO:0003302 (causes or contributes to condition)
@@ -121,80 +116,128 @@ def convert_txt_to_tsv(file_name: str):
     df.to_csv(mim_file_tsv_path, sep='\t', index=False)
 
 
+def _hash_file_stats(paths: List[Union[str, PosixPath]]) -> str:
+    """SHA-256 of files' sizes & modification times. Cheap, as the files aren't read, but changes if only touched."""
+    stats = [(str(x), os.stat(x).st_size, os.stat(x).st_mtime_ns) if os.path.exists(x) else (str(x),) for x in paths]
+    return hashlib.sha256(repr(stats).encode()).hexdigest()
+
+
+def _get_protected_hgnc_symbol(
+    x: ProtectedAssociation, hgnc_id_symbols: Dict[str, str], protected_path: Union[str, PosixPath],
+    hgnc_path: Union[str, PosixPath],
+) -> str:
+    """Get HGNC symbol of a protected row's gene"""
+    symbol: Optional[str] = hgnc_id_symbols.get(f'HGNC:{x.hgnc_id}')
+    if symbol is None:
+        raise RuntimeError(f'HGNC ID of protected row not in {hgnc_path}: {x}. Protection file: {protected_path}')
+    return symbol
+
+
 def update_mim_file_with_protected(
-    file_name: str, inpath: str, outpath: str, protected_path=DISEASE_GENE_PROTECTED_PATH
-):
+    file_name: str, inpath: str, outpath: str, protected_path=DISEASE_GENE_PROTECTED_PATH,
+    mim_titles: Dict[str, 'MimTitleRecord'] = None, hgnc_path=HGNC_DATA_PATH,
+    mim_titles_path=DATA_DIR / 'mimTitles.txt',
+) -> bool:
     """Update the files downloaded from OMIM to add information we've set in protected-disease-gene.tsv
 
     Information about this 'protected' file can be found in the docs (README.md).
 
+    The file's rows are read once, and written out as they are. Protected associations are anti-joined against the
+    rows' keys, and the rest are appended as new rows. The output has no header, so that it can be read like the
+    original .txt file. Its only comment is its first line, which has a hash of its inputs, and of their sizes &
+    modification times: If they haven't changed since it was written, it is not written again. The inputs are only
+    hashed if their sizes or modification times changed.
+
     mim2gene.txt: As of 2025/03/05, it turned out there were no missing rows in this file. So this code is here now more
     for futureproofing purposes.
 
-    todo: Consider handling situation where protection file is intended only to protect a phenotype without stipulation
-     of gene. That is, if the gene column is empty, skip to avoid error here: gene_mim = row['gene_mim'].split(':')[1]
-    """
-    outpath_with_header = outpath.replace('.tsv', '-with-header.tsv')
-    df = pd.read_csv(inpath, comment='#', sep='\t', dtype=str).fillna('')
-    df['is_added_protection'] = False
-    prot_df = pd.read_csv(protected_path, sep='\t').fillna('')
-    hgnc_id_symbols: Dict[str, str] = get_hgnc_id_symbol_map()
+    Rows of the protection file w/out a gene, i.e. that only protect a phenotype, are skipped.
 
+    :param inpath: The file as downloaded from OMIM.
+    :param mim_titles: Parsed mimTitles.txt, if the build already has it. Used for the phenotype labels of new
+     morbidmap.txt rows. If not given, it is parsed from disk.
+    :param mim_titles_path: Where mim_titles comes from. Only matters for morbidmap.txt.
+    :returns: True if the output was written, False if it was already up to date or the file has no protected rows.
+    :raises RuntimeError: If a protected row's phenotype MIM isn't in mimTitles.txt, or its HGNC ID isn't in the HGNC
+     complete set.
+    """
+    if file_name not in ('morbidmap.txt', 'mim2gene.txt'):
+        return False  # no alterations needed for this file type
+    input_paths = [inpath, protected_path, hgnc_path] + ([mim_titles_path] if file_name == 'morbidmap.txt' else [])
+    previous_inputs_line = ''
+    if os.path.exists(outpath):
+        with open(outpath, 'r') as f:
+            previous_inputs_line = f.readline().rstrip('\n')
+    stats_hash: str = _hash_file_stats(input_paths)
+    if previous_inputs_line.endswith(f'. Input stats: {stats_hash}'):
+        return False
+    inputs_hash: str = hashlib.sha256(
+        '\t'.join([file_name] + [str(hash_file(x)) for x in input_paths]).encode()).hexdigest()
+    inputs_line = f'# Protected rows added. Inputs: {inputs_hash}. Input stats: {stats_hash}'
+    if previous_inputs_line.startswith(f'# Protected rows added. Inputs: {inputs_hash}. '):
+        # - Inputs touched, but unchanged, e.g. re-downloaded: only the stats are updated. Same length, so in place.
+        with open(outpath, 'r+') as f:
+            f.write(inputs_line)
+        return False
+
+    lines: List[str] = list(read_mim_file_lines(inpath))
+    rows: Iterator[Optional[MimFileRow]] = (
+        make_mim_file_row(MIM_FILE_ROW_TYPES[file_name], line.split('\t')) for line in lines)
+    protected: List[ProtectedAssociation] = [
+        x for x in get_protected_associations(protected_path).associations if x.gene_mim]
+    hgnc_id_symbols: Dict[str, str] = get_hgnc_id_symbol_map(hgnc_path)
+    new_lines: List[str] = []
     if file_name == 'morbidmap.txt':
-        new_prot_rows = []
-        for _index, row in prot_df.iterrows():
-            phenotype_mim = row['phenotype_mim'].split(':')[1]
-            gene_mim = row['gene_mim'].split(':')[1]
-            symbol = hgnc_id_symbols[row['hgnc_id']]
-            # Disallow dupes
-            gene_phenos = parse_morbid_map(read_mim_file_as_lines(inpath.replace('.tsv', '.txt')))
-            pheno_genes = get_phenotype_genes(gene_phenos)
-            pheno_genes_flatter = [[
-                (p_mim, assoc['mapping_key'], assoc['gene_id']) for assoc in assocs]
-                for p_mim, assocs in pheno_genes.items()]
-            # - existing_records: Set[Tuple[pheno_mim, mapping_key, gene_mim]]
-            existing_records: Set[Tuple[str, str, str]] = set([x for sublist in pheno_genes_flatter for x in sublist])
-            if (phenotype_mim, '3', gene_mim) in existing_records:  # mapping_key 3 = disease defining
+        # Disallow dupes: Anti-join w/ existing disease defining (mapping key 3) associations
+        existing: Set[Tuple[str, str]] = set()
+        for row in rows:
+            match = MORBIDMAP_PHENOTYPE_REGEX.match(row.phenotype) if row else None
+            if match and match.group(3) == '3':
+                existing.add((match.group(2), row.mim_number.strip()))
+        if mim_titles is None:
+            mim_titles, _ = parse_mim_titles(read_mim_file_rows(mim_titles_path, MimTitlesRow))
+        for x in protected:
+            if (x.phenotype_mim, x.gene_mim) in existing:
                 continue
+            existing.add((x.phenotype_mim, x.gene_mim))
             # Construct phenotype field
-            labels_df = pd.read_csv(DATA_DIR / 'mimTitles.tsv', sep='\t', comment='#')
-            mim_label_map: Dict[str, str] = dict(
-                zip(labels_df['MIM Number'].astype(str), labels_df['Preferred Title; symbol']))
-            phenotype_label = mim_label_map[phenotype_mim].capitalize()  # not perfect case, but fine for our purposes
-            phenotype_field = f'{phenotype_label}, {phenotype_mim} (3)'
-            new_prot_rows.append({
-                'Phenotype': phenotype_field,
-                'Gene/Locus And Other Related Symbols': symbol,  # not comprehensive or strictly needed for our purposes
-                'MIM Number': gene_mim,
-                'Cyto Location': '',  # don't have this information; not needed for our purposes
-                'is_added_protection': True,
-            })
-        df = pd.concat([df, pd.DataFrame(new_prot_rows)], ignore_index=True)
-    elif file_name == 'mim2gene.txt':
-        existing_records: Set[Tuple[str, str]] = set(
-            zip(df['MIM Number'].astype(str), df['Approved Gene Symbol (HGNC)']))
-        new_prot_rows = []
-        for _index, row in prot_df.iterrows():
-            gene_mim = row['gene_mim'].split(':')[1]
-            symbol = hgnc_id_symbols[row['hgnc_id']]
-            if (gene_mim, symbol) in existing_records:
+            # - not perfect case, but fine for our purposes
+            if x.phenotype_mim not in mim_titles:
+                raise RuntimeError(
+                    f'Phenotype MIM of protected row not in {mim_titles_path}: {x}. Protection file: {protected_path}')
+            title: MimTitleRecord = mim_titles[x.phenotype_mim]
+            phenotype_label = '; '.join((title.pref_title, *title.pref_symbols)).capitalize()
+            symbol: str = _get_protected_hgnc_symbol(x, hgnc_id_symbols, protected_path, hgnc_path)
+            new_lines.append('\t'.join([
+                f'{phenotype_label}, {x.phenotype_mim} (3)',
+                symbol,  # Gene/Locus And Other Related Symbols: not comprehensive
+                x.gene_mim,
+                '',  # Cyto Location: don't have this information; not needed for our purposes
+            ]))
+    else:  # mim2gene.txt
+        existing: Set[Tuple[str, str]] = set((row.mim_number, row.hgnc_symbol) for row in rows if row)
+        for x in protected:
+            symbol: str = _get_protected_hgnc_symbol(x, hgnc_id_symbols, protected_path, hgnc_path)
+            if (x.gene_mim, symbol) in existing:
                 continue
-            new_prot_rows.append({
-                'MIM Number': gene_mim,
-                # Not sure if 'gene/phenotype' is more technically correct, but for our pruposes, shouldn't matter.
-                'MIM Entry Type (see FAQ 1.3 at https://omim.org/help/faq)': 'gene',
-                'Entrez Gene ID (NCBI)': '',  # don't have this information; not needed for our purposes
-                'Approved Gene Symbol (HGNC)': symbol,
-                'Ensembl Gene ID (Ensembl)': '',  # don't have this information; not needed for our purposes
-                'is_added_protection': True,
-            })
-        df = pd.concat([df, pd.DataFrame(new_prot_rows)], ignore_index=True)
-    else:
-        return  # no alterations needed for this file type
-
-    df = df.astype(str)
-    df.drop(columns=['is_added_protection']).to_csv(outpath, sep='\t', index=False, header=False)
-    df.to_csv(outpath_with_header, sep='\t', index=False)
+            existing.add((x.gene_mim, symbol))
+            new_lines.append('\t'.join([
+                x.gene_mim,
+                # Entry type: Not sure if 'gene/phenotype' is more technically correct, but for our pruposes,
+                # shouldn't matter.
+                'gene',
+                '',  # Entrez Gene ID (NCBI): don't have this information; not needed for our purposes
+                symbol,  # Approved Gene Symbol (HGNC)
+                '',  # Ensembl Gene ID (Ensembl): don't have this information; not needed for our purposes
+            ]))
+
+    tmp_path = str(outpath) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(inputs_line + '\n')
+        for line in itertools.chain(lines, new_lines):
+            f.write(line + '\n')
+    os.replace(tmp_path, outpath)
+    return True
 
 
 def read_mim_file_as_lines(path) -> List[str]:
@@ -207,56 +250,98 @@ def read_mim_file_as_lines(path) -> List[str]:
         return lines
 
 
+def get_mim_file_url(file_name: str) -> str:
+    """Get URL of OMIM downloadable text file"""
+    # todo: This doesn't work for genemap2.txt. But does the previous URL work? If so, why not just use that?
+    if file_name == 'mim2gene.txt':
+        return f'https://omim.org/static/omim/data/{file_name}'
+    return f'https://data.omim.org/downloads/{CONFIG["DOWNLOAD_KEY"]}/{file_name}'
+
+
+def prefetch_source_files(mirror_dir: Union[str, PosixPath] = None, missing_only=False) -> Dict[PosixPath, bool]:
+    """Download all source files concurrently: the OMIM text files, HGNC complete set, and Mondo's OMIM SSSOM mappings.
+
+    OMIM text files that changed are converted to TSV. Afterward, get_mim_file() can be used w/ download=False.
+
+    :param mirror_dir: If given, files are copied from this directory instead of downloaded, e.g. for offline tests.
+    :param missing_only: If True, only files that don't exist yet are fetched, e.g. when using the cache. Optional
+     files that can't be fetched, i.e. Mondo's OMIM SSSOM mappings, are then only warned about, e.g. when offline.
+    :returns: Whether each fetched file changed, by path.
+    """
+    omim_files = [x for x in OMIM_FILES if not (missing_only and os.path.exists(DATA_DIR / x))]
+    sources: List[SourceFile] = [
+        *[SourceFile(get_mim_file_url(x), DATA_DIR / x, verify_not_html) for x in omim_files],
+        SourceFile(HGNC_URL, HGNC_DATA_PATH, verify_hgnc),
+        SourceFile(MONDO_OMIM_SSSOM_URL, MONDO_OMIM_SSSOM_PATH, verify_sssom, optional=True),
+    ]
+    if missing_only:
+        sources = [x for x in sources if not os.path.exists(x.path)]
+    changed: Dict[PosixPath, bool] = {}
+    if sources:
+        print('Fetching source files' + (f' from mirror {mirror_dir}' if mirror_dir else '') + '...')
+        changed = prefetch(sources, mirror_dir, allow_optional_missing=missing_only)
+    for file_name in OMIM_FILES:
+        if changed.get(DATA_DIR / file_name) or not os.path.exists(str(DATA_DIR / file_name).replace('.txt', '.tsv')):
+            convert_txt_to_tsv(file_name)
+    return changed
+
+
 def get_mim_file(
-    file_name: str, download=False, return_df=False, include_protected=True
+    file_name: str, download=False, return_df=False, include_protected=True,
+    mim_titles: Dict[str, 'MimTitleRecord'] = None,
 ) -> Union[List[str], pd.DataFrame]:
     """Retrieve OMIM downloadable text file from the OMIM download server
 
     :param return_df: If False, returns List[str] of each line in the file, else a DataFrame.
-    :param include_protected: Only matters if file_name is in files_to_include_protected.
+    :param include_protected: Only matters for files that have protected entries: morbidmap.txt and mim2gene.txt.
+    :param mim_titles: Parsed mimTitles.txt, if already available. Saves re-parsing it when adding protected rows.
     """
-    files_to_include_protected = ('morbidmap.txt', 'mim2gene.txt')
     file_name = file_name if file_name.endswith('.txt') else file_name + '.txt'
     mim_file_path: PosixPath = DATA_DIR / file_name
     mim_file_tsv_path: str = str(mim_file_path).replace('.txt', '.tsv')
-    protected_added_path: str = mim_file_tsv_path.replace('.tsv', '-protected-added.tsv')
 
     if download:
         print(f'Downloading {file_name} from OMIM...')
-        url = f'https://data.omim.org/downloads/{CONFIG["DOWNLOAD_KEY"]}/{file_name}'
-        # todo: This doesn't work for genemap2.txt. But does the previous URL work? If so, why not just use that?
-        if file_name == 'mim2gene.txt':
-            url = f'https://omim.org/static/omim/data/{file_name}'
-        resp = requests.get(url)
-        if resp.status_code == 200:
-            text = resp.text
-            if not text.startswith('<!DOCTYPE html>'):
-                # Save
-                with open(mim_file_path, 'w') as fout:
-                    fout.write(text)
-                convert_txt_to_tsv(file_name)
-            else:
-                raise RuntimeError('Unexpected response: ' + text)
+        changed: bool = download_file(get_mim_file_url(file_name), mim_file_path, verify=verify_not_html)
+        if changed or not os.path.exists(mim_file_tsv_path):
+            convert_txt_to_tsv(file_name)
         else:
-            msg = 'Response from server: ' + resp.text
-            # LOG.warning(msg)
-            # with open(mim_file, 'r') as fin:
-            #     lines = fin.readlines()
-            # LOG.warning('Failed to retrieve mimTitles.txt. Using the cached file.')
-            raise RuntimeError(msg)
-
-    # Update w/ protected entries
-    if file_name in files_to_include_protected:
-        update_mim_file_with_protected(file_name, mim_file_tsv_path, protected_added_path)
-    use_protected_file = include_protected and file_name in files_to_include_protected and \
-        os.path.exists(protected_added_path)
+            print(f'{file_name} unchanged since last download')
 
+    protected_added_path: Optional[str] = _get_protected_added_path(file_name, include_protected, mim_titles)
     if return_df:
-        read_path: str = protected_added_path if use_protected_file else mim_file_tsv_path
-        return pd.read_csv(read_path, comment='#', sep='\t')
+        return pd.read_csv(protected_added_path or mim_file_tsv_path, comment='#', sep='\t')
     else:
-        read_path: str = protected_added_path if use_protected_file else mim_file_path
-        return read_mim_file_as_lines(read_path)
+        return read_mim_file_as_lines(protected_added_path or mim_file_path)
+
+
+def get_mim_file_rows(
+    file_name: str, include_protected=True, mim_titles: Dict[str, 'MimTitleRecord'] = None,
+) -> Iterator[MimFileRow]:
+    """Lazily read a downloaded OMIM text file as typed rows, e.g. MorbidMapRow for morbidmap.txt.
+
+    Like get_mim_file(), but the file is memory-mapped and split into rows as they are consumed, rather than read into a
+    list of lines.
+    """
+    file_name = file_name if file_name.endswith('.txt') else file_name + '.txt'
+    protected_added_path: Optional[str] = _get_protected_added_path(file_name, include_protected, mim_titles)
+    return read_mim_file_rows(protected_added_path or DATA_DIR / file_name, MIM_FILE_ROW_TYPES[file_name])
+
+
+def _get_protected_added_path(
+    file_name: str, include_protected=True, mim_titles: Dict[str, 'MimTitleRecord'] = None,
+) -> Optional[str]:
+    """Update w/ protected entries, if the file is one of those that has them
+
+    :returns: Path of the file w/ protected entries added, if it should be read instead of the original, else None.
+    """
+    files_to_include_protected = ('morbidmap.txt', 'mim2gene.txt')
+    if file_name not in files_to_include_protected:
+        return None
+    mim_file_path: PosixPath = DATA_DIR / file_name
+    protected_added_path: str = str(mim_file_path).replace('.txt', '-protected-added.tsv')
+    update_mim_file_with_protected(file_name, str(mim_file_path), protected_added_path, mim_titles=mim_titles)
+    return protected_added_path if include_protected and os.path.exists(protected_added_path) else None
 
 
 def parse_mim_genes(lines):
@@ -308,13 +393,69 @@ def parse_omim_id(omim_id, log_success_case_warnings=False):
         return None
 
 
-def parse_mim_titles(lines) -> Tuple[Dict[str, Tuple[OmimType, str, str, str]], Dict[str, List[str]]]:
+class MimTitleRecord:
+    """Titles & symbols for a MIM in mimTitles.txt, split once at parse time.
+
+    mimTitles.txt packs each title field into a single string: "Title; Symbol1; Symbol2" for the preferred title, and
+    ";;"-separated pairs of these for alternative and included titles. Splitting them here saves doing so repeatedly
+    downstream. Strings are interned, as the same symbols and title words recur across many MIMs.
+
+    Alternative & included titles/symbols are split, but not otherwise cleaned; e.g. ', FORMERLY' and ', INCLUDED'
+    suffixes are retained.
+    """
+    __slots__ = (
+        'omim_type', 'pref_title', 'pref_symbols', 'alt_titles', 'alt_symbols', 'included_titles', 'included_symbols')
+
+    def __init__(
+        self, omim_type: OmimType, pref_title: str, pref_symbols: Tuple[str, ...] = (),
+        alt_titles: Tuple[str, ...] = (), alt_symbols: Tuple[str, ...] = (),
+        included_titles: Tuple[str, ...] = (), included_symbols: Tuple[str, ...] = (),
+    ):
+        self.omim_type = omim_type
+        self.pref_title = pref_title
+        self.pref_symbols = pref_symbols
+        self.alt_titles = alt_titles
+        self.alt_symbols = alt_symbols
+        self.included_titles = included_titles
+        self.included_symbols = included_symbols
+
+    def __repr__(self):
+        return f'MimTitleRecord({self.omim_type}, {self.pref_title!r})'
+
+    @classmethod
+    def from_fields(cls, omim_type: OmimType, pref_titles_str: str, alt_titles_str: str, inc_titles_str: str):
+        """Create from the raw title fields of a mimTitles.txt row"""
+        pref_titles_and_symbols = [sys.intern(x.strip()) for x in pref_titles_str.split(';')]
+        alt_titles, alt_symbols = _split_title_symbol_pairs(alt_titles_str)
+        included_titles, included_symbols = _split_title_symbol_pairs(inc_titles_str)
+        return cls(
+            omim_type, pref_titles_and_symbols[0], tuple(pref_titles_and_symbols[1:]),
+            alt_titles, alt_symbols, included_titles, included_symbols)
+
+
+def _split_title_symbol_pairs(title_symbol_pairs_str: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Split ';;'-separated title-symbol pairs into interned titles and symbols
+
+    See also: omim_entry_parser.parse_title_symbol_pairs()
+    """
+    if not title_symbol_pairs_str:
+        return (), ()
+    titles: List[str] = []
+    symbols: List[str] = []
+    for pair_str in title_symbol_pairs_str.split(';;'):
+        pair: List[str] = [sys.intern(x.strip()) for x in pair_str.split(';')]
+        titles.append(pair[0])
+        symbols.extend(pair[1:])
+    return tuple(titles), tuple(symbols)
+
+
+def parse_mim_titles(rows: Iterable[MimTitlesRow]) -> Tuple[Dict[str, MimTitleRecord], Dict[str, List[str]]]:
     """
     Parse the omim titles
-    :param lines:
+    :param rows: Rows of mimTitles.txt, e.g. from get_mim_file_rows().
     :return:
-      omim_type_and_titles: Dict[str, Tuple[OmimType, str, str, str]]: Lookup of MIM's type, as well as it's preferred
-      labels, alternative labels, and 'included' labels.
+      omim_type_and_titles: Dict[str, MimTitleRecord]: Lookup of MIM's type, as well as it's preferred title & symbols,
+      alternative titles & symbols, and 'included' titles & symbols.
       omim_replaced: Dict[str, List[str]]: Lookup of obsolete MIMs and a list of any different MIMs that it has been
        replaced with / moved to.
     """
@@ -328,16 +469,15 @@ def parse_mim_titles(lines) -> Tuple[Dict[str, Tuple[OmimType, str, str, str]],
         'Percent': OmimType.HERITABLE_PHENOTYPIC_MARKER,  # 'SO:0001500',  # heritable_phenotypic_marker
         'Plus': OmimType.HAS_AFFECTED_FEATURE,  # 'GENO:0000418',  # has_affected_feature
     }
-    for line in lines:
-        if len(line) == 0 or line.isspace() or line[0] == '#':
-            continue  # skip the comment lines
-        declared, omim_id, pref_label, alt_label, inc_label = [i.strip() for i in line.split('\t')]
+    for row in rows:
+        declared, omim_id, pref_label, alt_label, inc_label = [i.strip() for i in row]
         if not declared and not omim_id and not pref_label and not alt_label and not inc_label:
             continue
         if declared in declared_to_type:
-            omim_type_and_titles[omim_id] = (declared_to_type[declared], pref_label, alt_label, inc_label)
+            omim_type_and_titles[omim_id] = MimTitleRecord.from_fields(
+                declared_to_type[declared], pref_label, alt_label, inc_label)
         else:
-            LOG.error('Unknown OMIM type line %s', line)
+            LOG.error('Unknown OMIM type line %s', row)
         if declared == 'Caret':  # moved|removed|split -> moved twice
             omim_replaced[omim_id] = []
             if pref_label.startswith('MOVED TO '):
@@ -346,21 +486,16 @@ def parse_mim_titles(lines) -> Tuple[Dict[str, Tuple[OmimType, str, str, str]],
     return omim_type_and_titles, omim_replaced
 
 
-def parse_phenotypic_series_titles(lines) -> Dict[str, List]:
+def parse_phenotypic_series_titles(rows: Iterable[PhenotypicSeriesRow]) -> Dict[str, List]:
     """Parse phenotypic series titles"""
     ret = defaultdict(list)
-    for line in lines:
-        if line.startswith('#'):
-            continue
-        tokens = line.split('\t')
-        if not tokens or tokens == ['']:
-            continue
-        ps_id = tokens[0].strip()[2:]
-        if len(tokens) == 2:
-            ret[ps_id].append(tokens[1].strip())
+    for row in rows:
+        ps_id = row.phenotypic_series_number.strip()[2:]
+        if not row.mim_number:  # title row
+            ret[ps_id].append(row.phenotype.strip())
             ret[ps_id].append([])
-        if len(tokens) == 3:
-            ret[ps_id][1].append(tokens[1])
+        else:
+            ret[ps_id][1].append(row.mim_number)
     return ret
 
 
@@ -371,37 +506,20 @@ def parse_gene_map(lines):
 
 
 def get_hgnc_map(filename, symbol_col, mim_col='MIM Number') -> Dict:
-    """Get HGNC Map"""
-    d = {}
+    """Get HGNC Map: HGNC symbols by MIM, from an OMIM text file or its TSV conversion. Doesn't modify the file."""
     input_path = DATA_DIR / filename
-    try:
-        df = pd.read_csv(input_path, delimiter='\t', comment='#').fillna('')
-        df[mim_col] = df[mim_col].astype(int)  # these were being read as floats
-    # TODO: Need a better solution than this. Which should be: When these files are downloaded, should uncomment header
-    except KeyError:
-        with open(input_path, 'r') as f:
-            lines = f.readlines()
-            header = lines[3]
-            if not header.startswith('# Chromosome'):
-                raise RuntimeError(f'Error parsing header for: {input_path}')
-            lines[3] = header[2:]
-        with open(input_path, 'w') as f:
-            f.writelines(lines)
-    finally:
-        df = pd.read_csv(input_path, delimiter='\t', comment='#').fillna('')
-        df[mim_col] = df[mim_col].astype(int)  # these were being read as floats
-
-    for index, row in df.iterrows():
-        symbol = row[symbol_col]
-        if symbol:
-            # Useful to read as `int` to catch any erroneous entries, but convert to str for compatibility with rest of
-            # codebase, which is currently reading as `str` for now.
-            d[str(row[mim_col])] = symbol
-
-    return d
-
-
-def parse_mim2gene(lines: List[str], filename='mim2gene.tsv', filename2='genemap2.tsv') -> Tuple[Dict, Dict, Dict]:
+    df = read_mim_file_columns(input_path, [mim_col, symbol_col], dtype={symbol_col: str})
+    # Useful to read as `int` to catch any erroneous entries, but convert to str for compatibility with rest of
+    # codebase, which is currently reading as `str` for now.
+    mims: pd.Series = df[mim_col].astype(int).astype(str)
+    symbols: pd.Series = df[symbol_col].fillna('')
+    has_symbol: pd.Series = symbols != ''
+    return dict(zip(mims[has_symbol], symbols[has_symbol]))
+
+
+def parse_mim2gene(
+    rows: Iterable[Mim2GeneRow], filename='mim2gene.tsv', filename2='genemap2.tsv'
+) -> Tuple[Dict, Dict, Dict]:
     """Parse OMIM # 2 gene file
     todo: ideally replace this whole thing with pandas
     todo: How to reconcile inconsistent mim#::hgnc_symbol mappings?
@@ -410,18 +528,13 @@ def parse_mim2gene(lines: List[str], filename='mim2gene.tsv', filename2='genemap
     # Gene and phenotype maps
     gene_map = {}
     pheno_map = {}
-    for line in lines:
-        if line.startswith('#'):
-            continue
-        tokens = line.split('\t')
-        if not tokens or tokens == ['']:
-            continue
-        if tokens[1] == 'gene' or tokens[1] == 'gene/phenotype':
-            if tokens[2]:
-                gene_map[tokens[0]] = tokens[2]
-        elif tokens[1] == 'phenotype' or tokens[1] == 'predominantly phenotypes':
-            if tokens[2]:
-                pheno_map[tokens[0]] = tokens[2]
+    for row in rows:
+        if row.entry_type == 'gene' or row.entry_type == 'gene/phenotype':
+            if row.entrez_gene_id:
+                gene_map[row.mim_number] = row.entrez_gene_id
+        elif row.entry_type == 'phenotype' or row.entry_type == 'predominantly phenotypes':
+            if row.entrez_gene_id:
+                pheno_map[row.mim_number] = row.entrez_gene_id
 
     # HGNC map
     hgnc_map: Dict = get_hgnc_map(os.path.join(DATA_DIR, filename), 'Approved Gene Symbol (HGNC)')
@@ -438,92 +551,132 @@ def parse_mim2gene(lines: List[str], filename='mim2gene.tsv', filename2='genemap
     return gene_map, pheno_map, hgnc_map
 
 
-def parse_morbid_map(lines) -> Dict[str, Dict]:
+def parse_morbid_map(rows: Iterable[MorbidMapRow]) -> Dict[str, Dict]:
     """Parse morbid map file. Part of this inspired by:
     https://github.com/monarch-initiative/monarch-ingest/blob/main/monarch_ingest/ingests/omim/gene_to_disease.py
 
     # todo: consider not adding to `d` if no phenotype_mim_number present, since we're skipping in `main.py`
-    """
-    # phenotype_label_regex: groups: (1) phenotype label, (2) MIM number (optional),
-    # (3) phenotype mapping key (optional)
-    phenotype_label_regex = re.compile(r'(.*)(\d{6})\s*(?:\((\d+)\))?')
-    # phenotype_label_regex: groups: (1) phenotype label, (2) phenotype mapping key (optional)
-    phenotype_label_no_mim_regex = re.compile(r'(.*)\s+\((\d+)\)')
 
+    :returns: By gene MIM: its cyto location, symbols, and 'phenotype_associations': List[MorbidMapAssociation].
+    """
+    phenotype_regex_match = MORBIDMAP_PHENOTYPE_REGEX.match
     # Aggregate data by gene MIM
     gene_phenotypes: Dict[str, Dict] = {}
-    for line in lines:
-        if line.startswith('#'):
-            continue
-        fields: List[str] = line.split('\t')
-        if not fields or fields == ['']:
-            continue
-
-        phenotype_label_and_metadata: str = fields[0]
-        gene_symbols: List[str] = fields[1].split(', ')
-        mim_number: str = fields[2].strip()  # todo: eventually would like this to be `int`
-        cyto_location: str = fields[3].strip()
+    for row in rows:
+        mim_number: str = row.mim_number.strip()  # todo: eventually would like this to be `int`
 
         phenotype_label, phenotype_mim_number, association_key = '', '', ''
-        label_data_with_mim_num = phenotype_label_regex.match(phenotype_label_and_metadata)
-        label_data_no_mim_num = phenotype_label_no_mim_regex.match(phenotype_label_and_metadata)
-
-        if label_data_with_mim_num:
-            phenotype_label, phenotype_mim_number, association_key = label_data_with_mim_num.groups()
-        elif label_data_no_mim_num:
-            phenotype_label, association_key = label_data_no_mim_num.groups()
+        label_data = phenotype_regex_match(row.phenotype)
+        if label_data:
+            phenotype_label, phenotype_mim_number, association_key, label_no_mim, key_no_mim = label_data.groups()
+            if phenotype_mim_number is None:
+                phenotype_label, phenotype_mim_number, association_key = label_no_mim, '', key_no_mim
         else:
-            print(f'Warning: Failed to parse phenotype label in morbidmap.txt row: {line}', file=sys.stderr)
+            print(f'Warning: Failed to parse phenotype label in morbidmap.txt row: {row}', file=sys.stderr)
 
-        if mim_number not in gene_phenotypes:
-            gene_phenotypes[mim_number] = {
+        gene_data: Optional[Dict] = gene_phenotypes.get(mim_number)
+        if gene_data is None:
+            gene_data = gene_phenotypes[mim_number] = {
                 'gene_mim_number': mim_number,
-                'cyto_location': cyto_location,
-                'gene_symbols': gene_symbols,
+                'cyto_location': row.cyto_location.strip(),
+                'gene_symbols': row.gene_symbols.split(', '),
                 'phenotype_associations': []
             }
         # todo: gene_mim_number in gene_mim_data:, print warning / raise err if gene_mim_number, cyto_location, or
         #  gene_symbols are != what's already there, but it shouldn't happen if morbidmap.txt is valid, I think.
-        # noinspection PyTypeChecker
-        gene_phenotypes[mim_number]['phenotype_associations'].append({
-            'phenotype_mim_number': phenotype_mim_number,
-            'phenotype_label': phenotype_label,
-            'phenotype_mapping_info_key': association_key,
-            'phenotype_mapping_info_label': MORBIDMAP_PHENOTYPE_MAPPING_KEY_MEANINGS[association_key],
-        })
+        gene_data['phenotype_associations'].append(MorbidMapAssociation(
+            mim_number, phenotype_mim_number, phenotype_label, int(association_key) if association_key else None))
 
     return gene_phenotypes
 
 
-def get_all_phenotype_mims() -> Set[str]:
-    """Get all phenotype MIM numbers"""
+def get_all_phenotype_mims(mim_titles: Dict[str, MimTitleRecord] = None) -> Set[str]:
+    """Get all phenotype MIM numbers
+
+    :param mim_titles: Parsed mimTitles.txt, if already available. Saves re-parsing it when adding protected rows.
+    """
     p_mims = []
-    gene_phenotypes: Dict[str, Dict] = parse_morbid_map(get_mim_file('morbidmap'))
+    gene_phenotypes: Dict[str, Dict] = parse_morbid_map(get_mim_file_rows('morbidmap', mim_titles=mim_titles))
     for gene, d in gene_phenotypes.items():
         for assoc in d['phenotype_associations']:
-            p_mims.append(assoc['phenotype_mim_number'])
+            p_mims.append(assoc.phenotype_mim)
     p_mims = set(p_mims)
     p_mims.discard('')
     return p_mims
 
 
-def _read_cached_entry_df(path: str) -> pd.DataFrame:
-    """Read a dataframe containing MIM entries data cached from the OMIM API"""
-    return pd.read_csv(path, sep='\t', true_values=['True'], false_values=['False'], dtype={
-        'is_phenotype': bool, 'mim': str, 'umls_ids': str, 'orphanet_ids': str, 'date_fetched': str})
+def _get_cache_rows(entry: Dict, mims_phenos: Set[str], date_fetched: str) -> Tuple[Dict, Dict]:
+    """Get mappings & pubmed refs cache rows for an entry"""
+    mim = str(entry['mimNumber'])
+    mappings = get_mapped_ids(entry)
+    common_data = {
+        'mim': mim,
+        'is_phenotype': mim in mims_phenos,
+        'date_fetched': date_fetched,
+    }
+    mappings_row = {**common_data, **{
+        'umls_ids': '|'.join(mappings[UMLS]),
+        'orphanet_ids': '|'.join(mappings[ORPHANET]),
+    }}
+    pubmed_row = {**common_data, **{
+        'pmid_refs': '|'.join(get_pubs(entry)),
+    }}
+    return mappings_row, pubmed_row
 
 
-def update_cache__pubmed_refs_and_mappings(phenotypes_only_for_cache_init=False, overwrite=False):
-    """Update cache for MIM entries (pubmed refs & mappings) if cache is not complete or there is possibly new data"""
-    # Load existing data
+def rebuild_cache__pubmed_refs_and_mappings_from_raw_entries():
+    """Rebuild pubmed refs & mappings caches from raw entries stored by a fetch w/ CACHE_RAW_ENTRIES, w/out fetching
+
+    Only MIMs that have a raw entry are updated. Other cached rows are left as they are.
+    """
     mims_phenos: Set[str] = get_all_phenotype_mims()
-    mappings_df_cached = _read_cached_entry_df(MAPPINGS_PATH) if os.path.exists(MAPPINGS_PATH) and not overwrite \
-        else pd.DataFrame()
-    pubmed_df_cached = _read_cached_entry_df(PUBMED_REFS_PATH) if os.path.exists(PUBMED_REFS_PATH) and not overwrite \
-        else pd.DataFrame()
+    with EntryCacheDb(CACHE_DB_PATH) as db:
+        db.sync_from_tsv('mappings', MAPPINGS_PATH)
+        db.sync_from_tsv('pubmed_refs', PUBMED_REFS_PATH)
+        rows = [_get_cache_rows(entry, mims_phenos, date_fetched) for entry, date_fetched in db.iter_raw_entries()]
+        db.upsert('mappings', [x[0] for x in rows])
+        db.upsert('pubmed_refs', [x[1] for x in rows])
+        db.export_tsv('mappings', MAPPINGS_PATH)
+        db.export_tsv('pubmed_refs', PUBMED_REFS_PATH)
+
+
+def update_cache__pubmed_refs_and_mappings(
+    phenotypes_only_for_cache_init=False, overwrite=False, mim_titles: Dict[str, MimTitleRecord] = None,
+):
+    """Update cache for MIM entries (pubmed refs & mappings) if cache is not complete or there is possibly new data
+
+    :param mim_titles: Parsed mimTitles.txt, if the build already has it. If not given, it is read from disk as needed.
+    """
+    # Load existing data
+    # - db: Synced w/ the TSVs, if they have changed since it was last updated
+    mims_phenos: Set[str] = get_all_phenotype_mims(mim_titles)
+    db = EntryCacheDb(CACHE_DB_PATH)
+    if overwrite:
+        db.clear()
+    else:
+        db.sync_from_tsv('mappings', MAPPINGS_PATH)
+        db.sync_from_tsv('pubmed_refs', PUBMED_REFS_PATH)
+
+    # Replay entries fetched by a previous run that stopped before saving
+    # - overwrite: The journal is discarded too, as its entries may be as stale as the cache
+    journal = FetchJournal(CACHE_FETCH_JOURNAL_PATH)
+    if overwrite:
+        journal.clear()
+    entries_replayed: List[Dict] = journal.read()
+    mims_replayed: Set[str] = set(str(entry['mimNumber']) for entry in entries_replayed)
+    if entries_replayed:
+        print(f'Replaying {len(entries_replayed)} MIMs fetched by a previous, unfinished run.')
 
     # Fetch
-    client = OmimClient(api_key=CONFIG['API_KEY'])
+    # - API_CONCURRENCY: Optional .env setting. If > 1, fetches that many batches of MIMs at once, on threads.
+    # - CACHE_RAW_ENTRIES: Optional .env setting. If true, fetches whole entries (include=all) and stores them in db.
+    concurrency = int(CONFIG.get('API_CONCURRENCY', 1))
+    cache_raw_entries: bool = str(CONFIG.get('CACHE_RAW_ENTRIES', '')).lower() in ('1', 'true')
+    client_kwargs = {'api_key': CONFIG['API_KEY'], 'projection': ENTRY_PROJECTION}
+    if cache_raw_entries:
+        client_kwargs['raw_entry_store'] = db
+    client = OmimClient(**client_kwargs) if concurrency <= 1 \
+        else ConcurrentOmimClient(**client_kwargs, concurrency=concurrency)
     # - Fetch everything if no cache or cache incomplete
     if not os.path.exists(CACHE_LAST_UPDATED_PATH) or os.path.exists(CACHE_INCOMPLETENESS_INDICATOR_PATH):
         print('Cache for pubmed references and mappings is incomplete.')
@@ -531,16 +684,20 @@ def update_cache__pubmed_refs_and_mappings(phenotypes_only_for_cache_init=False,
         # - Get all MIMs
         if phenotypes_only_for_cache_init:
             mims_all = mims_phenos
+        elif mim_titles is not None:
+            mims_all = set(mim_titles.keys())
         else:
             df = get_mim_file('mimTitles', return_df=True)
             df['MIM Number'] = df['MIM Number'].astype(str)
             mims_all = set(df['MIM Number'])
         mims_all.discard('')
         # - Get cached MIMs
-        mims_cached: Set[str] = set(mappings_df_cached['mim']) if len(mappings_df_cached) > 0 else set()
-        mims_cached |= set(pubmed_df_cached['mim']) if len(pubmed_df_cached) > 0 else set()
+        mims_cached: Set[str] = db.get_mims('mappings') | db.get_mims('pubmed_refs')
+        mims_cached |= mims_replayed
         # Fetch
-        results: List[Dict] = client.fetch(ids=list(mims_all - mims_cached), update_cache_metadata=True, seed_run=True)
+        entries: Iterator[Dict] = client.iter_fetch(
+            ids=list(mims_all - mims_cached), limit_include=not cache_raw_entries, update_cache_metadata=True,
+            seed_run=True)
     # - Else fetch new data if available
     else:
         print('Checking for recently updated MIMs.')
@@ -549,44 +706,34 @@ def update_cache__pubmed_refs_and_mappings(phenotypes_only_for_cache_init=False,
             last_updated_str = f.readline().strip()
         last_updated: datetime = datetime.strptime(last_updated_str, "%Y-%m-%d")
         last_updated = last_updated - timedelta(days=1)
-        results: List[Dict] = client.fetch(since_date=last_updated, update_cache_metadata=True)
+        entries: Iterator[Dict] = client.iter_fetch(
+            since_date=last_updated, limit_include=not cache_raw_entries, update_cache_metadata=True,
+            exclude_ids=mims_replayed)
 
     # Save
-    if len(results) == 0:
-        return
-    # - Create dataframes from fetched data
-    mappings_rows: List[Dict] = []
-    pubmed_rows: List[Dict] = []
-    for entry in results:
+    # - Create rows from fetched data. Entries are reduced to rows as they arrive, rather than all kept in memory
+    # - mappings_rows, pubmed_rows: by MIM
+    mappings_rows: Dict[str, Dict] = {}
+    pubmed_rows: Dict[str, Dict] = {}
+    for entry in itertools.chain(entries_replayed, journal.record(entries)):
         mim = str(entry['mimNumber'])
-        mappings = get_mapped_ids(entry)
-        common_data = {
-            'mim': str(mim),
-            'is_phenotype': str(mim) in mims_phenos,
-            'date_fetched': datetime.now().strftime("%Y-%m-%d"),
-        }
-        mappings_rows.append({**common_data, **{
-            'umls_ids': '|'.join(mappings[UMLS]),
-            'orphanet_ids': '|'.join(mappings[ORPHANET]),
-        }})
-        pubmed_rows.append({**common_data, **{
-            'pmid_refs': '|'.join(get_pubs(entry)),
-        }})
-    mappings_df_new = pd.DataFrame(mappings_rows)
-    pubmed_df_new = pd.DataFrame(pubmed_rows)
+        mappings_rows[mim], pubmed_rows[mim] = _get_cache_rows(entry, mims_phenos, datetime.now().strftime("%Y-%m-%d"))
+    if len(mappings_rows) == 0:
+        journal.clear()
+        db.close()
+        return
     # Update cache & save
-    # - remove old data from cache if new data has been fetched
-    mappings_df_cached_del_old = mappings_df_cached[~mappings_df_cached['mim'].isin(mappings_df_new['mim'])]
-    pubmed_df_cached_del_old = pubmed_df_cached[~pubmed_df_cached['mim'].isin(pubmed_df_new['mim'])]
-    # - concat & save
-    mappings_df = pd.concat([mappings_df_cached_del_old, mappings_df_new], ignore_index=True).sort_values(['mim'])
-    pubmed_df = pd.concat([pubmed_df_cached_del_old, pubmed_df_new], ignore_index=True).sort_values(['mim'])
-    mappings_df.to_csv(MAPPINGS_PATH, sep='\t', index=False)
-    pubmed_df.to_csv(PUBMED_REFS_PATH, sep='\t', index=False)
+    # - upsert: only writes fetched MIMs, replacing their old data if any
+    db.upsert('mappings', mappings_rows.values())
+    db.upsert('pubmed_refs', pubmed_rows.values())
+    db.export_tsv('mappings', MAPPINGS_PATH)
+    db.export_tsv('pubmed_refs', PUBMED_REFS_PATH)
+    db.close()
+    journal.clear()
 
 
 def get_pubmed_refs_and_mappings(
-    pubmed_path=PUBMED_REFS_PATH, mappings_path=MAPPINGS_PATH
+    pubmed_path=PUBMED_REFS_PATH, mappings_path=MAPPINGS_PATH, update_cache=True
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """Get pubmed references &* mappings for MIMs*
 
@@ -595,64 +742,87 @@ def get_pubmed_refs_and_mappings(
     were updated monthly, and this is used to update the cache. That information does not discriminate between phenotype
     and non-phenotype, so the cache will include any non-MIMs that were updated after 2025/03.
 
+    :param update_cache: If False, the cache is read as is, e.g. if it was already updated earlier in the build.
+
     todo: Would be more optimal to load these using dtypes than str cast later
     """
-    update_cache__pubmed_refs_and_mappings()
+    if update_cache:
+        update_cache__pubmed_refs_and_mappings()
     return pd.read_csv(pubmed_path, sep='\t').fillna(''), pd.read_csv(mappings_path, sep='\t').fillna('')
 
 
-# todo: Both HGNC funcs:
-#  1. Address or suppress warning. I dont even need these columns anyway:
-#   ...omim2obo/main.py:208: DtypeWarning: Columns (32,34,38,40,50) have mixed types.
-#   Specify dtype option on import or set low_memory=False.
-#   hgnc_symbol_id_map: Dict = get_hgnc_symbol_id_map()
-#  2. todo: Ideally download latest file: http://ftp.ebi.ac.uk/pub/databases/genenames/hgnc/tsv/hgnc_complete_set.txt
-def get_hgnc_id_symbol_map(input_path=HGNC_DATA_PATH) -> Dict[str, str]:
-    """Get mapping between HGNC IDs (prefixed) and symbols"""
-    d = {}
-    df = pd.read_csv(input_path, sep='\t', low_memory=False)
-    skipped_rows = 0
-    for index, row in df.iterrows():
-        # Skip rows where hgnc_id or symbol is NaN/missing
-        if pd.isna(row['hgnc_id']) or pd.isna(row['symbol']):
-            skipped_rows += 1
-            LOG.warning(f"Skipping row {index + 2} in HGNC file: missing hgnc_id or symbol")
-            continue
-        d[row['hgnc_id']] = row['symbol']
-    
-    if skipped_rows > 0:
-        LOG.warning(f"HGNC file quality issue: Skipped {skipped_rows} rows with missing data")
+def _check_hgnc_skipped_rows(skipped_rows: List[int], n_rows: int):
+    """Warn about rows of the HGNC file that were skipped due to missing data, and fail if there are too many
+
+    :param skipped_rows: Line numbers of skipped rows.
+    """
+    for line_num in skipped_rows:
+        LOG.warning(f"Skipping row {line_num} in HGNC file: missing hgnc_id or symbol")
+    if skipped_rows:
+        LOG.warning(f"HGNC file quality issue: Skipped {len(skipped_rows)} rows with missing data")
         # Fail if more than 1% of rows are bad
-        if skipped_rows > len(df) * 0.01:
+        if len(skipped_rows) > n_rows * 0.01:
             raise RuntimeError(
-                f"HGNC file has too many invalid rows: {skipped_rows}/{len(df)} "
-                f"({skipped_rows/len(df)*100:.1f}%). File may be corrupted."
+                f"HGNC file has too many invalid rows: {len(skipped_rows)}/{n_rows} "
+                f"({len(skipped_rows)/n_rows*100:.1f}%). File may be corrupted."
             )
-    return d
+
+
+def _write_hgnc_cache(cache_path: str, cached: Dict):
+    """Save HGNC ID/symbol pairs sidecar. Skipped if the data dir is read only."""
+    try:
+        with open(cache_path + '.tmp', 'wb') as f:
+            pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(cache_path + '.tmp', cache_path)
+    except OSError as err:
+        LOG.warning(f'Could not cache HGNC ID/symbol pairs at {cache_path}: {err}')
+
+
+def get_hgnc_id_symbol_pairs(input_path=HGNC_DATA_PATH) -> Tuple[List[str], List[str]]:
+    """Get HGNC IDs (prefixed) and symbols, as parallel lists, from the HGNC complete set
+
+    Only the hgnc_id and symbol columns are read, as str. Rows missing either are skipped. The result is cached in a
+    sidecar, `<input_path>.id-symbol.pickle`, keyed on the file's mtime and hash, so it is only parsed again if changed.
+    """
+    cache_path = str(input_path) + HGNC_CACHE_SUFFIX
+    stat = os.stat(input_path)
+    cached: Optional[Dict] = None
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+    if cached and (cached['mtime_ns'], cached['size']) != (stat.st_mtime_ns, stat.st_size):
+        # - mtime changed but contents may not have, e.g. re-downloaded
+        if cached['sha256'] == hash_file(input_path):
+            cached.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            _write_hgnc_cache(cache_path, cached)
+        else:
+            cached = None
+    if not cached:
+        df = pd.read_csv(input_path, sep='\t', usecols=['hgnc_id', 'symbol'], dtype=str)
+        missing: pd.Series = df['hgnc_id'].isna() | df['symbol'].isna()
+        cached = {
+            'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': hash_file(input_path), 'n_rows': len(df),
+            'skipped_rows': (df.index[missing] + 2).tolist(),
+            'hgnc_ids': df['hgnc_id'][~missing].tolist(), 'symbols': df['symbol'][~missing].tolist(),
+        }
+        _write_hgnc_cache(cache_path, cached)
+    _check_hgnc_skipped_rows(cached['skipped_rows'], cached['n_rows'])
+    return cached['hgnc_ids'], cached['symbols']
+
+
+def get_hgnc_id_symbol_map(input_path=HGNC_DATA_PATH) -> Dict[str, str]:
+    """Get mapping between HGNC IDs (prefixed) and symbols"""
+    hgnc_ids, symbols = get_hgnc_id_symbol_pairs(input_path)
+    return dict(zip(hgnc_ids, symbols))
 
 
 def get_hgnc_symbol_id_map(input_path=HGNC_DATA_PATH) -> Dict[str, str]:
     """Get mapping between HGNC symbols (unprefixed) and IDs"""
-    d = {}
-    df = pd.read_csv(input_path, sep='\t', low_memory=False)
-    skipped_rows = 0
-    for index, row in df.iterrows():
-        # Skip rows where hgnc_id or symbol is NaN/missing
-        if pd.isna(row['hgnc_id']) or pd.isna(row['symbol']):
-            skipped_rows += 1
-            LOG.warning(f"Skipping row {index + 2} in HGNC file: missing hgnc_id or symbol")
-            continue
-        d[row['symbol']] = row['hgnc_id'].split(':')[1]  # split: hgnc_id is formatted as "hgnc:<id>"
-    
-    if skipped_rows > 0:
-        LOG.warning(f"HGNC file quality issue: Skipped {skipped_rows} rows with missing data")
-        # Fail if more than 1% of rows are bad
-        if skipped_rows > len(df) * 0.01:
-            raise RuntimeError(
-                f"HGNC file has too many invalid rows: {skipped_rows}/{len(df)} "
-                f"({skipped_rows/len(df)*100:.1f}%). File may be corrupted."
-            )
-    return d
+    hgnc_ids, symbols = get_hgnc_id_symbol_pairs(input_path)
+    # split: hgnc_id is formatted as "hgnc:<id>"
+    return dict(zip(symbols, (x.split(':')[1] for x in hgnc_ids)))
 
 def p2g_is_definitive(label: str) -> bool:
     """Is phenotype to gene association definitive?
@@ -670,19 +840,15 @@ def p2g_is_definitive(label: str) -> bool:
     return not any(label.startswith(x) for x in ['[', '{', '?'])
 
 
-def get_phenotype_genes(gene_phenotypes: Dict[str, Dict]) -> Dict[str, List[Dict[str, str]]]:
+def get_phenotype_genes(gene_phenotypes: Dict[str, Dict]) -> Dict[str, List[MorbidMapAssociation]]:
     """Get Disease->Gene (& more Gene->Disease) relationships
 
     Collect phenotype MIMs & associated gene MIMs and relationship info
     """
-    phenotype_genes: Dict[str, List[Dict[str, str]]] = defaultdict(list)
-    for gene_mim, gene_data in gene_phenotypes.items():
+    phenotype_genes: Dict[str, List[MorbidMapAssociation]] = defaultdict(list)
+    for gene_data in gene_phenotypes.values():
         for assoc in gene_data['phenotype_associations']:
-            p_mim, p_lab, p_map_key, p_map_lab = assoc['phenotype_mim_number'], assoc['phenotype_label'], \
-                assoc['phenotype_mapping_info_key'], assoc['phenotype_mapping_info_label']
-            if not p_mim:  # not an association to another MIM; ignore
+            if not assoc.phenotype_mim:  # not an association to another MIM; ignore
                 continue  # see: https://github.com/monarch-initiative/omim/issues/78
-            phenotype_genes[p_mim].append({
-                'gene_id': gene_mim, 'phenotype_label': p_lab, 'mapping_key': p_map_key,
-                'mapping_label': p_map_lab})
+            phenotype_genes[assoc.phenotype_mim].append(assoc)
     return phenotype_genes
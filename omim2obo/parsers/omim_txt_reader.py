@@ -0,0 +1,169 @@
+"""Reading of OMIM text files as typed rows, or as dataframes of selected columns, and morbidmap.txt record types
+
+Files are memory-mapped and read a line at a time, so that they are never held in memory as a whole, nor as a list of
+lines. Each line is split once, into a row whose fields are named after the file's header.
+"""
+import logging
+import mmap
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Type, Union
+
+import pandas as pd
+
+LOG = logging.getLogger('omim2obo.parsers.omim_txt_reader')
+# MORBIDMAP_PHENOTYPE_REGEX: Phenotype field of morbidmap.txt: "Label, phenotype MIM (mapping key)". Alternatives:
+# - groups: (1) phenotype label, (2) MIM number, (3) phenotype mapping key (optional)
+# - groups: (4) phenotype label, (5) phenotype mapping key; for phenotypes w/out a MIM number
+MORBIDMAP_PHENOTYPE_REGEX = re.compile(r'(?:(.*)(\d{6})\s*(?:\((\d+)\))?|(.*)\s+\((\d+)\))')
+# MORBIDMAP_PHENOTYPE_MAPPING_KEY_MEANINGS: The Monarch Ingest and Kevin S have identified some ECO properties that
+# ...probably apply to each of these. See:
+# https://github.com/monarch-initiative/monarch-ingest/blob/main/monarch_ingest/ingests/omim/omim-translation.yaml
+# "1": "inference from background scientific knowledge used in manual assertion"
+# "2": "genomic context evidence"
+# "3": "sequencing assay evidence"
+# "4": "sequencing assay evidence"
+MORBIDMAP_PHENOTYPE_MAPPING_KEY_MEANINGS = {
+    1: 'The disorder is placed on the map based on its association with a gene, but the underlying defect is '
+       'not known.',
+    2: 'The disorder has been placed on the map by linkage or other statistical method; no mutation has '
+       'been found.',
+    3: 'The molecular basis for the disorder is known; a mutation has been found in the gene.',
+    4: 'A contiguous gene deletion or duplication syndrome, multiple genes are deleted or duplicated causing '
+       'the phenotype.',
+}
+
+
+class MimTitlesRow(NamedTuple):
+    """A row of mimTitles.txt"""
+    prefix: str
+    mim_number: str
+    preferred_title: str  # "Title; symbol"
+    alternative_titles: str  # ";;"-separated "Title; symbol(s)"
+    included_titles: str  # ";;"-separated "Title; symbol(s)"
+
+
+class MorbidMapRow(NamedTuple):
+    """A row of morbidmap.txt"""
+    phenotype: str  # "Label, phenotype MIM (mapping key)". MIM and mapping key are optional.
+    gene_symbols: str  # ", "-separated
+    mim_number: str
+    cyto_location: str
+
+
+class Mim2GeneRow(NamedTuple):
+    """A row of mim2gene.txt"""
+    mim_number: str
+    entry_type: str
+    entrez_gene_id: str
+    hgnc_symbol: str
+    ensembl_gene_id: str
+
+
+class PhenotypicSeriesRow(NamedTuple):
+    """A row of phenotypicSeries.txt. Each series has a title row, w/out a MIM number, followed by a row per MIM."""
+    phenotypic_series_number: str
+    mim_number: str  # Empty for title rows
+    phenotype: str  # Series title, for title rows
+
+
+class MorbidMapAssociation:
+    """A gene-phenotype association in morbidmap.txt, w/ its phenotype field parsed.
+
+    The mapping key is held as an int, and its meaning is only looked up when needed.
+    """
+    __slots__ = ('gene_mim', 'phenotype_mim', 'phenotype_label', 'mapping_key')
+
+    def __init__(self, gene_mim: str, phenotype_mim: str, phenotype_label: str, mapping_key: Optional[int]):
+        self.gene_mim = gene_mim
+        self.phenotype_mim = phenotype_mim  # Empty if the phenotype has no MIM number
+        self.phenotype_label = phenotype_label
+        self.mapping_key = mapping_key
+
+    def __repr__(self):
+        return f'MorbidMapAssociation({self.gene_mim!r}, {self.phenotype_mim!r}, {self.phenotype_label!r}, ' \
+            f'{self.mapping_key!r})'
+
+    @property
+    def mapping_label(self) -> str:
+        """Meaning of the mapping key"""
+        return MORBIDMAP_PHENOTYPE_MAPPING_KEY_MEANINGS[self.mapping_key]
+
+
+MimFileRow = Union[MimTitlesRow, MorbidMapRow, Mim2GeneRow, PhenotypicSeriesRow]
+MIM_FILE_ROW_TYPES = {
+    'mimTitles.txt': MimTitlesRow,
+    'morbidmap.txt': MorbidMapRow,
+    'mim2gene.txt': Mim2GeneRow,
+    'phenotypicSeries.txt': PhenotypicSeriesRow,
+}
+
+
+def read_mim_file_lines(path: Union[str, Path]) -> Iterator[str]:
+    """Lazily read the data lines of an OMIM text file, w/out line endings. Comments and blank lines are skipped."""
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return
+        with mm:
+            for line in iter(mm.readline, b''):
+                if line.startswith(b'#') or line.isspace():
+                    continue
+                yield line.decode('utf-8').rstrip('\r\n')
+
+
+def make_mim_file_row(row_type: Type[MimFileRow], fields: List[str]) -> Optional[MimFileRow]:
+    """Make a row from a line's fields. Fields beyond those of the row type are ignored.
+
+    :returns: None if the line has too few fields.
+    """
+    if row_type is PhenotypicSeriesRow and len(fields) == 2:
+        return PhenotypicSeriesRow(fields[0], '', fields[1])
+    n_fields = len(row_type._fields)
+    if len(fields) < n_fields:
+        return None
+    return row_type._make(fields[:n_fields])
+
+
+def to_mim_file_rows(lines: Iterable[str], row_type: Type[MimFileRow]) -> Iterator[MimFileRow]:
+    """Split lines of an OMIM text file into rows. Comments, blank lines, and invalid lines are skipped."""
+    for line in lines:
+        if line.startswith('#') or not line or line.isspace():
+            continue
+        row = make_mim_file_row(row_type, line.rstrip('\r\n').split('\t'))
+        if row is None:
+            LOG.warning('%s - invalid line: %s', row_type.__name__, line)
+            continue
+        yield row
+
+
+def read_mim_file_rows(path: Union[str, Path], row_type: Type[MimFileRow]) -> Iterator[MimFileRow]:
+    """Lazily read an OMIM text file as rows"""
+    return to_mim_file_rows(read_mim_file_lines(path), row_type)
+
+
+def read_mim_file_columns(
+    path: Union[str, Path], columns: List[str], dtype: Dict[str, type] = None,
+) -> pd.DataFrame:
+    """Read only the given columns of an OMIM text file, or of its TSV conversion.
+
+    Files as downloaded from OMIM have their header commented out, as the last of the comment lines at the top. TSV
+    conversions have it as the first line. Either is parsed in memory; the file is never modified.
+
+    :raises RuntimeError: If the header doesn't have all the columns.
+    """
+    commented_header: Optional[List[str]] = None
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.startswith('#'):
+                break
+            commented_header = line[1:].strip().split('\t')
+        else:
+            line = ''
+    if all(x in line.rstrip('\r\n').split('\t') for x in columns):
+        return pd.read_csv(path, sep='\t', comment='#', usecols=columns, dtype=dtype)
+    if commented_header is None or not all(x in commented_header for x in columns):
+        raise RuntimeError(f'Error parsing header for: {path}')
+    return pd.read_csv(
+        path, sep='\t', comment='#', header=None, names=commented_header, usecols=columns, dtype=dtype)
@@ -0,0 +1,89 @@
+"""Rate limiting for API clients"""
+import threading
+import time
+from datetime import date
+from typing import Callable, Optional
+
+
+class RateLimiter:
+    """Token bucket rate limiter, w/ a daily quota, which adapts its rate to the server.
+
+    Each request takes a token. Tokens refill continuously at the current rate, up to `burst`. The rate adapts by AIMD
+    (additive increase, multiplicative decrease): it is cut by `decrease_factor` each time the server signals that
+    requests are coming too fast (e.g. a 429), and goes back up by `increase` after each successful request.
+
+    :param requests_per_second: Initial rate.
+    :param min_requests_per_second: Rate is never decreased below this.
+    :param max_requests_per_second: Rate is never increased above this.
+    :param burst: Max number of tokens that can accumulate, i.e. number of requests that can be made back to back.
+    :param daily_quota: Max units (e.g. MIMs fetched) per calendar day, or None for no limit. Only counts usage through
+     this limiter.
+    :param clock, sleep, today: Time functions. Can be swapped out for testing.
+
+    Thread safe. Callers in different threads wait for tokens concurrently, and take them as they become available.
+    """
+
+    def __init__(
+        self, requests_per_second: float = 1, min_requests_per_second: float = 0.1, max_requests_per_second: float = 4,
+        burst: int = 1, increase: float = 0.1, decrease_factor: float = 0.5, daily_quota: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+        today: Callable[[], date] = date.today,
+    ):
+        self.rate = requests_per_second
+        self.min_rate = min_requests_per_second
+        self.max_rate = max_requests_per_second
+        self.burst = burst
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.daily_quota = daily_quota
+        self.clock, self.sleep, self.today = clock, sleep, today
+        self.tokens: float = burst
+        self.last_refill: float = clock()
+        self.quota_day: date = today()
+        self.quota_used = 0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add tokens for time elapsed since last refill"""
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def quota_remaining(self) -> Optional[int]:
+        """Units left in today's quota, or None if there is no quota"""
+        if self.quota_day != self.today():
+            self.quota_day, self.quota_used = self.today(), 0
+        return None if self.daily_quota is None else self.daily_quota - self.quota_used
+
+    def acquire(self, cost: int = 1) -> bool:
+        """Wait until a request can be made, and take a token for it
+
+        The lock is only held to check and take tokens, not while waiting, so other threads can adapt the rate
+        meanwhile. If another thread takes the token first, this one waits again.
+
+        :param cost: Units of the daily quota that the request will use.
+        :returns: False, w/out waiting, if the request would exceed the daily quota. Else True.
+        """
+        while True:
+            with self._lock:
+                remaining = self.quota_remaining()
+                if remaining is not None and cost > remaining:
+                    return False
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.quota_used += cost
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+    def on_success(self):
+        """Speed up after a request that was not throttled"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self):
+        """Slow down after the server throttled a request"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.tokens = 0
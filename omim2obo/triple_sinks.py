@@ -0,0 +1,109 @@
+"""Triple sinks: destinations for the triples emitted while building omim.ttl
+
+The build only ever adds triples and then serializes them once, so anything with an add((s, p, o)) method can serve as
+the destination. An rdflib Graph is the default, and is what the tests use. NTriplesSink instead writes each triple
+straight to disk as it is added, skipping the subject/predicate/object indexes that Graph maintains on every add.
+"""
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Tuple, Union
+
+from rdflib.term import Literal, Node
+
+
+def nt_row(triple: Tuple[Node, Node, Node]) -> str:
+    """Serialize a triple as an N-Triples line"""
+    return ' '.join(nt_term(x) for x in triple) + ' .\n'
+
+
+def nt_term(term: Node) -> str:
+    """Serialize a term as N-Triples
+
+    IRIs and blank nodes are the same as in Turtle. Literals are escaped here, as Literal.n3() would use Turtle's
+    triple quotes for ones w/ line breaks, which N-Triples doesn't allow.
+    """
+    if not isinstance(term, Literal):
+        return term.n3()
+    value = str(term).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+    if term.language:
+        return f'"{value}"@{term.language}'
+    if term.datatype:
+        return f'"{value}"^^{term.datatype.n3()}'
+    return f'"{value}"'
+
+
+class TripleSink(ABC):
+    """Write-once destination for triples"""
+
+    @abstractmethod
+    def add(self, triple: Tuple[Node, Node, Node]):
+        """Add a triple"""
+
+    def close(self):
+        """Finish writing"""
+
+    def discard(self):
+        """Stop writing, w/out keeping the output, e.g. because the build failed"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class NTriplesSink(TripleSink):
+    """Writes triples as N-Triples lines as they are added.
+
+    N-Triples is a subset of Turtle, so the output can be saved as omim.ttl. Triples are written in the order they are
+    added and are not de-duplicated. Repeated triples are redundant but harmless, since an RDF graph is a set.
+
+    Output goes to a temporary file which is moved to `path` on close(), so that an interrupted build does not leave a
+    truncated omim.ttl behind.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = str(path)
+        self._tmp_path = self.path + '.tmp'
+        self._file = open(self._tmp_path, 'w', encoding='utf-8')
+
+    def add(self, triple: Tuple[Node, Node, Node]):
+        """Add a triple"""
+        self._file.write(nt_row(triple))
+
+    def write_ntriples(self, ntriples: str):
+        """Add triples that are already serialized as N-Triples lines, e.g. a segment of a previous build"""
+        self._file.write(ntriples)
+
+    def close(self):
+        """Finish writing, and move the output into place"""
+        if self._file.closed:
+            return
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def discard(self):
+        """Stop writing, and delete the unfinished output. The previous output at `path`, if any, is left as is."""
+        if self._file.closed:
+            return
+        self._file.close()
+        os.remove(self._tmp_path)
+
+
+class NTriplesBuffer(TripleSink):
+    """Collects triples as N-Triples lines in memory, e.g. to save a MIM's triples as a segment of a build"""
+
+    def __init__(self):
+        self._rows: List[str] = []
+
+    def add(self, triple: Tuple[Node, Node, Node]):
+        """Add a triple"""
+        self._rows.append(nt_row(triple))
+
+    def getvalue(self) -> str:
+        """Get the triples added so far, as N-Triples"""
+        return ''.join(self._rows)
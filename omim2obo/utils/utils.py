@@ -1,5 +1,8 @@
 """Misc utilities"""
-from typing import Dict, List, Optional, Tuple, Union
+import os
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 
 import pandas as pd
 from rdflib import URIRef
@@ -22,6 +25,67 @@ def remove_angle_brackets(uris: Union[str, List[str]]) -> Union[str, List[str]]:
     return uris2[0] if str_input else uris2
 
 
+class ProtectedAssociation(NamedTuple):
+    """A row of protected-disease-gene.tsv. MIMs and HGNC ID are unprefixed."""
+    phenotype_mim: str
+    gene_mim: str
+    hgnc_id: str
+    mondo_id: str
+    orcid: Optional[URIRef]
+
+
+class ProtectedAssociations:
+    """Index of protected-disease-gene.tsv, w/ O(1) lookups by (phenotype MIM, gene MIM), phenotype MIM, and gene MIM.
+
+    Use get_protected_associations() to get the index that is shared by all users of the file during a build.
+
+    :param associations: All rows, in file order. Rows w/out a gene only count toward MONDO mappings.
+    """
+
+    def __init__(self, associations: List[ProtectedAssociation]):
+        self.associations = associations
+        self.by_pheno_gene: Dict[Tuple[str, str], ProtectedAssociation] = {}
+        self.by_phenotype: Dict[str, List[ProtectedAssociation]] = defaultdict(list)
+        self.by_gene: Dict[str, List[ProtectedAssociation]] = defaultdict(list)
+        for x in associations:
+            self.by_phenotype[x.phenotype_mim].append(x)
+            if x.gene_mim:
+                self.by_pheno_gene[(x.phenotype_mim, x.gene_mim)] = x
+                self.by_gene[x.gene_mim].append(x)
+
+    @classmethod
+    def from_tsv(cls, path=DISEASE_GENE_PROTECTED_PATH) -> 'ProtectedAssociations':
+        """Load from TSV"""
+        df = pd.read_csv(path, sep='\t', dtype=str).fillna('')
+        # Unprefix: e.g. OMIM:619151 -> 619151
+        mims_and_ids = [df[col].str.split(':').str[-1] for col in ['phenotype_mim', 'gene_mim', 'hgnc_id']]
+        orcids = [ORCID[x.replace('https://orcid.org/', '')] if x else None for x in df['orcid']]
+        return cls([ProtectedAssociation(*x) for x in zip(*mims_and_ids, df['mondo_id'], orcids)])
+
+    def get(self, phenotype_mim: str, gene_mim: str) -> Optional[ProtectedAssociation]:
+        """Get the protected association between a phenotype and gene, if any"""
+        return self.by_pheno_gene.get((phenotype_mim, gene_mim))
+
+    def for_phenotype(self, phenotype_mim: str) -> List[ProtectedAssociation]:
+        """Get the protected associations of a phenotype"""
+        return self.by_phenotype.get(phenotype_mim, [])
+
+    def for_gene(self, gene_mim: str) -> List[ProtectedAssociation]:
+        """Get the protected associations of a gene"""
+        return self.by_gene.get(gene_mim, [])
+
+
+@lru_cache(maxsize=None)
+def _load_protected_associations(path: str, _mtime_ns: int) -> ProtectedAssociations:
+    """Load protected associations, once per version of the file"""
+    return ProtectedAssociations.from_tsv(path)
+
+
+def get_protected_associations(path=DISEASE_GENE_PROTECTED_PATH) -> ProtectedAssociations:
+    """Get index of protected disease-gene associations. The file is only read again if it has changed."""
+    return _load_protected_associations(str(path), os.stat(path).st_mtime_ns)
+
+
 def get_d2g_protected(
     path=DISEASE_GENE_PROTECTED_PATH
 ) -> Dict[Tuple[str, str], Tuple[str, Optional[URIRef]]]:
@@ -32,17 +96,7 @@ def get_d2g_protected(
 
     :return: Dictionary with (phenotype MIM, gene MIM) keys and (HGNC id, curator ORCID) values.
     """
-    df = pd.read_csv(path, sep='\t').fillna('')
-    for col in ['phenotype_mim', 'gene_mim', 'hgnc_id']:
-        df[col] = df[col].apply(lambda x: x.split(':')[1])
-    
-    return {
-        (x['phenotype_mim'], x['gene_mim']): (
-            x['hgnc_id'],
-            ORCID[x['orcid'].replace('https://orcid.org/', '')] if x['orcid'] else None
-        )
-        for x in df.to_dict(orient='records')
-    }
+    return {k: (x.hgnc_id, x.orcid) for k, x in get_protected_associations(path).by_pheno_gene.items()}
 
 
 def get_protected_mondo_mappings(
@@ -52,19 +106,11 @@ def get_protected_mondo_mappings(
 
     :return: Dictionary with phenotype MIM as keys and set of MONDO IDs (as CURIEs) as values.
     """
-    df = pd.read_csv(path, sep='\t').fillna('')
-    df['phenotype_mim'] = df['phenotype_mim'].apply(lambda x: x.split(':')[1] if ':' in str(x) else x)
-    
-    mondo_mappings = {}
-    for _, row in df.iterrows():
-        p_mim = row['phenotype_mim']
-        mondo_id = row['mondo_id']
-        if p_mim and mondo_id:
-            if p_mim not in mondo_mappings:
-                mondo_mappings[p_mim] = set()
-            mondo_mappings[p_mim].add(mondo_id)
-    
-    return mondo_mappings
+    mondo_mappings: Dict[str, set] = defaultdict(set)
+    for x in get_protected_associations(path).associations:
+        if x.phenotype_mim and x.mondo_id:
+            mondo_mappings[x.phenotype_mim].add(x.mondo_id)
+    return dict(mondo_mappings)
 
 
 def get_d2g_exclusions_by_curator(path=DISEASE_GENE_EXCLUSIONS_PATH) -> Dict[str, Optional[URIRef]]:
@@ -77,3 +77,26 @@ def test_transform_entry_number_sign():
     omim_uri = OMIM[str(entry['mimNumber'])]
     assert (omim_uri, BIOLINK['category'], BIOLINK['Disease']) in graph
     print(graph.serialize(format='turtle'))
+
+
+def test_cleanup_title():
+    assert cleanup_title('MUSCULAR DYSTROPHY, TYPE IIIB') == 'muscular dystrophy, type 3b'
+    assert cleanup_title('X INACTIVATION OF THE GENE') == 'x inactivation of the gene'
+    assert cleanup_title('SYNDROME C') == 'syndrome c'
+    assert cleanup_title('EHLERS-DANLOS SYNDROME AND BEHCET') == 'ehlers-danlos syndrome and Behcet'
+    # Non-default args bypass the word cache
+    assert cleanup_title('BEHCET DISEASE TYPE II', word_replacements={'disease': 'Disease'}) == 'behcet Disease type 2'
+    assert cleanup_title('Behcet syndrome II', replacement_case_method='upper') == 'BEHCET SYNDROME 2'
+
+
+def test_recapitalize_acronyms_in_titles():
+    known_abbrevs = {'ACS1', 'SCLC1'}
+    for abbrevs in [known_abbrevs, get_abbrev_lookup(known_abbrevs)]:
+        assert recapitalize_acronyms_in_titles('acs1 and sclc1 syndrome', abbrevs) == 'ACS1 and SCLC1 syndrome'
+        assert recapitalize_acronyms_in_titles(['acs1', 'MODY type 2'], abbrevs) == ['ACS1', 'MODY type 2']
+    # Inferred from the title itself
+    assert recapitalize_acronyms_in_title('mody, including MODY', set()) == 'mody, including MODY'
+    assert recapitalize_acronyms_in_title('no  abbreviations', set()) == 'no  abbreviations'
+    # Precedence: Known over inferred, then last in sort order
+    assert recapitalize_acronyms_in_title('cdg1 type CDG1 syndrome', {'Cdg1'}) == 'Cdg1 type CDG1 syndrome'
+    assert get_abbrev_lookup(['Cdg1', 'CDG1']) == get_abbrev_lookup(['CDG1', 'Cdg1']) == {'cdg1': 'Cdg1'}
@@ -1,3 +1,5 @@
+import pytest
+
 from omim2obo.parsers.omim_txt_parser import *
 from omim2obo.config import ROOT_DIR, CONFIG
 
@@ -29,20 +31,164 @@ def test_parse_omim_id_4():
 
 
 def test_parse_mim_titles():
-    with open(ROOT_DIR / 'tests/files/mimTitles.txt', 'r') as fin:
-        lines = fin.readlines()
-    omim_type, omim_replaced = parse_mim_titles(lines)
+    rows = read_mim_file_rows(ROOT_DIR / 'tests/files/mimTitles.txt', MimTitlesRow)
+    omim_type, omim_replaced = parse_mim_titles(rows)
     assert len(omim_type) > 27000
     assert len(omim_replaced) > 1300
     assert '100500' in omim_replaced
     assert omim_replaced['162820'] == ['147060', '150550', '252270']
-    assert omim_type['100050'] == 'NCIT:C71458'
+    assert omim_type['100050'].omim_type == OmimType.SUSPECTED
+
+
+def test_parse_mim_titles_records():
+    lines = [
+        '# Copyright (c) 1966-2025 Johns Hopkins University. Use of this file adheres to the terms specified at '
+        'https://omim.org/help/agreement.\n',
+        '# Prefix\tMIM Number\tPreferred Title; symbol\tAlternative Title(s); symbol(s)\tIncluded Title(s); '
+        'symbols\n',
+        'Number Sign\t101200\tAPERT SYNDROME\tACROCEPHALOSYNDACTYLY, TYPE I; ACS1;; ACS IA\t\n',
+        'Asterisk\t100640\tALDEHYDE DEHYDROGENASE 1 FAMILY, MEMBER A1; ALDH1A1\tALDEHYDE DEHYDROGENASE 1; ALDH1;; '
+        'ALDH, LIVER CYTOSOLIC\tACETALDEHYDE DEHYDROGENASE 1, FORMERLY, INCLUDED; ALDH1, FORMERLY, INCLUDED\n',
+        'Caret\t100500\tMOVED TO 200150\t\t\n',
+    ]
+    records, omim_replaced = parse_mim_titles(to_mim_file_rows(lines, MimTitlesRow))
+    assert omim_replaced == {'100500': ['200150']}
+    assert records['101200'].omim_type == OmimType.PHENOTYPE
+    assert records['101200'].pref_title == 'APERT SYNDROME'
+    assert records['101200'].pref_symbols == ()
+    assert records['101200'].alt_titles == ('ACROCEPHALOSYNDACTYLY, TYPE I', 'ACS IA')
+    assert records['101200'].alt_symbols == ('ACS1',)
+    assert records['101200'].included_titles == ()
+    assert records['100640'].pref_symbols == ('ALDH1A1',)
+    assert records['100640'].included_titles == ('ACETALDEHYDE DEHYDROGENASE 1, FORMERLY, INCLUDED',)
+    assert records['100640'].included_symbols == ('ALDH1, FORMERLY, INCLUDED',)
 
 
 def test_parse_morbid_map():
-    with open(ROOT_DIR / 'tests/files/morbidmap.txt', 'r') as fin:
-        lines = fin.readlines()
-    morbid_map = parse_morbid_map(lines)
+    morbid_map = parse_morbid_map(read_mim_file_rows(ROOT_DIR / 'tests/files/morbidmap.txt', MorbidMapRow))
     print(morbid_map)
 
 
+def test_get_hgnc_maps(tmp_path):
+    path = tmp_path / 'hgnc_complete_set.txt'
+    rows = [f'HGNC:{i}\tGENE{i}\tname\t{i}' for i in range(1, 200)] + ['HGNC:200\t\tname\t200']
+    path.write_text('hgnc_id\tsymbol\tname\tentrez_id\n' + '\n'.join(rows) + '\n')
+    symbol_ids = get_hgnc_symbol_id_map(path)
+    assert len(symbol_ids) == 199
+    assert symbol_ids['GENE5'] == '5'
+    assert get_hgnc_id_symbol_map(path)['HGNC:5'] == 'GENE5'
+    # Cached: Not re-parsed unless the file changes
+    cache_path = tmp_path / ('hgnc_complete_set.txt' + HGNC_CACHE_SUFFIX)
+    assert cache_path.exists()
+    cache_mtime = cache_path.stat().st_mtime_ns
+    assert get_hgnc_symbol_id_map(path) == symbol_ids
+    assert cache_path.stat().st_mtime_ns == cache_mtime
+    path.write_text('hgnc_id\tsymbol\tname\tentrez_id\nHGNC:5\tGENE5A\tname\t5\n')
+    assert get_hgnc_symbol_id_map(path) == {'GENE5A': '5'}
+
+
+def test_update_mim_file_with_protected(tmp_path, monkeypatch):
+    protected_path, hgnc_path = tmp_path / 'protected-disease-gene.tsv', tmp_path / 'hgnc_complete_set.txt'
+    protected_path.write_text(
+        'phenotype_mim\tmondo_id\tmondo_label\ttype\tgene_mim\thgnc_id\torcid\tcomment\n'
+        'OMIM:619151\tMONDO:0030894\tAMED SYNDROME, DIGENIC\tdigenic\tOMIM:100650\tHGNC:404\t\t\n'
+        'OMIM:619151\tMONDO:0030894\tAMED SYNDROME, DIGENIC\tdigenic\tOMIM:103710\tHGNC:253\t\t\n'
+        'OMIM:619151\tMONDO:0030894\tAMED SYNDROME, DIGENIC\tdigenic\tOMIM:103710\tHGNC:253\t\t\n'
+        'OMIM:100050\tMONDO:0007037\tAARSKOG SYNDROME\tmanually reviewed\t\t\t\t\n')
+    hgnc_path.write_text('hgnc_id\tsymbol\nHGNC:404\tALDH2\nHGNC:253\tATR\n')
+    mim_titles = {'619151': MimTitleRecord(OmimType.PHENOTYPE, 'AMED SYNDROME, DIGENIC', ('AMEDS',))}
+    morbidmap_path, outpath = tmp_path / 'morbidmap.txt', tmp_path / 'morbidmap-protected-added.tsv'
+    morbidmap_path.write_text(
+        '# Copyright (c) 1966-2025 Johns Hopkins University.\n'
+        '# Phenotype\tGene/Locus And Other Related Symbols\tMIM Number\tCyto Location\n'
+        'Amed syndrome, digenic, 619151 (3)\tALDH2\t100650\t12q24.12\n')
+    assert update_mim_file_with_protected(
+        'morbidmap.txt', str(morbidmap_path), str(outpath), protected_path, mim_titles, hgnc_path)
+    # Existing association & duplicate protected row not added again. No header, so it can be read like the .txt.
+    inputs_line, *lines = outpath.read_text().splitlines(keepends=True)
+    assert inputs_line.startswith('# Protected rows added. Inputs: ')
+    assert lines == [
+        'Amed syndrome, digenic, 619151 (3)\tALDH2\t100650\t12q24.12\n',
+        'Amed syndrome, digenic; ameds, 619151 (3)\tATR\t103710\t\n']
+    assert parse_morbid_map(read_mim_file_rows(outpath, MorbidMapRow))['103710']['phenotype_associations'][0] \
+        .phenotype_mim == '619151'
+    # Only written again if inputs changed. Not even hashed if their sizes & modification times are the same.
+    contents = outpath.read_text()
+    monkeypatch.setattr('omim2obo.parsers.omim_txt_parser.hash_file', None)
+    assert not update_mim_file_with_protected(
+        'morbidmap.txt', str(morbidmap_path), str(outpath), protected_path, mim_titles, hgnc_path)
+    monkeypatch.undo()
+    # - Touched, but unchanged: Only the stats in the inputs line are updated
+    os.utime(hgnc_path, ns=(0, 0))
+    assert not update_mim_file_with_protected(
+        'morbidmap.txt', str(morbidmap_path), str(outpath), protected_path, mim_titles, hgnc_path)
+    assert outpath.read_text() != contents
+    assert outpath.read_text().split('. Input stats: ')[0] == contents.split('. Input stats: ')[0]
+    assert outpath.read_text().split('\n', 1)[1] == contents.split('\n', 1)[1]
+    monkeypatch.setattr('omim2obo.parsers.omim_txt_parser.hash_file', None)
+    assert not update_mim_file_with_protected(
+        'morbidmap.txt', str(morbidmap_path), str(outpath), protected_path, mim_titles, hgnc_path)
+    monkeypatch.undo()
+    hgnc_path.write_text('hgnc_id\tsymbol\nHGNC:404\tALDH2\nHGNC:253\tATR1\n')
+    assert update_mim_file_with_protected(
+        'morbidmap.txt', str(morbidmap_path), str(outpath), protected_path, mim_titles, hgnc_path)
+    assert outpath.read_text().endswith('Amed syndrome, digenic; ameds, 619151 (3)\tATR1\t103710\t\n')
+
+    mim2gene_path, outpath = tmp_path / 'mim2gene.txt', tmp_path / 'mim2gene-protected-added.tsv'
+    mim2gene_path.write_text(
+        '# MIM Number\tMIM Entry Type (see FAQ 1.3 at https://omim.org/help/faq)\tEntrez Gene ID (NCBI)\t'
+        'Approved Gene Symbol (HGNC)\tEnsembl Gene ID (Ensembl)\n'
+        '103710\tgene\t545\tATR1\tENSG00000175054\n')
+    update_mim_file_with_protected(
+        'mim2gene.txt', str(mim2gene_path), str(outpath), protected_path, hgnc_path=hgnc_path)
+    assert outpath.read_text().split('\n', 1)[1] == \
+        '103710\tgene\t545\tATR1\tENSG00000175054\n100650\tgene\t\tALDH2\t\n'
+    # Protected row w/ unknown HGNC ID or phenotype MIM: Error names the row
+    hgnc_path.write_text('hgnc_id\tsymbol\nHGNC:404\tALDH2\n')
+    with pytest.raises(RuntimeError, match="HGNC ID of protected row.*hgnc_id='253'"):
+        update_mim_file_with_protected(
+            'mim2gene.txt', str(mim2gene_path), str(outpath), protected_path, hgnc_path=hgnc_path)
+    with pytest.raises(RuntimeError, match="Phenotype MIM of protected row.*phenotype_mim='619151'"):
+        update_mim_file_with_protected(
+            'morbidmap.txt', str(morbidmap_path), str(tmp_path / 'morbidmap-protected-added.tsv'), protected_path, {},
+            hgnc_path)
+
+
+def test_get_hgnc_map(tmp_path):
+    header = 'Chromosome\tMIM Number\tGene/Locus And Other Related Symbols\tApproved Gene Symbol\tComments\n'
+    rows = 'chr1\t100640\tALDH1A1, ALDH1\tALDH1A1\t\nchr1\t100650\tALDH2\tALDH2\t\nchr1\t100660\tALDH3A1\t\t\n'
+    expected = {'100640': 'ALDH1A1', '100650': 'ALDH2'}
+    # Commented header, as downloaded: Parsed in memory, w/out modifying the file
+    path = tmp_path / 'genemap2.txt'
+    path.write_text('# Copyright\n# Generated: 2025-03-05\n# See end of file\n# ' + header + rows + '# Keys\n')
+    contents = path.read_text()
+    assert get_hgnc_map(path, 'Approved Gene Symbol') == expected
+    assert path.read_text() == contents
+    # Uncommented header, as converted to TSV
+    path = tmp_path / 'genemap2.tsv'
+    path.write_text(header + rows)
+    assert get_hgnc_map(path, 'Approved Gene Symbol') == expected
+    with pytest.raises(RuntimeError):
+        get_hgnc_map(path, 'Approved Gene Symbol (HGNC)')
+
+
+def test_parse_morbid_map_associations():
+    lines = [
+        '# Phenotype\tGene/Locus And Other Related Symbols\tMIM Number\tCyto Location\n',
+        '17,20-lyase deficiency, isolated, 202110 (3)\tCYP17A1, CYP17, P450C17\t609300\t10q24.32\n',
+        '{Alzheimer disease, susceptibility to}, 104300 (2)\tCYP17A1, CYP17, P450C17\t609300\t10q24.32\n',
+        'Hypertension, salt-sensitive essential (1)\tCYP17A1, CYP17, P450C17\t609300\t10q24.32\n',
+    ]
+    gene_phenotypes = parse_morbid_map(to_mim_file_rows(lines, MorbidMapRow))
+    assert gene_phenotypes['609300']['gene_symbols'] == ['CYP17A1', 'CYP17', 'P450C17']
+    assocs: List[MorbidMapAssociation] = gene_phenotypes['609300']['phenotype_associations']
+    assert [(x.phenotype_mim, x.phenotype_label, x.mapping_key) for x in assocs] == [
+        ('202110', '17,20-lyase deficiency, isolated, ', 3),
+        ('104300', '{Alzheimer disease, susceptibility to}, ', 2),
+        ('', 'Hypertension, salt-sensitive essential', 1),
+    ]
+    assert assocs[0].mapping_label == MORBIDMAP_PHENOTYPE_MAPPING_KEY_MEANINGS[3]
+    # Associations w/out a phenotype MIM are left out
+    phenotype_genes = get_phenotype_genes(gene_phenotypes)
+    assert list(phenotype_genes) == ['202110', '104300']
+    assert phenotype_genes['202110'][0].gene_mim == '609300'
@@ -0,0 +1,29 @@
+from omim2obo.parsers.omim_txt_reader import MorbidMapRow, PhenotypicSeriesRow, read_mim_file_lines, \
+    read_mim_file_rows
+
+
+def test_read_mim_file_rows(tmp_path):
+    path = tmp_path / 'phenotypicSeries.txt'
+    path.write_text(
+        '# Copyright (c) 1966-2025 Johns Hopkins University.\n'
+        '# Phenotypic Series Number\tMIM Number\tPhenotype\n'
+        'PS100070\tAortic aneurysm, familial abdominal\n'
+        'PS100070\t100070\tAortic aneurysm, familial abdominal 1\r\n'
+        '\n'
+        '# Generated: 2025-03-05\n')
+    assert list(read_mim_file_lines(path)) == [
+        'PS100070\tAortic aneurysm, familial abdominal', 'PS100070\t100070\tAortic aneurysm, familial abdominal 1']
+    assert list(read_mim_file_rows(path, PhenotypicSeriesRow)) == [
+        PhenotypicSeriesRow('PS100070', '', 'Aortic aneurysm, familial abdominal'),
+        PhenotypicSeriesRow('PS100070', '100070', 'Aortic aneurysm, familial abdominal 1'),
+    ]
+    # Invalid lines skipped
+    path = tmp_path / 'morbidmap.txt'
+    path.write_text('17,20-lyase deficiency, isolated, 202110 (3)\tCYP17A1, CYP17, P450C17\t609300\t10q24.32\n'
+        '17-alpha-hydroxylase deficiency\n')
+    rows = list(read_mim_file_rows(path, MorbidMapRow))
+    assert len(rows) == 1
+    assert rows[0].mim_number == '609300' and rows[0].cyto_location == '10q24.32'
+    # Empty file
+    path.write_text('')
+    assert list(read_mim_file_rows(path, MorbidMapRow)) == []
@@ -0,0 +1,64 @@
+from omim2obo.build_cache import BuildSegmentStore, make_build_manifest, reuse_previous_build, save_build_manifest
+
+
+def test_reuse_previous_build(tmp_path):
+    manifest_path = tmp_path / 'build-manifest.json'
+    inputs = [tmp_path / 'mimTitles.txt', tmp_path / 'morbidmap.txt']
+    for path in inputs:
+        path.write_text(f'# {path.name}\n')
+    ontology_path, review_path = tmp_path / 'omim.ttl', tmp_path / 'review.tsv'
+    outputs = [ontology_path, review_path]
+
+    def build(version_date: str, **options):
+        """Build, unless the previous build can be reused. Returns True if built."""
+        manifest = make_build_manifest(inputs, options, tmp_path)
+        if reuse_previous_build(manifest, outputs, version_date, ontology_path, manifest_path, tmp_path):
+            return False
+        ontology_path.write_text(
+            '<http://purl.obolibrary.org/obo/mondo/omim.owl> a owl:Ontology ;\n'
+            f'    owl:versionIRI <http://purl.obolibrary.org/obo/mondo/releases/{version_date}/omim.owl> ;\n'
+            f'    owl:versionInfo "{version_date}" .\n'
+            f'OMIM:100050 rdfs:comment "{version_date}" .\n')
+        review_path.write_text('classCode\tvalue\n')
+        save_build_manifest(manifest, outputs, version_date, manifest_path, tmp_path)
+        return True
+
+    assert build('2025-01-01')
+    # Unchanged: Reused, w/ version date patched
+    assert not build('2025-01-02')
+    assert ontology_path.read_text() == (
+        '<http://purl.obolibrary.org/obo/mondo/omim.owl> a owl:Ontology ;\n'
+        '    owl:versionIRI <http://purl.obolibrary.org/obo/mondo/releases/2025-01-02/omim.owl> ;\n'
+        '    owl:versionInfo "2025-01-02" .\n'
+        'OMIM:100050 rdfs:comment "2025-01-01" .\n')
+    assert not build('2025-01-02')
+    # Input changed
+    inputs[1].write_text('# morbidmap.txt\n100050\n')
+    assert build('2025-01-03')
+    assert not build('2025-01-03')
+    # Options changed
+    assert build('2025-01-03', triple_sink='ntriples')
+    # Output modified or missing
+    review_path.write_text('edited')
+    assert build('2025-01-03', triple_sink='ntriples')
+    review_path.unlink()
+    assert build('2025-01-03', triple_sink='ntriples')
+
+
+def test_build_segment_store(tmp_path):
+    path = tmp_path / 'build-segments.db'
+    store = BuildSegmentStore(path, 'v1')
+    assert store.get_fingerprints() == {}
+    store.update({'100050': ('a', '<x> <y> "1" .\n'), '100100': ('b', '<x> <y> "2" .\n')}, {'100050', '100100'})
+    store.close()
+    # Reopened: Segments of MIMs no longer in the build are deleted
+    store = BuildSegmentStore(path, 'v1')
+    assert store.get_fingerprints() == {'100050': 'a', '100100': 'b'}
+    store.update({'100050': ('c', '<x> <y> "3" .\n')}, {'100050'})
+    assert store.get_fingerprints() == {'100050': 'c'}
+    assert store.get_ntriples('100050') == '<x> <y> "3" .\n'
+    store.close()
+    # Context changed: All segments discarded
+    store = BuildSegmentStore(path, 'v2')
+    assert store.get_fingerprints() == {}
+    store.close()
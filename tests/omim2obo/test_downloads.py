@@ -0,0 +1,130 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from omim2obo.downloads import SourceFile, download_file, prefetch, verify_hgnc, verify_not_html, verify_sssom
+
+
+class StubFileHandler(BaseHTTPRequestHandler):
+    """Stub file server. Serves the server's files: {path: body}, w/ ETags. Supports conditional & range requests."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        body: bytes = self.server.files[self.path]
+        etag = f'"{hash(body)}"'
+        status = 200
+        if self.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+        elif self.headers.get('Range') and self.headers.get('If-Range') == etag:
+            status, body = 206, body[int(self.headers['Range'][len('bytes='):-1]):]
+        self.send_response(status)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def file_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubFileHandler)
+    server.requests, server.files = [], {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_file(file_server, tmp_path):
+    url = f'http://127.0.0.1:{file_server.server_port}/mimTitles.txt'
+    path = tmp_path / 'mimTitles.txt'
+    file_server.files['/mimTitles.txt'] = b'# Prefix\tMIM Number\n*\t100050\n'
+    # First download
+    assert download_file(url, path, chunk_size=8)
+    assert path.read_bytes() == file_server.files['/mimTitles.txt']
+    assert not (tmp_path / 'mimTitles.txt.part').exists()
+    # Unchanged: Not downloaded again
+    assert not download_file(url, path)
+    assert 'If-None-Match' in file_server.requests[-1]
+    # Changed
+    file_server.files['/mimTitles.txt'] += b'%\t100070\n'
+    assert download_file(url, path)
+    assert path.read_bytes() == file_server.files['/mimTitles.txt']
+    # Interrupted download: Resumed from the end of the .part file
+    file_server.files['/mimTitles.txt'] += b'#\t100100\n'
+    meta_path = tmp_path / 'mimTitles.txt.meta.json'
+    meta = json.loads(meta_path.read_text())
+    meta['partial'] = {'url': url, 'etag': f'"{hash(file_server.files["/mimTitles.txt"])}"'}
+    meta_path.write_text(json.dumps(meta))
+    (tmp_path / 'mimTitles.txt.part').write_bytes(file_server.files['/mimTitles.txt'][:10])
+    assert download_file(url, path)
+    assert file_server.requests[-1]['Range'] == 'bytes=10-'
+    assert path.read_bytes() == file_server.files['/mimTitles.txt']
+
+
+def test_download_file_verify(file_server, tmp_path):
+    url = f'http://127.0.0.1:{file_server.server_port}/genemap2.txt'
+    path = tmp_path / 'genemap2.txt'
+    path.write_text('previous')
+    file_server.files['/genemap2.txt'] = b'<!DOCTYPE html>\n<html>Log in</html>'
+    with pytest.raises(RuntimeError):
+        download_file(url, path, verify=verify_not_html)
+    assert path.read_text() == 'previous'
+    assert not (tmp_path / 'genemap2.txt.part').exists()
+
+
+def test_prefetch(file_server, tmp_path):
+    base_url = f'http://127.0.0.1:{file_server.server_port}'
+    file_server.files['/mimTitles.txt'] = b'# Prefix\tMIM Number\n*\t100050\n'
+    file_server.files['/hgnc_complete_set.txt'] = b'hgnc_id\tsymbol\nHGNC:5\tA1BG\nHGNC:37133\tA1BG-AS1\n'
+    file_server.files['/mondo_exactmatch_omim.sssom.tsv'] = \
+        b'# mapping_set_id: x\nsubject_id\tpredicate_id\tobject_id\nMONDO:1\tskos:exactMatch\tOMIM:100050\n'
+    sources = [
+        SourceFile(f'{base_url}/mimTitles.txt', tmp_path / 'mimTitles.txt', verify_not_html),
+        SourceFile(f'{base_url}/hgnc_complete_set.txt', tmp_path / 'hgnc' / 'hgnc_complete_set.txt',
+            lambda path: verify_hgnc(path, min_lines=3)),
+        SourceFile(f'{base_url}/mondo_exactmatch_omim.sssom.tsv', tmp_path / 'mondo_exactmatch_omim.sssom.tsv',
+            verify_sssom),
+    ]
+    # Download
+    changed = prefetch(sources)
+    assert all(changed.values())
+    assert (tmp_path / 'hgnc' / 'hgnc_complete_set.txt').read_bytes() == file_server.files['/hgnc_complete_set.txt']
+    assert not any(prefetch(sources).values())
+    # Mirror
+    mirror_dir = tmp_path / 'mirror'
+    mirror_dir.mkdir()
+    for path, body in file_server.files.items():
+        (mirror_dir / path[1:]).write_bytes(body)
+    (mirror_dir / 'mimTitles.txt').write_bytes(b'# Prefix\tMIM Number\n*\t100100\n')
+    n_requests = len(file_server.requests)
+    changed = prefetch(sources, mirror_dir)
+    assert changed == {tmp_path / 'mimTitles.txt': True, tmp_path / 'hgnc' / 'hgnc_complete_set.txt': False,
+        tmp_path / 'mondo_exactmatch_omim.sssom.tsv': False}
+    assert (tmp_path / 'mimTitles.txt').read_bytes() == (mirror_dir / 'mimTitles.txt').read_bytes()
+    assert len(file_server.requests) == n_requests
+    # Verification fails: Other files are still fetched
+    (mirror_dir / 'hgnc_complete_set.txt').write_bytes(b'symbol\nA1BG\nA1BG-AS1\n')
+    (mirror_dir / 'mimTitles.txt').write_bytes(b'# Prefix\tMIM Number\n*\t100200\n')
+    with pytest.raises(RuntimeError, match='hgnc_complete_set.txt'):
+        prefetch(sources, mirror_dir)
+    assert (tmp_path / 'hgnc' / 'hgnc_complete_set.txt').read_bytes() == file_server.files['/hgnc_complete_set.txt']
+    assert (tmp_path / 'mimTitles.txt').read_bytes() == (mirror_dir / 'mimTitles.txt').read_bytes()
+    # Optional file fails: Only warned about, if allowed
+    sources[2] = SourceFile(sources[2].url, sources[2].path, verify_sssom, optional=True)
+    (mirror_dir / 'hgnc_complete_set.txt').write_bytes(file_server.files['/hgnc_complete_set.txt'])
+    (mirror_dir / 'mondo_exactmatch_omim.sssom.tsv').unlink()
+    with pytest.raises(RuntimeError, match='mondo_exactmatch_omim.sssom.tsv'):
+        prefetch(sources, mirror_dir)
+    changed = prefetch(sources, mirror_dir, allow_optional_missing=True)
+    assert tmp_path / 'mondo_exactmatch_omim.sssom.tsv' not in changed
+    # Required file fails: Still raises
+    (mirror_dir / 'mimTitles.txt').unlink()
+    with pytest.raises(RuntimeError, match='mimTitles.txt'):
+        prefetch(sources, mirror_dir, allow_optional_missing=True)
@@ -0,0 +1,87 @@
+import pytest
+
+from omim2obo.entry_cache import *
+
+
+def test_fetch_journal(tmp_path):
+    journal = FetchJournal(tmp_path / 'journal.jsonl')
+    assert journal.read() == []
+
+    def fetch():
+        """Fetch that fails after 3 entries"""
+        for i in range(3):
+            yield {'mimNumber': 100000 + i, 'referenceList': []}
+        raise RuntimeError('Unexpected error')
+
+    with pytest.raises(RuntimeError):
+        for _ in journal.record(fetch()):
+            pass
+    with open(journal.path, 'a') as f:
+        f.write('{"mimNumber": 1000')  # partial write
+    assert [x['mimNumber'] for x in journal.read()] == [100000, 100001, 100002]
+    journal.clear()
+    assert journal.read() == []
+
+
+def test_entry_cache_db(tmp_path):
+    tsv_path = tmp_path / 'mappings.tsv'
+    with open(tsv_path, 'w') as f:
+        f.write('mim\tis_phenotype\tdate_fetched\tumls_ids\torphanet_ids\n'
+                '100050\tFalse\t2025-09-21\tC3149220\t915\n'
+                '100070\tTrue\t2025-03-23\t\t\n')
+    with EntryCacheDb(tmp_path / 'cache.db') as db:
+        db.sync_from_tsv('mappings', tsv_path)
+        assert db.get_mims('mappings') == {'100050', '100070'}
+        db.upsert('mappings', [
+            {'mim': '100070', 'is_phenotype': True, 'date_fetched': '2025-10-01', 'umls_ids': 'C0162871',
+             'orphanet_ids': ''},
+            {'mim': '100060', 'is_phenotype': False, 'date_fetched': '2025-10-01', 'umls_ids': '',
+             'orphanet_ids': '86'}])
+        db.export_tsv('mappings', tsv_path)
+    with open(tsv_path) as f:
+        assert f.read() == 'mim\tis_phenotype\tdate_fetched\tumls_ids\torphanet_ids\n' \
+            '100050\tFalse\t2025-09-21\tC3149220\t915\n' \
+            '100060\tFalse\t2025-10-01\t\t86\n' \
+            '100070\tTrue\t2025-10-01\tC0162871\t\n'
+    # TSV changed outside of the cache, e.g. pulled from git: re-imported
+    with open(tsv_path, 'a') as f:
+        f.write('100100\tTrue\t2025-10-02\t\t\n')
+    with EntryCacheDb(tmp_path / 'cache.db') as db:
+        assert db.sync_from_tsv('mappings', tsv_path)
+        assert db.get_mims('mappings') == {'100050', '100060', '100070', '100100'}
+
+
+def test_entry_cache_db_unchanged(tmp_path):
+    tsv_path = tmp_path / 'mappings.tsv'
+    contents = 'mim\tis_phenotype\tdate_fetched\tumls_ids\torphanet_ids\n100050\tFalse\t2025-09-21\tC3149220\t915\n'
+    tsv_path.write_text(contents)
+    row = {'mim': '100060', 'is_phenotype': False, 'date_fetched': '2025-10-01', 'umls_ids': '', 'orphanet_ids': '86'}
+    with EntryCacheDb(tmp_path / 'cache.db') as db:
+        assert db.sync_from_tsv('mappings', tsv_path)
+        # Same data: not rewritten
+        assert db.upsert('mappings', [{**row, 'mim': '100050', 'umls_ids': 'C3149220', 'orphanet_ids': '915',
+            'date_fetched': '2025-09-21'}]) == 0
+        assert not db.export_tsv('mappings', tsv_path)
+        # Changed rows are exported, even if the process stopped before doing so
+        assert db.upsert('mappings', [row]) == 1
+    # TSV touched, e.g. by a fresh checkout, but contents unchanged: not re-imported, so the new row is kept
+    os.utime(tsv_path, ns=(0, 0))
+    with EntryCacheDb(tmp_path / 'cache.db') as db:
+        assert not db.sync_from_tsv('mappings', tsv_path)
+        assert db.get_mims('mappings') == {'100050', '100060'}
+        assert db.export_tsv('mappings', tsv_path)
+        assert tsv_path.read_text() == contents + '100060\tFalse\t2025-10-01\t\t86\n'
+        assert not db.export_tsv('mappings', tsv_path)
+
+
+def test_entry_cache_db_raw_entries(tmp_path):
+    entries = [
+        {'mimNumber': 100070, 'phenotypeMapList': [{'phenotypeMap': {'phenotypicSeriesNumber': 'PS100070'}}]},
+        {'mimNumber': 100050, 'referenceList': [{'reference': {'pubmedID': 6875424}}]},
+    ]
+    with EntryCacheDb(tmp_path / 'cache.db') as db:
+        db.upsert_raw_entries(entries[:1], '2025-09-01')
+        db.upsert_raw_entries(entries[1:], '2025-10-01')
+        assert list(db.iter_raw_entries()) == [(entries[1], '2025-10-01'), (entries[0], '2025-09-01')]
+        assert list(db.iter_raw_entries(since_date='2025-09-15')) == [(entries[1], '2025-10-01')]
+    assert decompress_json(*compress_json(entries)) == entries
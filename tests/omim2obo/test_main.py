@@ -0,0 +1,79 @@
+from omim2obo.main import *
+
+
+def test_serialize_turtle(tmp_path):
+    graph = Graph()
+    for prefix, uri in CURIE_MAP.items():
+        graph.namespace_manager.bind(prefix, URIRef(uri))
+    graph.add((OMIM['100050'], RDF.type, OWL.Class))
+    graph.add((OMIM['100050'], RDFS.label, Literal('aarskog syndrome, autosomal dominant')))
+    add_triple_and_optional_annotations(graph, OMIM['100050'], oboInOwl.hasExactSynonym, 'AAS',
+        [(oboInOwl.hasSynonymType, OMO['0003000'])])
+    add_subclassof_restriction(graph, RO['0002525'], CHR['9606chr1q43'], OMIM['118494'])
+
+    outpath = tmp_path / 'omim.ttl'
+    serialize_turtle(graph, outpath)
+    with open(outpath, 'r') as f:
+        assert f.read() == graph.serialize(format='turtle')
+
+
+def test_get_cleaned_titles_and_symbols_by_mim():
+    records = {
+        '100050': MimTitleRecord.from_fields(
+            OmimType.PHENOTYPE, 'AARSKOG SYNDROME, AUTOSOMAL DOMINANT', '', ''),
+        '100100': MimTitleRecord.from_fields(
+            OmimType.PHENOTYPE, 'PRUNE BELLY SYNDROME; PBS', 'ABDOMINAL MUSCLES, ABSENCE OF, WITH URINARY TRACT '
+            'ABNORMALITY AND CRYPTORCHIDISM;; EAGLE-BARRETT SYNDROME; EGBRS', ''),
+        '100640': MimTitleRecord.from_fields(
+            OmimType.GENE, 'ALDEHYDE DEHYDROGENASE 1 FAMILY, MEMBER A1; ALDH1A1', 'ALDEHYDE DEHYDROGENASE, LIVER '
+            'CYTOSOLIC;; ALDEHYDE DEHYDROGENASE 1, FORMERLY; ALDH1, FORMERLY',
+            'RETINAL DEHYDROGENASE 1, INCLUDED; RALDH1, INCLUDED'),
+    }
+    cleaned = get_cleaned_titles_and_symbols_by_mim(records)
+    assert list(cleaned.keys()) == list(records.keys())
+    assert cleaned['100100'][:4] == (
+        'prune belly syndrome', ['PBS'], ['abdominal muscles, absence of, with urinary tract abnormality and '
+        'cryptorchidism', 'eagle-barrett syndrome'], ['EGBRS'])
+    assert cleaned['100640'][4:8] == (
+        ['aldehyde dehydrogenase 1'], ['ALDH1'], ['retinal dehydrogenase 1'], ['RALDH1'])
+    assert cleaned == get_cleaned_titles_and_symbols_by_mim(records, workers=2, chunksize=1)
+
+
+def test_mim_inputs_segments():
+    records = {
+        '100050': MimTitleRecord.from_fields(OmimType.PHENOTYPE, 'AARSKOG SYNDROME, AUTOSOMAL DOMINANT', '', ''),
+        '100070': MimTitleRecord.from_fields(OmimType.OBSOLETE, 'MOVED TO 100100', '', ''),
+        '100640': MimTitleRecord.from_fields(
+            OmimType.GENE, 'ALDEHYDE DEHYDROGENASE 1 FAMILY, MEMBER A1; ALDH1A1', '', ''),
+    }
+    pubmed_links_df = pd.DataFrame({'mim': [100050], 'pmid_refs': ['6875424|1234']})
+    mappings_df = pd.DataFrame({'mim': [100050, 100100], 'umls_ids': ['C1861305', ''], 'orphanet_ids': ['', '2']})
+    mim_inputs = get_mim_inputs(
+        records, {'100070': ['100100']}, {'100640': '216'}, {}, {'100640': 'ALDH1A1'}, {'ALDH1A1': '402'},
+        pubmed_links_df, mappings_df)
+    assert list(mim_inputs) == ['100050', '100070', '100640', '100100']
+    assert mim_inputs['100050'].cached_ids == [
+        ('pmid_refs', '6875424'), ('pmid_refs', '1234'), ('umls_ids', 'C1861305')]
+    assert mim_inputs['100640'][2:6] == ('216', None, 'ALDH1A1', '402')
+    assert [mim for mim, x in mim_inputs.items() if needs_cleaning(x)] == ['100050', '100640']
+
+    # Each MIM's segment is the same as its triples in a full build
+    cleaned = get_cleaned_titles_and_symbols_by_mim(
+        {mim: x.record for mim, x in mim_inputs.items() if needs_cleaning(x)})
+    graph = Graph()
+    segments = Graph()
+    for mim, inputs in mim_inputs.items():
+        add_mim_triples(graph, mim, inputs, cleaned.get(mim))
+        segment = NTriplesBuffer()
+        add_mim_triples(segment, mim, inputs, cleaned.get(mim))
+        segments.parse(data=segment.getvalue(), format='nt')
+    assert len(graph) == len(segments) > 0
+    assert set(graph.subjects(SKOS.exactMatch, HGNC['402'])) == {OMIM['100640']}
+    assert set(graph.objects(OMIM['100070'], IAO['0100001'])) == {OMIM['100100']}
+
+    # Fingerprint: Changes only if the MIM's inputs do
+    mim_inputs2 = get_mim_inputs(
+        records, {'100070': ['100100']}, {'100640': '216'}, {}, {'100640': 'ALDH1A1'}, {'ALDH1A1': '403'},
+        pubmed_links_df, mappings_df)
+    assert [mim for mim in mim_inputs
+        if get_mim_inputs_fingerprint(mim_inputs[mim]) != get_mim_inputs_fingerprint(mim_inputs2[mim])] == ['100640']
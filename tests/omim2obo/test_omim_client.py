@@ -0,0 +1,149 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from omim2obo.omim_client import *
+from omim2obo.parsers.omim_entry_parser import get_mapped_ids, get_pubs
+from omim2obo.rate_limiter import RateLimiter
+
+
+class StubOmimHandler(BaseHTTPRequestHandler):
+    """Stub OMIM API. Replies w/ the server's queued (status, headers) responses, then w/ entries for the mimNumbers.
+
+    Requests for any of the server's rate_limited_mims get a 429. Searches return a page of the server's search_mims. If
+    any includes are requested, entries have a referenceList.
+    """
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.client_address))
+        status, headers = self.server.responses.pop(0) if self.server.responses else (200, {})
+        if self.path.startswith('/entry/search'):
+            start = int(re.search(r'start=([0-9]+)', self.path).group(1))
+            mims = self.server.search_mims[start:start + BATCH_SIZE]
+        else:
+            mims = re.search(r'mimNumber=([0-9%C,]+)', self.path).group(1).replace('%2C', ',').split(',')
+        if self.server.rate_limited_mims.intersection(mims):
+            status = 429
+        if status == 200:
+            entry_list = [{'entry': {'mimNumber': int(x), **({'referenceList': []} if 'include=' in self.path else {})}}
+                for x in mims]
+            response = {'searchResponse': {'entryList': entry_list}} if self.path.startswith('/entry/search') \
+                else {'entryList': entry_list}
+            body = json.dumps({'omim': response}).encode()
+        else:
+            body = b'error'
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubOmimHandler)
+    server.requests, server.responses, server.rate_limited_mims, server.search_mims = [], [], set(), []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_omim_client_session(stub_server):
+    client = OmimClient(
+        api_key='test', base_url=f'http://127.0.0.1:{stub_server.server_port}', backoff_factor=0,
+        rate_limiter=RateLimiter(requests_per_second=100, max_requests_per_second=200, daily_quota=3))
+    # Retries: 503, and 429 w/ Retry-After are retried. Connection is reused.
+    stub_server.responses = [(503, {}), (429, {'Retry-After': '0'})]
+    response_dict, err = client._request(
+        client.entry_api_url, {'format': 'json', 'mimNumber': '100050,100100'}, quota_cost=2)
+    assert err is None
+    assert [x['entry']['mimNumber'] for x in response_dict['entryList']] == [100050, 100100]
+    assert len(stub_server.requests) == 3
+    assert len(set(client_address for _, client_address in stub_server.requests)) == 1
+    assert client.rate_limiter.rate == 50  # slowed down due to 429
+    # 429 w/out Retry-After: Daily limit reached. Not retried.
+    stub_server.responses = [(429, {})]
+    response_dict, err = client._request(client.entry_api_url, {'format': 'json', 'mimNumber': '100050'})
+    assert (response_dict, err) == ({}, 'rate-limit')
+    assert len(stub_server.requests) == 4
+    # Daily quota exceeded: Not requested
+    response_dict, err = client._request(client.entry_api_url, {'mimNumber': '100050,100100'}, quota_cost=2)
+    assert (response_dict, err) == ({}, 'rate-limit')
+    assert len(stub_server.requests) == 4
+
+
+def test_concurrent_omim_client(stub_server):
+    base_url = f'http://127.0.0.1:{stub_server.server_port}'
+    mims = [str(100000 + i) for i in range(45)]
+    client = ConcurrentOmimClient(
+        api_key='test', base_url=base_url, concurrency=3, rate_limiter=RateLimiter(requests_per_second=100))
+    results, fetch_success = client._fetch_ids(mims)
+    assert fetch_success
+    assert [x['entry']['mimNumber'] for x in results] == [int(x) for x in mims]
+    assert len(stub_server.requests) == 3
+    # Rate limited on 2nd batch: Stops, but batches already in flight are kept. Only the failed batch is missing.
+    stub_server.rate_limited_mims = {mims[25]}
+    results, fetch_success = client._fetch_ids(mims)
+    assert not fetch_success
+    assert [x['entry']['mimNumber'] for x in results] == [int(x) for x in mims[:20] + mims[40:]]
+    assert len(stub_server.requests) == 6
+    # Rate limited on 1st batch, w/ more batches than fit in flight: No more are requested
+    mims = [str(200000 + i) for i in range(120)]
+    stub_server.rate_limited_mims = {mims[0]}
+    results, fetch_success = client._fetch_ids(mims)
+    assert not fetch_success
+    assert len(results) == 40
+    assert len(stub_server.requests) == 9
+
+
+def test_omim_client_fetch_since_date(stub_server):
+    stub_server.search_mims = [str(100000 + i) for i in range(30)]
+    client = OmimClient(
+        api_key='test', base_url=f'http://127.0.0.1:{stub_server.server_port}',
+        rate_limiter=RateLimiter(requests_per_second=100))
+    # Batches are yielded as they are fetched
+    batches = client._iter_since_date(datetime(2024, 1, 1))
+    assert len(next(batches)) == BATCH_SIZE
+    assert len(stub_server.requests) == 1
+    batches.close()
+    # Search results used directly: 2 pages
+    results, fetch_success = client._fetch_since_date(datetime(2024, 1, 1))
+    assert fetch_success
+    assert [x['entry']['mimNumber'] for x in results] == [int(x) for x in stub_server.search_mims]
+    assert all('referenceList' in x['entry'] for x in results)
+    assert len(stub_server.requests) == 3
+    # Refetch: 2 more search pages, then 2 batches from the entry API
+    results2, fetch_success = client._fetch_since_date(datetime(2024, 1, 1), refetch=True)
+    assert results2 == results
+    assert len(stub_server.requests) == 7
+    # Excluded MIMs, e.g. replayed from a journal: Not fetched. 2 search pages, then 1 batch from the entry API
+    batches = client._iter_since_date(datetime(2024, 1, 1), exclude_ids=set(stub_server.search_mims[:BATCH_SIZE]))
+    assert [x for batch in batches for x in batch] == results[BATCH_SIZE:]
+    assert len(stub_server.requests) == 10
+
+
+def test_project():
+    entry = {
+        'mimNumber': 100050, 'prefix': '%', 'status': 'live', 'titles': {'preferredTitle': 'AARSKOG SYNDROME'},
+        'referenceList': [
+            {'reference': {'referenceNumber': 1, 'pubmedID': 6875424, 'title': 'A new syndrome'}},
+            {'reference': {'referenceNumber': 2, 'title': 'Personal Communication'}}],
+        'externalLinks': {'umlsIDs': 'C1861305', 'orphanetDiseases': '915;;Aarskog-Scott syndrome', 'geneIDs': '2245'},
+    }
+    projected = project(entry, ENTRY_PROJECTION)
+    assert projected == {
+        'mimNumber': 100050,
+        'referenceList': [{'reference': {'pubmedID': 6875424}}, {'reference': {}}],
+        'externalLinks': {'umlsIDs': 'C1861305', 'orphanetDiseases': '915;;Aarskog-Scott syndrome'},
+    }
+    assert get_pubs(projected) == get_pubs(entry) == ['6875424']
+    assert get_mapped_ids(projected) == get_mapped_ids(entry)
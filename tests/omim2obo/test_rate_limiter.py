@@ -0,0 +1,66 @@
+import threading
+from datetime import date, timedelta
+
+from omim2obo.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    """Clock that only advances when sleeping"""
+    def __init__(self):
+        self.now = 0.0
+        self.day = date(2024, 1, 1)
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+def test_rate_limiter():
+    clock = FakeClock()
+    limiter = RateLimiter(
+        requests_per_second=2, min_requests_per_second=0.5, max_requests_per_second=2.5, increase=0.5, daily_quota=50,
+        clock=lambda: clock.now, sleep=clock.sleep, today=lambda: clock.day)
+    # Token bucket: 1st request immediate, then paced at 2/s
+    for _ in range(3):
+        assert limiter.acquire(cost=15)
+    assert clock.now == 1
+    # Daily quota: 65 of 50 would be exceeded. Resets next day.
+    assert not limiter.acquire(cost=20)
+    assert limiter.acquire(cost=0)
+    clock.day += timedelta(days=1)
+    assert limiter.quota_remaining() == 50
+    # AIMD
+    limiter.on_throttle()
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.rate == 0.5
+    limiter.on_success()
+    assert limiter.rate == 1
+    for _ in range(4):
+        limiter.on_success()
+    assert limiter.rate == 2.5
+
+
+def test_rate_limiter_waits_w_out_lock():
+    clock = FakeClock()
+    waiting, done_waiting = threading.Event(), threading.Event()
+
+    def sleep(seconds: float):
+        """Sleep until the test lets it finish"""
+        waiting.set()
+        done_waiting.wait(5)
+        clock.sleep(seconds)
+
+    limiter = RateLimiter(requests_per_second=1, clock=lambda: clock.now, sleep=sleep)
+    assert limiter.acquire()
+    thread = threading.Thread(target=limiter.acquire)
+    thread.start()
+    assert waiting.wait(5)
+    # Rate can be adapted while another thread waits for a token
+    adapt = threading.Thread(target=limiter.on_throttle)
+    adapt.start()
+    adapt.join(1)
+    assert not adapt.is_alive()
+    done_waiting.set()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert limiter.tokens < 1
@@ -0,0 +1,40 @@
+import pytest
+from rdflib import Graph, Literal, OWL, RDF, RDFS
+from rdflib.compare import isomorphic
+
+from omim2obo.main import add_triple_and_optional_annotations, add_subclassof_restriction
+from omim2obo.namespaces import *
+from omim2obo.triple_sinks import NTriplesSink, TripleSink
+
+
+def _add_triples(graph):
+    graph.add((OMIM['100050'], RDF.type, OWL.Class))
+    graph.add((OMIM['100050'], RDFS.label, Literal('aarskog syndrome, "autosomal" dominant\n')))
+    graph.add((OMIM['100050'], OWL.deprecated, Literal(True)))
+    add_triple_and_optional_annotations(graph, OMIM['100050'], oboInOwl.hasExactSynonym, 'AAS',
+        [(oboInOwl.hasSynonymType, OMO['0003000'])])
+    add_subclassof_restriction(graph, RO['0002525'], CHR['9606chr1q43'], OMIM['118494'])
+
+
+def test_ntriples_sink(tmp_path):
+    outpath = tmp_path / 'omim.ttl'
+    graph = Graph()
+    _add_triples(graph)
+    with NTriplesSink(outpath) as sink:
+        _add_triples(sink)
+        assert not outpath.exists()  # only moved into place on close
+
+    for fmt in ['nt', 'turtle']:
+        assert isomorphic(Graph().parse(outpath, format=fmt), graph)
+    # Build fails part way: Unfinished output discarded, previous output kept
+    with pytest.raises(RuntimeError):
+        with NTriplesSink(outpath) as sink:
+            sink.add((OMIM['100070'], RDF.type, OWL.Class))
+            raise RuntimeError('Build failed')
+    assert isomorphic(Graph().parse(outpath, format='nt'), graph)
+    assert list(tmp_path.iterdir()) == [outpath]
+
+
+def test_triple_sink_abstract():
+    with pytest.raises(TypeError):
+        TripleSink()
@@ -0,0 +1,23 @@
+from omim2obo.utils.utils import ProtectedAssociations, get_protected_associations
+
+
+def test_protected_associations(tmp_path):
+    path = tmp_path / 'protected-disease-gene.tsv'
+    path.write_text(
+        'phenotype_mim\tmondo_id\tmondo_label\ttype\tgene_mim\thgnc_id\torcid\tcomment\n'
+        'OMIM:619151\tMONDO:0030894\tAMED SYNDROME, DIGENIC\tdigenic\tOMIM:100650\tHGNC:404\t'
+        'https://orcid.org/0000-0002-4142-7153\t\n'
+        'OMIM:619151\tMONDO:0030894\tAMED SYNDROME, DIGENIC\tdigenic\tOMIM:103710\tHGNC:253\t\t\n'
+        'OMIM:100050\tMONDO:0007037\tAARSKOG SYNDROME\tmanually reviewed\t\t\t\t\n')
+    protected: ProtectedAssociations = get_protected_associations(path)
+    assert len(protected.associations) == 3
+    x = protected.get('619151', '100650')
+    assert (x.hgnc_id, x.mondo_id, str(x.orcid)) == ('404', 'MONDO:0030894', 'https://orcid.org/0000-0002-4142-7153')
+    assert protected.get('619151', '103710').orcid is None
+    assert protected.get('100050', '') is None
+    assert [x.gene_mim for x in protected.for_phenotype('619151')] == ['100650', '103710']
+    assert [x.mondo_id for x in protected.for_phenotype('100050')] == ['MONDO:0007037']
+    assert [x.phenotype_mim for x in protected.for_gene('103710')] == ['619151']
+    assert protected.for_gene('999999') == []
+    # Shared: Only read again if the file changed
+    assert get_protected_associations(path) is protected